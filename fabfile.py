@@ -3,6 +3,8 @@ import json
 import os
 import subprocess
 import sys
+import time
+from contextlib import contextmanager
 from shlex import quote
 
 from invoke import run as local
@@ -15,19 +17,47 @@ LOCAL_DUMP_DIR = "database_dumps"
 PRODUCTION_APP_INSTANCE = "ukgwa-production"
 STAGING_APP_INSTANCE = "ukgwa-staging"
 
-LOCAL_MEDIA_DIR = "media"
-LOCAL_IMAGES_DIR = LOCAL_MEDIA_DIR + "/original_images"
 LOCAL_DATABASE_NAME = "ukgwa"
 
+# The tables which can be left empty by `import_data`, as their rows are
+# regenerated locally (or aren't needed)
+SKIPPABLE_TABLES = {
+    "renditions": ["images_rendition"],
+    "search": ["wagtailsearch_indexentry"],
+    "cache": ["database_cache"],
+}
+# Pruned after the restore rather than skipped, as pages reference them
+SKIPPABLE_DATA = [*SKIPPABLE_TABLES, "revisions"]
+
+IMPORT_DATA_HELP = {
+    "new_default_site_hostname": "Pass an empty string to skip the default site's hostname replacement"
+    " - default is 'localhost:8000'",
+    "jobs": "Number of tables restored in parallel - default is 4",
+    "skip": "Comma-separated data not to import, from: " + ", ".join(SKIPPABLE_DATA),
+    "rebuild_search_index": "Rebuild the search index after importing",
+    "regenerate_renditions": "Generate the renditions of live pages' images after importing",
+}
+PULL_DATA_STREAM_HELP = (
+    "Restore the backup as it's downloaded, rather than saving it first and"
+    " restoring it in parallel"
+)
+
 
 ############
 # Production
 ############
 
 
-def dexec(cmd, service="web"):
+def dexec(cmd, service="web", env=None, **kwargs):
+    # Environment variables are passed by name, so that their values (e.g.
+    # credentials) aren't part of the command line
+    env_args = "".join(" -e {}".format(quote(name)) for name in env or {})
     return local(
-        "docker compose exec -T {} bash -c {}".format(quote(service), quote(cmd))
+        "docker compose exec -T{} {} bash -c {}".format(
+            env_args, quote(service), quote(cmd)
+        ),
+        env=env or {},
+        **kwargs,
     )
 
 
@@ -120,43 +150,170 @@ def delete_docker_database(c):
     dexec("psql -c 'DROP SCHEMA public CASCADE; CREATE SCHEMA public;'")
 
 
-@task(
-    help={
-        "new_default_site_hostname": "Pass an empty string to skip the default site's hostname replacement"
-        " - default is 'localhost:8000'"
-    }
-)
-def import_data(
-    c, database_filename: str, new_default_site_hostname: str = "localhost:8000"
-):
+@contextmanager
+def timed_phase(timings, name):
+    print(make_bold(f"{name.capitalize()}..."))
+    start = time.monotonic()
+    yield
+    timings[name] = time.monotonic() - start
+
+
+def parse_skip(skip):
+    skipped = {name.strip() for name in skip.split(",") if name.strip()}
+    unknown = skipped - set(SKIPPABLE_DATA)
+    if unknown:
+        raise ValueError(
+            "Unknown data to skip: {}. Choose from: {}".format(
+                ", ".join(sorted(unknown)), ", ".join(SKIPPABLE_DATA)
+            )
+        )
+    return skipped
+
+
+def get_skipped_tables(skipped):
+    return [
+        table
+        for name, tables in SKIPPABLE_TABLES.items()
+        if name in skipped
+        for table in tables
+    ]
+
+
+def restore_dump(database_filename, jobs, skipped_tables):
     """
-    Import local data file to the db container.
+    Restore a custom or directory-format dump `jobs` tables at a time,
+    leaving the `skipped_tables` empty.
     """
-    delete_docker_database(c)
+    options = f"--jobs={int(jobs)} --no-owner --no-acl --dbname={LOCAL_DATABASE_NAME}"
+    if not skipped_tables:
+        dexec(f"pg_restore {options} {quote(database_filename)}")
+        return
+    # Restore everything but the data of the skipped tables, listed in the
+    # dump's table of contents as e.g. "TABLE DATA public images_rendition owner"
+    list_filename = "/tmp/import_data.list"
+    pattern = " TABLE DATA public ({}) ".format("|".join(skipped_tables))
     dexec(
-        f"pg_restore --clean --if-exists --no-owner --no-acl --dbname={LOCAL_DATABASE_NAME} {database_filename}",
+        f"set -o pipefail; pg_restore --list {quote(database_filename)} "
+        f"| grep -v -E {quote(pattern)} > {list_filename} "
+        f"&& pg_restore {options} --use-list={list_filename} {quote(database_filename)}"
     )
 
+
+def stream_dump(url, skipped_tables):
+    """
+    Restore the dump at `url` as it's downloaded, without saving it.
+    """
+    # pg_restore can only restore one table at a time from its standard
+    # input, and can't leave tables out, so they're emptied afterwards.
+    # The URL is passed in the environment, as it contains a token.
+    local(
+        'set -o pipefail; curl --silent --show-error --fail --location "$DUMP_URL" '
+        "| docker compose exec -T web pg_restore --no-owner --no-acl "
+        f"--dbname={LOCAL_DATABASE_NAME}",
+        env={"DUMP_URL": url},
+    )
+    if skipped_tables:
+        dexec("psql -c {}".format(quote(f"TRUNCATE {', '.join(skipped_tables)};")))
+
+
+def update_default_site_hostname(new_default_site_hostname):
     # When pulling data from a heroku environment, the hostname in wagtail > sites is not updated.
     # This means when browsing the site locally with this pulled data you can end up with links to staging, or even
     # the live site.
     # --> let's update the default site hostname values
+    if ":" in new_default_site_hostname:
+        hostname, port = new_default_site_hostname.split(":")
+    else:
+        hostname, port = new_default_site_hostname, "8000"
+    assert hostname and port and port.isdigit()
+    dexec(
+        f"psql -c \"UPDATE wagtailcore_site SET hostname = '{hostname}', port = {port} WHERE is_default_site IS TRUE;\""  # noqa: E501
+    )
+    print(f"Default site's hostname was updated to '{hostname}:{port}'.")
+
+
+def run_import(
+    c,
+    restore,
+    new_default_site_hostname="localhost:8000",
+    skip="",
+    rebuild_search_index=False,
+    regenerate_renditions=False,
+    anonymise=False,
+    timings=None,
+):
+    """
+    Replace the local database using `restore(skipped_tables)`, then run the
+    steps following an import, reporting the time taken by each.
+    """
+    skipped = parse_skip(skip)
+    timings = {} if timings is None else timings
+
+    with timed_phase(timings, "dropping the database"):
+        delete_docker_database(c)
+
+    with timed_phase(timings, "restoring"):
+        restore(get_skipped_tables(skipped))
+
+    if "revisions" in skipped:
+        # Only the revisions which are live, the latest or in moderation are
+        # kept, as pages and snippets reference them
+        with timed_phase(timings, "pruning revisions"):
+            dexec("./manage.py purge_revisions --skip-checks")
+
     if new_default_site_hostname:
-        if ":" in new_default_site_hostname:
-            hostname, port = new_default_site_hostname.split(":")
-        else:
-            hostname, port = new_default_site_hostname, "8000"
-        assert hostname and port and port.isdigit()
-        dexec(
-            f"psql -c \"UPDATE wagtailcore_site SET hostname = '{hostname}', port = {port} WHERE is_default_site IS TRUE;\""  # noqa: E501
-        )
-        print(f"Default site's hostname was updated to '{hostname}:{port}'.")
+        with timed_phase(timings, "updating the hostname"):
+            update_default_site_hostname(new_default_site_hostname)
 
+    if anonymise:
+        # Before any index or rendition is generated from the data
+        with timed_phase(timings, "anonymising"):
+            dexec("./manage.py anonymise_data --skip-checks")
+
+    commands = []
+    if rebuild_search_index:
+        commands.append("./manage.py rebuild_search_index --skip-checks")
+    if regenerate_renditions:
+        commands.append("./manage.py generate_renditions --skip-checks")
+    if commands:
+        # Independent of each other, so run side by side
+        with timed_phase(timings, "rebuilding"):
+            promises = [dexec(command, asynchronous=True) for command in commands]
+            for promise in promises:
+                promise.join()
+
+    print(make_bold("Time per phase:"))
+    for name, duration in timings.items():
+        print(f"{duration:>8.1f}s  {name}")
+    print(f"{sum(timings.values()):>8.1f}s  total")
     print(
         "Any superuser accounts you previously created locally will have been wiped and will need to be recreated."
     )
 
 
+@task(help=IMPORT_DATA_HELP)
+def import_data(
+    c,
+    database_filename: str,
+    new_default_site_hostname: str = "localhost:8000",
+    jobs: int = 4,
+    skip: str = "",
+    rebuild_search_index: bool = False,
+    regenerate_renditions: bool = False,
+):
+    """
+    Import local data file to the db container.
+    """
+    run_import(
+        c,
+        lambda skipped_tables: restore_dump(database_filename, jobs, skipped_tables),
+        new_default_site_hostname=new_default_site_hostname,
+        skip=skip,
+        rebuild_search_index=rebuild_search_index,
+        regenerate_renditions=regenerate_renditions,
+    )
+
+
 #########
 # Production
 #########
@@ -174,10 +331,26 @@ def pull_production_images(c):
     pull_images_from_s3_heroku(c, PRODUCTION_APP_INSTANCE)
 
 
-@task
-def pull_production_data(c):
+@task(help={"stream": PULL_DATA_STREAM_HELP, **IMPORT_DATA_HELP})
+def pull_production_data(
+    c,
+    stream: bool = False,
+    jobs: int = 4,
+    skip: str = "",
+    rebuild_search_index: bool = False,
+    regenerate_renditions: bool = False,
+):
     """Pull database from production Heroku Postgres"""
-    pull_database_from_heroku(c, PRODUCTION_APP_INSTANCE, anonymise=True)
+    pull_database_from_heroku(
+        c,
+        PRODUCTION_APP_INSTANCE,
+        anonymise=True,
+        stream=stream,
+        jobs=jobs,
+        skip=skip,
+        rebuild_search_index=rebuild_search_index,
+        regenerate_renditions=regenerate_renditions,
+    )
 
 
 @task
@@ -203,10 +376,25 @@ def pull_staging_images(c):
     pull_images_from_s3_heroku(c, STAGING_APP_INSTANCE)
 
 
-@task
-def pull_staging_data(c):
+@task(help={"stream": PULL_DATA_STREAM_HELP, **IMPORT_DATA_HELP})
+def pull_staging_data(
+    c,
+    stream: bool = False,
+    jobs: int = 4,
+    skip: str = "",
+    rebuild_search_index: bool = False,
+    regenerate_renditions: bool = False,
+):
     """Pull database from staging Heroku Postgres"""
-    pull_database_from_heroku(c, STAGING_APP_INSTANCE)
+    pull_database_from_heroku(
+        c,
+        STAGING_APP_INSTANCE,
+        stream=stream,
+        jobs=jobs,
+        skip=skip,
+        rebuild_search_index=rebuild_search_index,
+        regenerate_renditions=regenerate_renditions,
+    )
 
 
 @task
@@ -220,30 +408,25 @@ def staging_shell(c):
 ####
 
 
-def aws(c, command, aws_access_key_id, aws_secret_access_key):
-    return local(
-        "aws {command}".format(
-            command=command,
-        ),
-        env={
-            "AWS_ACCESS_KEY_ID": aws_access_key_id,
-            "AWS_SECRET_ACCESS_KEY": aws_secret_access_key,
-        },
-    )
-
-
 def pull_media_from_s3(
     c,
     aws_access_key_id,
     aws_secret_access_key,
     aws_storage_bucket_name,
-    local_media_dir=LOCAL_MEDIA_DIR,
+    originals_only=False,
 ):
-    aws_cmd = "s3 sync --delete s3://{bucket_name} {local_media}".format(
-        bucket_name=aws_storage_bucket_name,
-        local_media=local_media_dir,
+    # See ukgwa/utils/s3_sync.py. Files already downloaded are skipped, so an
+    # interrupted sync can be resumed by running the task again.
+    args = "--delete --originals-only" if originals_only else "--delete"
+    dexec(
+        "./manage.py sync_media_from_s3 {} {}".format(
+            args, quote(aws_storage_bucket_name)
+        ),
+        env={
+            "AWS_ACCESS_KEY_ID": aws_access_key_id,
+            "AWS_SECRET_ACCESS_KEY": aws_secret_access_key,
+        },
     )
-    aws(c, aws_cmd, aws_access_key_id, aws_secret_access_key)
 
 
 def pull_images_from_s3_heroku(c, app_instance):
@@ -264,14 +447,16 @@ def pull_images_from_s3(
     aws_access_key_id,
     aws_secret_access_key,
     aws_storage_bucket_name,
-    local_images_dir=LOCAL_IMAGES_DIR,
 ):
-    aws_cmd = (
-        "s3 sync --delete s3://{bucket_name}/original_images {local_media}".format(
-            bucket_name=aws_storage_bucket_name, local_media=local_images_dir
-        )
+    # Only the original images referenced by the local database are synced,
+    # so pull the data first.
+    pull_media_from_s3(
+        c,
+        aws_access_key_id,
+        aws_secret_access_key,
+        aws_storage_bucket_name,
+        originals_only=True,
     )
-    aws(c, aws_cmd, aws_access_key_id, aws_secret_access_key)
 
     # The above command just syncs the original images, so we need to drop the wagtailimages_renditions
     # table so that the renditions will be re-created when requested on the local build.
@@ -296,26 +481,48 @@ def pull_media_from_s3_heroku(c, app_instance):
     )
 
 
-def pull_database_from_heroku(c, app_instance, anonymise=False):
-    datestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-
-    local(
-        "heroku pg:backups:download --output={dump_folder}/{datestamp}.dump --app {app}".format(
-            app=app_instance, dump_folder=LOCAL_DUMP_DIR, datestamp=datestamp
-        ),
-    )
+def pull_database_from_heroku(
+    c, app_instance, anonymise=False, stream=False, jobs=4, **import_options
+):
+    if stream:
+        url = local(
+            "heroku pg:backups:url --app {app}".format(app=app_instance), hide=True
+        ).stdout.strip()
+        run_import(
+            c,
+            lambda skipped_tables: stream_dump(url, skipped_tables),
+            anonymise=anonymise,
+            **import_options,
+        )
+        return
 
-    import_data(c, f"/app/{LOCAL_DUMP_DIR}/{datestamp}.dump")
+    datestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    timings = {}
 
-    local(
-        "rm {dump_folder}/{datestamp}.dump".format(
-            dump_folder=LOCAL_DUMP_DIR,
-            datestamp=datestamp,
-        ),
-    )
+    with timed_phase(timings, "downloading"):
+        local(
+            "heroku pg:backups:download --output={dump_folder}/{datestamp}.dump --app {app}".format(
+                app=app_instance, dump_folder=LOCAL_DUMP_DIR, datestamp=datestamp
+            ),
+        )
 
-    if anonymise:
-        dexec("./manage.py run_birdbath --skip-checks")
+    try:
+        run_import(
+            c,
+            lambda skipped_tables: restore_dump(
+                f"/app/{LOCAL_DUMP_DIR}/{datestamp}.dump", jobs, skipped_tables
+            ),
+            anonymise=anonymise,
+            timings=timings,
+            **import_options,
+        )
+    finally:
+        local(
+            "rm {dump_folder}/{datestamp}.dump".format(
+                dump_folder=LOCAL_DUMP_DIR,
+                datestamp=datestamp,
+            ),
+        )
 
 
 def open_heroku_shell(c, app_instance, shell_command="bash"):
@@ -1,7 +1,21 @@
+import os
+import time
+
 import gunicorn
 
-# Tell gunicorn to run our app
-wsgi_app = "ukgwa.wsgi:application"
+# Serve the WSGI app with sync workers (the default), or the ASGI app with
+# uvicorn workers, which serve several requests at once in threads. See
+# docs/server-modes.md.
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "ukgwa.asgi:application"
+    worker_class = "ukgwa.asgi_worker.UvicornWorker"
+elif SERVER_MODE == "wsgi":
+    # Tell gunicorn to run our app
+    wsgi_app = "ukgwa.wsgi:application"
+else:
+    raise ValueError(f"SERVER_MODE must be 'wsgi' or 'asgi', not {SERVER_MODE!r}")
 
 # Replace gunicorn's 'Server' HTTP header to avoid leaking info to attackers
 gunicorn.SERVER = ""
@@ -18,3 +32,29 @@ timeout = 25
 
 # Load app pre-fork to save memory and worker startup time
 preload_app = True
+
+
+def when_ready(server):
+    # Warm up the preloaded app in the master process, so that every worker
+    # forked from it, including those replacing recycled workers, starts with
+    # compiled templates and filled caches. See ukgwa/utils/warmup.py.
+    if server.cfg.preload_app:
+        from ukgwa.utils.warmup import warm_up
+
+        warm_up()
+
+
+def pre_fork(server, worker):
+    worker.forked_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    from ukgwa.utils.warmup import open_connections, warm_up
+
+    if not worker.cfg.preload_app:
+        warm_up()
+    # Connect before accepting requests, rather than on the first ones
+    open_connections()
+    worker.log.info(
+        "Worker ready %.3fs after forking", time.monotonic() - worker.forked_at
+    )
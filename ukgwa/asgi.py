@@ -0,0 +1,20 @@
+"""
+ASGI config for ukgwa project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+gunicorn serves it with uvicorn workers when SERVER_MODE is "asgi", see
+gunicorn.conf.py.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ukgwa.settings.production")
+# The settings depend on it, e.g. for persistent database connections
+os.environ.setdefault("SERVER_MODE", "asgi")
+
+application = get_asgi_application()
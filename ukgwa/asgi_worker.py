@@ -0,0 +1,21 @@
+"""
+The gunicorn worker class used when SERVER_MODE is "asgi", see
+gunicorn.conf.py.
+"""
+
+import os
+
+from uvicorn_worker import UvicornWorker as BaseUvicornWorker
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """
+    A uvicorn worker serving at most `ASGI_MAX_CONCURRENCY` requests at once,
+    answering any more with a 503. Each request being served uses a thread
+    and a database connection.
+    """
+
+    CONFIG_KWARGS = {
+        **BaseUvicornWorker.CONFIG_KWARGS,
+        "limit_concurrency": int(os.environ.get("ASGI_MAX_CONCURRENCY", 40)),
+    }
@@ -0,0 +1,9 @@
+"""
+Performance regression benchmarks.
+
+`fixtures` builds a realistic site with the project's factories, `measure`
+records the queries, wall time and memory used by a request, and the tests in
+`tests` fail when a page or template tag exceeds its thresholds.
+
+See docs/benchmarks.md for how to run them.
+"""
@@ -0,0 +1,306 @@
+"""
+A realistic site to benchmark against, built with the project's factories.
+
+The size of the site is multiplied by `BENCHMARK_SCALE` (1 by default):
+
+- `SECTION_COUNT` sections under the home page, each nesting index pages
+  `SECTION_DEPTH` levels deep, with `5 * scale` information pages at every
+  level.
+- Information pages have long bodies mixing text, images, quotes and stats
+  linking to other pages, and calls to action, as well as related pages.
+- The navigation settings are fully populated.
+
+The search benchmark builds its own, larger, set of pages (see
+`build_search_pages`).
+
+Building the site is reproducible: the same scale and seed give the same
+tree, titles and bodies.
+"""
+
+import os
+import random
+import uuid
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from wagtail.models import Page, Site
+from wagtail.rich_text import RichText
+from wagtail.search.backends import get_search_backend
+
+import factory.random
+from faker import Faker
+from faker.providers.lorem.en_US import Provider as LoremProvider
+
+from ukgwa.core.factories import CallToActionSnippetFactory
+from ukgwa.core.models import PageRelatedPage
+from ukgwa.home.models import HomePage
+from ukgwa.images.factories import CustomImageFactory
+from ukgwa.images.renditions import generate_renditions, get_all_renditions
+from ukgwa.navigation.models import NavigationSettings
+from ukgwa.standardpages.factories import IndexPageFactory, InformationPageFactory
+from ukgwa.standardpages.models import InformationPage
+
+SECTION_COUNT = 4
+SECTION_DEPTH = 3
+PAGES_PER_LEVEL = 5
+BODY_LENGTH = 60
+RELATED_PAGE_COUNT = 3
+
+# Searched for by the search benchmark
+SEARCH_TERM = "census"
+
+
+def get_benchmark_scale():
+    return max(1, int(os.environ.get("BENCHMARK_SCALE", 1)))
+
+
+class BenchmarkSite:
+    """
+    The pages and objects of the generated site, for the benchmarks to
+    request.
+    """
+
+    def __init__(self, home, sections, index_pages, information_pages):
+        self.home = home
+        self.sections = sections
+        self.index_pages = index_pages
+        self.information_pages = information_pages
+
+    @property
+    def deepest_index_page(self):
+        return max(self.index_pages, key=lambda page: page.depth)
+
+    @property
+    def information_page(self):
+        return self.information_pages[0]
+
+
+def _build_body(rng, fake, pages, images, calls_to_action):
+    def internal_link():
+        return [("internal_link", {"page": rng.choice(pages), "link_text": ""})]
+
+    body = []
+    for i in range(BODY_LENGTH):
+        kind = i % 6
+        if kind == 0:
+            body.append(("heading", fake.sentence(nb_words=5)))
+        elif kind == 1:
+            paragraphs = "".join(f"<p>{text}</p>" for text in fake.paragraphs(3))
+            body.append(("paragraph", paragraphs))
+        elif kind == 2:
+            image = rng.choice(images)
+            body.append(("image", {"image": image, "caption": fake.sentence()}))
+        elif kind == 3:
+            quote = {"quote": fake.sentence(), "link": internal_link()}
+            body.append(("quote", quote))
+        elif kind == 4:
+            body.append(("call_to_action", rng.choice(calls_to_action)))
+        else:
+            stats = [
+                {"number": str(rng.randint(1, 1000)), "link": internal_link()}
+                for _ in range(3)
+            ]
+            body.append(("stat_block", {"stats": stats}))
+    return body
+
+
+def _publish(page):
+    """
+    Give `page` a live revision, like publishing it would, without running
+    the publishing signal handlers for every page of the site.
+    """
+    revision = page.save_revision()
+    now = timezone.now()
+    Page.objects.filter(pk=page.pk).update(
+        live_revision=revision,
+        has_unpublished_changes=False,
+        first_published_at=now,
+        last_published_at=now,
+    )
+
+
+def _populate_navigation(site, sections, pages, images):
+    def link(page):
+        return ("link", {"page": page, "title": ""})
+
+    settings = NavigationSettings.for_site(site)
+    settings.primary_navigation = [link(section) for section in sections]
+    settings.secondary_navigation = [link(page) for page in pages[:3]]
+    settings.footer_navigation = [
+        (
+            "column",
+            {
+                "heading": f"Column {i}",
+                "links": [{"page": page, "title": ""} for page in column],
+            },
+        )
+        for i, column in enumerate([pages[0:5], pages[5:10], pages[10:15]])
+    ]
+    settings.footer_links = [link(page) for page in pages[-5:]]
+    settings.footer_logo_cloud = [
+        ("logo", {"logo": {"image": image}, "url": "https://www.example.com"})
+        for image in images[:4]
+    ]
+    settings.save()
+
+
+def build_benchmark_site(scale=None, seed=0):
+    """
+    Build the benchmark site under the default site's home page and return a
+    `BenchmarkSite`.
+    """
+    scale = get_benchmark_scale() if scale is None else scale
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    factory.random.reseed_random(seed)
+
+    site = Site.objects.get(is_default_site=True)
+    home = HomePage.objects.get(pk=site.root_page_id)
+
+    images = [CustomImageFactory(title=fake.sentence()) for _ in range(10 * scale)]
+    calls_to_action = [
+        CallToActionSnippetFactory(image=rng.choice(images)) for _ in range(5)
+    ]
+
+    sections = []
+    index_pages = []
+    information_pages = []
+    for section_number in range(SECTION_COUNT):
+        parent = home
+        for level in range(SECTION_DEPTH):
+            parent = parent.add_child(
+                instance=IndexPageFactory.build(
+                    title=fake.sentence(nb_words=3),
+                    slug=f"section-{section_number}-{level}",
+                    listing_image=rng.choice(images),
+                )
+            )
+            index_pages.append(parent)
+            if level == 0:
+                sections.append(parent)
+
+            for page_number in range(PAGES_PER_LEVEL * scale):
+                information_pages.append(
+                    parent.add_child(
+                        instance=InformationPageFactory.build(
+                            title=fake.sentence(nb_words=4),
+                            slug=f"page-{section_number}-{level}-{page_number}",
+                            listing_image=rng.choice(images),
+                            body=[],
+                        )
+                    )
+                )
+
+    # Fill the bodies in once every page exists, so they can link anywhere
+    for page in information_pages:
+        page.body = _build_body(rng, fake, information_pages, images, calls_to_action)
+        page.save()
+        PageRelatedPage.objects.bulk_create(
+            PageRelatedPage(parent=page, page=related, sort_order=i)
+            for i, related in enumerate(
+                rng.sample(information_pages, RELATED_PAGE_COUNT)
+            )
+        )
+
+    for page in [home, *index_pages, *information_pages]:
+        _publish(page)
+
+    _populate_navigation(site, sections, information_pages, images)
+
+    # Renditions are generated ahead of time on a real site
+    image_by_id = {image.pk: image for image in images}
+    for image_id, filter_specs in get_all_renditions().items():
+        if image_id in image_by_id:
+            generate_renditions(image_by_id[image_id], sorted(filter_specs))
+
+    return BenchmarkSite(home, sections, index_pages, information_pages)
+
+
+def build_search_pages(count, seed=0):
+    """
+    Add `count` information pages with generated text under a new index page
+    of the default site, index them for search and return the index page.
+
+    Words are picked from a vocabulary with a Zipfian distribution, like in
+    real text. `SEARCH_TERM` is in the title of 1% of the pages and in the
+    text of another 10%.
+
+    The pages are inserted in bulk (building hundreds of thousands of pages
+    with `add_child` would take hours), so they have no revisions and their
+    publishing signal handlers aren't run.
+    """
+    rng = random.Random(seed)
+    vocabulary = list(LoremProvider.word_list)
+    rng.shuffle(vocabulary)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    def words(count):
+        return " ".join(rng.choices(vocabulary, weights, k=count))
+
+    site = Site.objects.get(is_default_site=True)
+    home = HomePage.objects.get(pk=site.root_page_id)
+    parent = home.add_child(
+        instance=IndexPageFactory.build(title="Search", slug="search-pages")
+    )
+
+    content_type = ContentType.objects.get_for_model(InformationPage)
+    now = timezone.now()
+    pages = []
+    for i in range(count):
+        title = words(4).capitalize()
+        introduction = words(30)
+        paragraphs = [words(80) for _ in range(3)]
+        if i % 100 == 0:
+            title = f"{title} {SEARCH_TERM}"
+        elif i % 10 == 5:
+            paragraphs[1] = f"{paragraphs[1]} {SEARCH_TERM}"
+
+        slug = f"page-{i}"
+        pages.append(
+            InformationPage(
+                path=InformationPage._get_path(parent.path, parent.depth + 1, i + 1),
+                depth=parent.depth + 1,
+                numchild=0,
+                title=title,
+                draft_title=title,
+                slug=slug,
+                url_path=f"{parent.url_path}{slug}/",
+                content_type=content_type,
+                locale_id=parent.locale_id,
+                translation_key=uuid.uuid4(),
+                live=True,
+                first_published_at=now,
+                last_published_at=now,
+                listing_summary=words(15),
+                introduction=introduction,
+                body=[
+                    ("paragraph", RichText(f"<p>{paragraph}</p>"))
+                    for paragraph in paragraphs
+                ],
+            )
+        )
+
+    # `bulk_create` doesn't support multi-table inheritance, so the pages are
+    # created, then their `InformationPage` rows inserted
+    batch_size = 500
+    page_fields = [field.attname for field in Page._meta.concrete_fields]
+    created_pages = Page.objects.bulk_create(
+        [Page(**{name: getattr(page, name) for name in page_fields}) for page in pages],
+        batch_size=batch_size,
+    )
+    for page, created_page in zip(pages, created_pages):
+        page.id = page.page_ptr_id = created_page.pk
+    information_page_fields = InformationPage._meta.local_concrete_fields
+    for start in range(0, len(pages), batch_size):
+        end = start + batch_size
+        InformationPage.objects._insert(pages[start:end], information_page_fields)
+    Page.objects.filter(pk=parent.pk).update(numchild=count)
+
+    backend = get_search_backend()
+    for start in range(0, len(pages), batch_size):
+        end = start + batch_size
+        backend.add_bulk(InformationPage, pages[start:end])
+
+    return parent
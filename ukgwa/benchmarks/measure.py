@@ -0,0 +1,47 @@
+import time
+import tracemalloc
+from typing import NamedTuple
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class Measurement(NamedTuple):
+    queries: int
+    # Seconds
+    duration: float
+    # Peak memory allocated, in bytes
+    peak_memory: int
+
+    def as_dict(self):
+        return self._asdict()
+
+
+def measure(func, setup=None):
+    """
+    Call `func` and return its result and a `Measurement`.
+
+    The number of queries and the wall time are measured first, then memory
+    is traced while calling `func` a second time, as tracing slows it down.
+    `setup` (e.g. clearing the cache) is called before each call, so that
+    both start from the same state.
+    """
+    if setup is not None:
+        setup()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+    # Before the next request resets the queries log
+    query_count = len(queries)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, Measurement(query_count, duration, peak_memory)
@@ -0,0 +1,111 @@
+import json
+import os
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ukgwa.utils.query_detector import QueryDetector
+
+from .fixtures import build_benchmark_site, get_benchmark_scale
+from .measure import measure
+
+MB = 1024 * 1024
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class BenchmarkTestCase(TestCase):
+    """
+    Build the benchmark site once for the test case, and check measurements
+    against thresholds, given as `Measurement`s of the maximum values.
+
+    Query counts must not depend on the size of the site, so their thresholds
+    are the same at every scale. Durations are multiplied by
+    `BENCHMARK_DURATION_FACTOR` (1 by default) to allow for slower machines.
+
+    Requests must not repeat a query from the same place `QUERY_DETECTOR_
+    THRESHOLD` times or more (see `ukgwa.utils.query_detector`), which
+    would usually make their number of queries grow with the site.
+
+    If `BENCHMARK_REPORT` is set, every measurement is also written to that
+    JSON file.
+    """
+
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.site = build_benchmark_site()
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if report_path := os.environ.get("BENCHMARK_REPORT"):
+            report = {}
+            if os.path.exists(report_path):
+                with open(report_path) as f:
+                    report = json.load(f)
+            report["scale"] = get_benchmark_scale()
+            report.setdefault("results", {}).update(cls.results)
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+
+    def assertWithinThresholds(self, name, measurement, thresholds):
+        self.results[name] = measurement.as_dict()
+
+        duration_factor = float(os.environ.get("BENCHMARK_DURATION_FACTOR", 1))
+        failures = []
+        if measurement.queries > thresholds.queries:
+            failures.append(
+                f"{measurement.queries} queries (maximum {thresholds.queries})"
+            )
+        if measurement.duration > thresholds.duration * duration_factor:
+            failures.append(
+                f"{measurement.duration:.3f}s "
+                f"(maximum {thresholds.duration * duration_factor:.3f}s)"
+            )
+        if measurement.peak_memory > thresholds.peak_memory:
+            failures.append(
+                f"{measurement.peak_memory / MB:.1f}MB allocated "
+                f"(maximum {thresholds.peak_memory / MB:.1f}MB)"
+            )
+
+        if failures:
+            self.fail(f"{name}: {', '.join(failures)}")
+
+    def assertNoRepeatedQueries(self, name, detector):
+        if repeated_queries := detector.get_repeated_queries():
+            report = detector.get_report(repeated_queries, slow_queries=[])
+            self.fail(f"{name}: repeated queries\n{report}")
+
+    def benchmark_request(self, name, path, cold, warm, status_code=200):
+        """
+        Request `path` with empty caches, then with warm caches, checking each
+        against the `cold` and `warm` thresholds, and for repeated queries.
+        """
+
+        def get():
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, status_code)
+            return response
+
+        cache.clear()
+        with QueryDetector() as detector:
+            get()
+        self.assertNoRepeatedQueries(name, detector)
+
+        _, measurement = measure(get, setup=cache.clear)
+        self.assertWithinThresholds(f"{name} (cold)", measurement, cold)
+
+        get()
+        _, measurement = measure(get)
+        self.assertWithinThresholds(f"{name} (warm)", measurement, warm)
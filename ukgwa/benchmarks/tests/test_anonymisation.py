@@ -0,0 +1,72 @@
+import math
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from ukgwa.utils.anonymisation import UserAnonymiser, get_checkpoint, run_in_batches
+from ukgwa.utils.models import AnonymisationCheckpoint
+
+from ..fixtures import get_benchmark_scale
+from ..measure import Measurement, measure
+from ..testcases import MB, BenchmarkTestCase
+
+# 1M with BENCHMARK_SCALE=100
+USERS_PER_SCALE = 10_000
+
+
+class AnonymisationBenchmarks(BenchmarkTestCase):
+    """
+    Anonymise a generated table of users. The number of queries grows with
+    the number of batches, but memory must not grow with the number of rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # No need for the benchmark site
+        TestCase.setUpTestData()
+        cls.user_count = USERS_PER_SCALE * get_benchmark_scale()
+        get_user_model().objects.bulk_create(
+            (
+                get_user_model()(
+                    username=f"editor{i}",
+                    email=f"editor{i}@nationalarchives.gov.uk",
+                    first_name="Ada",
+                    last_name="Lovelace",
+                    password="!",
+                )
+                for i in range(cls.user_count)
+            ),
+            batch_size=5000,
+        )
+
+    def test_users(self):
+        processor = UserAnonymiser()
+
+        def anonymise():
+            return sum(run_in_batches(processor, get_checkpoint(processor)))
+
+        def reset():
+            AnonymisationCheckpoint.objects.all().delete()
+
+        count, measurement = measure(anonymise, setup=reset)
+
+        self.assertEqual(count, self.user_count)
+        batch_count = math.ceil(self.user_count / processor.batch_size)
+        # SQLite is limited in the number of parameters of a query
+        fields = [get_user_model()._meta.pk, *processor.update_fields]
+        rows_per_update = connection.ops.bulk_batch_size(
+            fields, range(processor.batch_size)
+        )
+        updates_per_batch = math.ceil(processor.batch_size / rows_per_update)
+        self.assertWithinThresholds(
+            f"anonymise {self.user_count} users",
+            measurement,
+            Measurement(
+                # Per batch: the updates and checkpoint, within a savepoint.
+                # Then creating and completing the checkpoint, and the cursor.
+                queries=(updates_per_batch + 3) * batch_count + 6,
+                duration=0.4 * batch_count,
+                peak_memory=16 * MB,
+            ),
+        )
@@ -0,0 +1,58 @@
+from ..measure import Measurement
+from ..testcases import MB, BenchmarkTestCase
+
+
+class PageBenchmarks(BenchmarkTestCase):
+    """
+    Request each type of page with empty caches (e.g. just after publishing),
+    then with warm caches. The page cache is disabled, so every request is
+    rendered.
+    """
+
+    def test_home_page(self):
+        self.benchmark_request(
+            "home",
+            self.site.home.url,
+            cold=Measurement(queries=18, duration=1.0, peak_memory=2 * MB),
+            warm=Measurement(queries=7, duration=0.5, peak_memory=2 * MB),
+        )
+
+    def test_index_page(self):
+        self.benchmark_request(
+            "index",
+            self.site.deepest_index_page.url,
+            cold=Measurement(queries=28, duration=1.0, peak_memory=2 * MB),
+            warm=Measurement(queries=16, duration=0.5, peak_memory=2 * MB),
+        )
+
+    def test_information_page(self):
+        self.benchmark_request(
+            "information",
+            self.site.information_page.url,
+            cold=Measurement(queries=35, duration=2.0, peak_memory=4 * MB),
+            warm=Measurement(queries=18, duration=1.0, peak_memory=3 * MB),
+        )
+
+    def test_sitemap(self):
+        self.benchmark_request(
+            "sitemap index",
+            "/sitemap.xml",
+            cold=Measurement(queries=5, duration=0.5, peak_memory=1 * MB),
+            warm=Measurement(queries=1, duration=0.1, peak_memory=1 * MB),
+        )
+        # A cold shard also generates the index, which lists the shards
+        self.benchmark_request(
+            "sitemap shard",
+            f"/sitemap-{self.site.sections[0].pk}-1.xml",
+            cold=Measurement(queries=7, duration=1.0, peak_memory=8 * MB),
+            warm=Measurement(queries=1, duration=0.1, peak_memory=1 * MB),
+        )
+
+    def test_not_found_page(self):
+        self.benchmark_request(
+            "404",
+            "/does-not-exist/",
+            cold=Measurement(queries=18, duration=1.0, peak_memory=2 * MB),
+            warm=Measurement(queries=7, duration=0.5, peak_memory=2 * MB),
+            status_code=404,
+        )
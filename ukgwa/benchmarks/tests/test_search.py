@@ -0,0 +1,52 @@
+from django.test import TestCase, override_settings
+
+from ..fixtures import SEARCH_TERM, build_search_pages, get_benchmark_scale
+from ..measure import Measurement
+from ..testcases import MB, BenchmarkTestCase
+
+# 100k with BENCHMARK_SCALE=100
+PAGES_PER_SCALE = 1000
+
+
+@override_settings(SEARCH_CACHE_MIN_HITS=1)
+class SearchBenchmarks(BenchmarkTestCase):
+    """
+    Search generated pages for a term found in 11% of them, with empty caches,
+    then with its ranked results cached, as for a popular query. The number of
+    queries must not grow with the number of pages or results.
+
+    On PostgreSQL, only the best `SEARCH_MAX_RESULTS` matches are loaded. The
+    SQLite search backend loads the index entries of every match, so with
+    SQLite, memory grows with `BENCHMARK_SCALE`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # No need for the benchmark site
+        TestCase.setUpTestData()
+        build_search_pages(PAGES_PER_SCALE * get_benchmark_scale())
+
+    def test_search(self):
+        self.benchmark_request(
+            "search",
+            f"/search/?q={SEARCH_TERM}",
+            cold=Measurement(queries=13, duration=1.0, peak_memory=8 * MB),
+            warm=Measurement(queries=4, duration=0.5, peak_memory=2 * MB),
+        )
+
+    def test_search_next_page(self):
+        response = self.client.get(f"/search/?q={SEARCH_TERM}")
+        search_results = response.context["search_results"]
+        # Only the best results are ranked
+        self.assertEqual(
+            search_results.paginator.count,
+            min(PAGES_PER_SCALE * get_benchmark_scale() * 11 // 100, 500),
+        )
+        next_cursor = search_results.next_cursor
+
+        self.benchmark_request(
+            "search page 2",
+            f"/search/?q={SEARCH_TERM}&page=2&after={next_cursor}",
+            cold=Measurement(queries=13, duration=1.0, peak_memory=8 * MB),
+            warm=Measurement(queries=4, duration=0.5, peak_memory=2 * MB),
+        )
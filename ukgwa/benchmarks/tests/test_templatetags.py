@@ -0,0 +1,71 @@
+from django.template import Context, Template
+from django.test import RequestFactory
+
+from wagtail.models import Site
+
+from ukgwa.images.models import CustomImage
+
+from ..measure import Measurement, measure
+from ..testcases import MB, BenchmarkTestCase
+
+
+class TemplateTagBenchmarks(BenchmarkTestCase):
+    """
+    Render the template tags used on every page, or many times per page.
+    """
+
+    def get_request(self):
+        request = RequestFactory().get("/")
+        # Like `wagtail.views.serve`
+        request._wagtail_site = Site.objects.get(is_default_site=True)
+        return request
+
+    def render(self, template_string, **context):
+        return Template(template_string).render(
+            Context({"request": self.get_request(), **context})
+        )
+
+    def test_navigation_tags(self):
+        page = self.site.information_page
+
+        def render():
+            return self.render(
+                "{% load navigation_tags %}"
+                "{% primary_nav %}{% secondary_nav %}{% sidebar %}"
+                "{% footer_nav %}{% footer_links %}{% footer_logo_cloud %}",
+                page=page,
+            )
+
+        _, measurement = measure(render)
+        self.assertWithinThresholds(
+            "navigation tags (cold)",
+            measurement,
+            Measurement(queries=23, duration=0.5, peak_memory=1 * MB),
+        )
+
+        _, measurement = measure(render)
+        self.assertWithinThresholds(
+            "navigation tags (warm)",
+            measurement,
+            Measurement(queries=4, duration=0.2, peak_memory=1 * MB),
+        )
+
+    def test_responsive_image_listing(self):
+        images = list(CustomImage.objects.order_by("pk"))
+
+        def render():
+            return self.render(
+                "{% load image_tags %}{% for image in images %}"
+                "{% responsive_image image 'fill-450x300' 'fill-900x600' %}"
+                "{% endfor %}",
+                images=images,
+            )
+
+        # With the renditions in the rendition cache
+        render()
+        _, measurement = measure(render)
+        self.assertWithinThresholds(
+            "responsive_image listing",
+            measurement,
+            Measurement(queries=2, duration=0.5, peak_memory=2 * MB),
+        )
@@ -1,15 +1,18 @@
+from django.template.loader import render_to_string
+
 from wagtail import blocks
 from wagtail.contrib.table_block.blocks import TableBlock as WagtailTableBlock
 from wagtail.contrib.typed_table_block.blocks import (
     TypedTableBlock as WagtailTypedTableBlock,
 )
 from wagtail.embeds.blocks import EmbedBlock as WagtailEmbedBlock
-from wagtail.embeds.embeds import get_embed
-from wagtail.embeds.exceptions import EmbedException
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.snippets.blocks import SnippetChooserBlock
 
 from ..constants import GROUP_CALLOUTS, GROUP_MEDIA, GROUP_TABLES, GROUP_TEXT
+from ..utils.cache import add_cache_tags
+from ..utils.embeds import get_stored_embed
+from ..utils.instrumentation import timed
 
 
 class RichTextBlock(blocks.RichTextBlock):
@@ -73,6 +76,9 @@ class ImageBlock(blocks.StructBlock):
             # The template will not render anything if the image is None
             return ctx
 
+        if parent_context:
+            add_cache_tags(parent_context.get("request"), value["image"])
+
         ctx["caption"] = value["caption"]
         ctx["alt_text"] = value["alt_text"]
         ctx["image_is_decorative"] = value["image_is_decorative"]
@@ -178,21 +184,26 @@ class EmbedBlock(blocks.StructBlock):
         template = "components/streamfield/video_embed_block.html"
 
     def get_embed_instance(self, value):
+        """
+        Return the embed fetched when the page was published, without
+        contacting the provider.
+        """
         embed = value["embed"]
         if embed is None:
             return None
 
-        try:
-            return get_embed(embed.url)
-        except EmbedException:
-            return None
+        return get_stored_embed(embed.url, embed.max_width, embed.max_height)
 
+    @timed("embed")
     def get_context(self, value, parent_context=None):
         context = super().get_context(value, parent_context=parent_context)
 
         if embed := self.get_embed_instance(value):
             context["thumbnail_url"] = embed.thumbnail_url
             context["is_youtube"] = embed.provider_name.lower() == "youtube"
+            context["embed_html"] = render_to_string(
+                "wagtailembeds/embed_frontend.html", {"embed": embed}
+            )
 
         return context
 
@@ -1,13 +1,22 @@
 from django.conf import settings
 
 from ukgwa.core.models import Tracking
+from ukgwa.utils.settings_cache import CachedSettingProxy, get_site_setting
 
 
 def global_vars(request):
-    tracking = Tracking.for_request(request)
+    tracking = get_site_setting(Tracking, request)
     return {
         "GOOGLE_TAG_MANAGER_ID": getattr(tracking, "google_tag_manager_id", None),
         "SEO_NOINDEX": settings.SEO_NOINDEX,
         "LANGUAGE_CODE": settings.LANGUAGE_CODE,
         "BASE_DOMAIN": settings.BASE_DOMAIN,
     }
+
+
+def site_settings(request):
+    """
+    Replaces `wagtail.contrib.settings.context_processors.settings`, loading
+    site settings from the site settings cache.
+    """
+    return {"settings": CachedSettingProxy(request_or_site=request)}
@@ -0,0 +1,16 @@
+import factory
+
+from .models import CallToActionSnippet
+
+
+class CallToActionSnippetFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = CallToActionSnippet
+
+    title = factory.Faker("text", max_nb_chars=25)
+    summary = factory.Faker("sentence")
+    link = factory.LazyFunction(
+        lambda: [
+            ("external_link", {"url": "https://www.example.com", "title": "Example"})
+        ]
+    )
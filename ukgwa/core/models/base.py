@@ -1,11 +1,18 @@
 from django.utils.decorators import method_decorator
 from django.utils.functional import cached_property
 
-from wagtail.models import Page
-from wagtail.query import PageQuerySet
+from wagtail.models import Page, Site
+from wagtail.search import index
 
-from ukgwa.utils.cache import get_default_cache_control_decorator
-from ukgwa.utils.query import order_by_pk_position
+from ukgwa.images.renditions import prefetch_page_renditions
+from ukgwa.utils.cache import (
+    add_cache_tags,
+    get_default_cache_control_decorator,
+    set_cache_tag_header,
+)
+from ukgwa.utils.instrumentation import set_route
+from ukgwa.utils.page_cache import serve_from_page_cache
+from ukgwa.utils.query import fetch_in_pk_order
 
 from .mixins import ListingFieldsMixin, SocialFieldsMixin
 
@@ -22,16 +29,58 @@ class BasePage(ListingFieldsMixin, SocialFieldsMixin, Page):
     class Meta:
         abstract = True
 
+    # On PostgreSQL, boosts are mapped to the four tsvector weights (A to D),
+    # see ukgwa/search/results.py. Matches in the title (boosted by `Page`)
+    # rank highest, then the listing summary and introduction (see
+    # subclasses), then the body (`index.SearchField` without a boost). Other
+    # fields' boosts must stay below the title's.
+    search_fields = Page.search_fields + [
+        index.SearchField("listing_summary", boost=1),
+    ]
+
+    # Pages are indexed from a queue, rather than on every save (see
+    # ukgwa/search/indexing.py)
+    search_auto_update = False
+
     promote_panels = (
         Page.promote_panels
         + ListingFieldsMixin.promote_panels
         + SocialFieldsMixin.promote_panels
     )
 
+    def serve(self, request, *args, **kwargs):
+        # Record timings against the page type, rather than Wagtail's
+        # catch-all URL pattern
+        set_route(self._meta.label_lower)
+        site = Site.find_for_request(request)
+
+        def get_response():
+            # Tag the response with the page and its site, so that the front-end
+            # cache can purge it when either of them (or anything rendered on the
+            # page, see `add_cache_tags`) changes.
+            add_cache_tags(request, self, site)
+            response = super(BasePage, self).serve(request, *args, **kwargs)
+            return set_cache_tag_header(request, response)
+
+        return serve_from_page_cache(
+            request,
+            site,
+            get_response,
+            # Pages with view restrictions must never be shared between users
+            is_cacheable=lambda: not self.get_view_restrictions().exists(),
+        )
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        # Fetch every rendition displayed on the page in bulk, rather than one
+        # at a time while rendering
+        prefetch_page_renditions(request, self)
+        return context
+
     @cached_property
-    def related_pages(self) -> PageQuerySet:
+    def related_pages(self) -> list[Page]:
         """
-        Return a `PageQuerySet` of items related to this page via the
+        Return a list of items related to this page via the
         `PageRelatedPage` through model, and are suitable for display.
         The result is ordered to match that specified by editors using
         the 'page_related_pages' `InlinePanel`.
@@ -40,8 +89,6 @@ class BasePage(ListingFieldsMixin, SocialFieldsMixin, Page):
         # NOTE: avoiding values_list() here for compatibility with preview
         # See: https://github.com/wagtail/django-modelcluster/issues/30
         ordered_page_pks = tuple(item.page_id for item in self.page_related_pages.all())
-        return order_by_pk_position(
-            Page.objects.live().public().specific(),
-            pks=ordered_page_pks,
-            exclude_non_matches=True,
+        return fetch_in_pk_order(
+            Page.objects.live().public().specific(), pks=ordered_page_pks
         )
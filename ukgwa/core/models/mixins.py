@@ -1,12 +1,25 @@
 from django.db import models
 
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
+from wagtail.images import get_image_model
+
+from ukgwa.utils.streamfield import get_word_count, iter_blocks_of_type
+
+from ..blocks import ImageBlock
 
 __all__ = [
     "ListingFieldsMixin",
+    "ReadingTimeMixin",
     "SocialFieldsMixin",
 ]
 
+# Using value of 275 words per minute.
+# https://help.medium.com/hc/en-us/articles/214991667-Read-time
+WORDS_PER_SECOND = 275 / 60
+
+# Every image adds 10 seconds.
+SECONDS_PER_IMAGE = 10
+
 
 class ListingFieldsMixin(models.Model):
     """
@@ -49,6 +62,26 @@ class ListingFieldsMixin(models.Model):
         )
     ]
 
+    @classmethod
+    def prefetch_listing_images(cls, pages):
+        """
+        Load the listing images of `pages` (which may be of different types)
+        with a single query, rather than one per page.
+        """
+        image_ids = {
+            page.listing_image_id
+            for page in pages
+            if getattr(page, "listing_image_id", None)
+        }
+        if not image_ids:
+            return
+
+        images = get_image_model().objects.in_bulk(image_ids)
+        for page in pages:
+            image = images.get(getattr(page, "listing_image_id", None))
+            if image is not None:
+                page.listing_image = image
+
 
 class SocialFieldsMixin(models.Model):
     """
@@ -76,3 +109,55 @@ class SocialFieldsMixin(models.Model):
             ],
         )
     ]
+
+
+class ReadingTimeMixin(models.Model):
+    """
+    Store the word and image count of the StreamFields listed in
+    `reading_time_fields` whenever the page is saved (e.g. published), so the
+    reading time can be displayed without rendering them.
+    """
+
+    reading_time_fields = []
+
+    reading_time = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def calculate_reading_time(self):
+        reading_time = {}
+        for field_name in self.reading_time_fields:
+            stream_value = getattr(self, field_name)
+            images = iter_blocks_of_type(
+                stream_value.stream_block, stream_value.raw_data, ImageBlock
+            )
+            reading_time[field_name] = {
+                "words": get_word_count(stream_value),
+                "images": sum(1 for image in images if image and image.get("image")),
+            }
+        return reading_time
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.reading_time = self.calculate_reading_time()
+        elif set(update_fields) & set(self.reading_time_fields):
+            self.reading_time = self.calculate_reading_time()
+            kwargs["update_fields"] = {*update_fields, "reading_time"}
+        super().save(*args, **kwargs)
+
+    def get_reading_time_minutes(self, field_name, recalculate=False):
+        """
+        Return the reading time of `field_name` in minutes, using the stored
+        word and image counts unless they're missing or `recalculate` is set
+        (e.g. for previews of unsaved changes).
+        """
+        counts = self.reading_time.get(field_name)
+        if counts is None or recalculate:
+            counts = self.calculate_reading_time()[field_name]
+
+        seconds = (
+            counts["words"] / WORDS_PER_SECOND + counts["images"] * SECONDS_PER_IMAGE
+        )
+        return max(1, int(round(seconds / 60)))
@@ -15,6 +15,9 @@ __all__ = [
 
 @register_setting
 class SocialMediaSettings(BaseSiteSetting):
+    # Cached along with the settings
+    select_related = ["default_sharing_image"]
+
     twitter_handle = models.CharField(
         max_length=255,
         blank=True,
@@ -21,7 +21,7 @@ class HomePage(BasePage):
         related_name="+",
     )
 
-    search_fields = BasePage.search_fields + [index.SearchField("strapline")]
+    search_fields = BasePage.search_fields + [index.SearchField("strapline", boost=1)]
 
     content_panels = BasePage.content_panels + [
         FieldPanel("strapline"),
@@ -0,0 +1,8 @@
+import wagtail_factories
+
+from .models import CustomImage
+
+
+class CustomImageFactory(wagtail_factories.ImageFactory):
+    class Meta:
+        model = CustomImage
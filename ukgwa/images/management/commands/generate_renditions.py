@@ -0,0 +1,110 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...renditions import generate_renditions_for_image_id, get_all_renditions
+
+
+def _init_worker():
+    # Needed when the process pool doesn't fork the management command process
+    django.setup()
+
+
+def _generate(image_id, filter_specs):
+    try:
+        return image_id, generate_renditions_for_image_id(image_id, filter_specs), None
+    except Exception as e:
+        return image_id, 0, f"{type(e).__name__}: {e}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the renditions of every image displayed on live pages, so that "
+        "visitors never wait for them to be created. Existing renditions are "
+        "skipped, so the command can be interrupted and run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes generating renditions in parallel.",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0,
+            help="Maximum number of images processed per second (0 for no limit), "
+            "to limit the load on the database and storage.",
+        )
+        parser.add_argument(
+            "--progress-every",
+            type=int,
+            default=100,
+            help="Report progress after this number of images.",
+        )
+
+    def handle(self, *args, workers, rate, progress_every, **options):
+        renditions = get_all_renditions()
+        total = len(renditions)
+        self.stdout.write(
+            f"Found {sum(len(specs) for specs in renditions.values())} renditions "
+            f"of {total} images."
+        )
+
+        # Connections can't be shared with the worker processes
+        connections.close_all()
+
+        self.total = total
+        self.progress_every = progress_every
+        self.done = self.created = self.errors = 0
+        start = time.monotonic()
+        pending = set()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for submitted, (image_id, filter_specs) in enumerate(
+                sorted(renditions.items())
+            ):
+                # Keep a bounded number of images in flight
+                while len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self.report(finished)
+
+                if rate:
+                    delay = start + submitted / rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                pending.add(pool.submit(_generate, image_id, sorted(filter_specs)))
+
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self.report(finished)
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {self.created} renditions for {self.done} images in "
+                f"{elapsed:.1f}s ({self.errors} errors)."
+            )
+        )
+
+    def report(self, finished):
+        for future in finished:
+            image_id, created, error = future.result()
+            self.done += 1
+            self.created += created
+            if error:
+                self.errors += 1
+                self.stderr.write(f"Image {image_id}: {error}")
+
+            if self.done % self.progress_every == 0 or self.done == self.total:
+                self.stdout.write(
+                    f"[{self.done}/{self.total}] {self.created} renditions created, "
+                    f"{self.errors} errors"
+                )
@@ -0,0 +1,351 @@
+"""
+Registry of the renditions displayed on the site, used to generate them ahead
+of time (on publish and with the `generate_renditions` command) rather than
+while serving a visitor's request.
+
+Keep the filter specs below in sync with the templates using them.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.apps import apps
+
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+from wagtail.models import Page
+
+from ukgwa.core.blocks import ImageBlock
+from ukgwa.navigation.models import NavigationSettings
+from ukgwa.utils.instrumentation import timed
+from ukgwa.utils.streamfield import iter_blocks_of_type, iter_chooser_ids
+
+logger = logging.getLogger(__name__)
+
+
+def get_responsive_filter_specs(rendition_1x, rendition_2x):
+    """
+    Return the filter specs used by the `responsive_image` template tag.
+    """
+    return [
+        rendition_1x,
+        rendition_2x,
+        f"{rendition_1x}|format-webp",
+        f"{rendition_2x}|format-webp",
+    ]
+
+
+# components/streamfield/image_block.html
+IMAGE_BLOCK_FILTER_SPECS = get_responsive_filter_specs("width-500", "width-1000")
+
+# components/cta/call_to_action.html
+CALL_TO_ACTION_FILTER_SPECS = ["fill-450x300"]
+
+# base_page.html
+SOCIAL_IMAGE_FILTER_SPECS = ["width-1000", "fill-1200x630-c100"]
+
+# components/navigation/footer_logo_item.html, via `ukgwa.navigation.utils`
+FOOTER_LOGO_FILTER_SPEC = "fill-150x70|format-webp"
+
+
+def _get_stream_fields(model):
+    return [
+        field for field in model._meta.get_fields() if isinstance(field, StreamField)
+    ]
+
+
+def _add_call_to_action_renditions(renditions, call_to_action_ids):
+    call_to_action_model = apps.get_model("core.CallToActionSnippet")
+    image_ids = call_to_action_model.objects.filter(
+        pk__in=call_to_action_ids, image__isnull=False
+    ).values_list("image_id", flat=True)
+    for image_id in image_ids:
+        renditions[image_id].update(CALL_TO_ACTION_FILTER_SPECS)
+
+
+def _add_stream_renditions(renditions, call_to_action_ids, stream_value, indexes):
+    call_to_action_model = apps.get_model("core.CallToActionSnippet")
+    child_blocks = stream_value.stream_block.child_blocks
+    for index in indexes:
+        raw_child = stream_value.raw_data[index]
+        child_block = child_blocks.get(raw_child["type"])
+        if child_block is None:
+            continue
+        raw_value = raw_child.get("value")
+
+        for value in iter_blocks_of_type(child_block, raw_value, ImageBlock):
+            if value and value.get("image"):
+                renditions[value["image"]].update(IMAGE_BLOCK_FILTER_SPECS)
+
+        for model, pk in iter_chooser_ids(child_block, raw_value):
+            if model is call_to_action_model:
+                call_to_action_ids.add(pk)
+
+
+def get_page_renditions(pages, stream_fields=True):
+    """
+    Return a dictionary mapping image IDs to the set of filter specs displayed
+    by `pages` (specific page instances), leaving out those displayed by their
+    StreamFields unless `stream_fields` is true.
+    """
+    renditions = defaultdict(set)
+    call_to_action_ids = set()
+
+    for page in pages:
+        if stream_fields:
+            for field in _get_stream_fields(type(page)):
+                stream_value = getattr(page, field.name)
+                _add_stream_renditions(
+                    renditions,
+                    call_to_action_ids,
+                    stream_value,
+                    range(len(stream_value.raw_data)),
+                )
+
+        if social_image_id := getattr(page, "social_image_id", None):
+            renditions[social_image_id].update(SOCIAL_IMAGE_FILTER_SPECS)
+
+        if call_to_action_id := getattr(page, "call_to_action_id", None):
+            call_to_action_ids.add(call_to_action_id)
+
+    if call_to_action_ids:
+        _add_call_to_action_renditions(renditions, call_to_action_ids)
+    return renditions
+
+
+def get_stream_renditions(stream_value, indexes):
+    """
+    Return a dictionary mapping image IDs to the set of filter specs displayed
+    by the blocks of `stream_value` at `indexes`.
+    """
+    renditions = defaultdict(set)
+    call_to_action_ids = set()
+    _add_stream_renditions(renditions, call_to_action_ids, stream_value, indexes)
+    if call_to_action_ids:
+        _add_call_to_action_renditions(renditions, call_to_action_ids)
+    return renditions
+
+
+def get_site_renditions():
+    """
+    Return a dictionary mapping image IDs to the set of filter specs displayed
+    on every page of a site, e.g. in the footer.
+    """
+    renditions = defaultdict(set)
+
+    social_media_settings_model = apps.get_model("core.SocialMediaSettings")
+    for image_id in social_media_settings_model.objects.filter(
+        default_sharing_image__isnull=False
+    ).values_list("default_sharing_image_id", flat=True):
+        renditions[image_id].update(SOCIAL_IMAGE_FILTER_SPECS)
+
+    image_model = get_image_model()
+    for navigation_settings in NavigationSettings.objects.all():
+        stream_value = navigation_settings.footer_logo_cloud
+        for model, pk in iter_chooser_ids(
+            stream_value.stream_block, stream_value.raw_data
+        ):
+            if model is image_model:
+                renditions[pk].add(FOOTER_LOGO_FILTER_SPEC)
+
+    return renditions
+
+
+def _merge_renditions(renditions, other):
+    for image_id, filter_specs in other.items():
+        renditions[image_id].update(filter_specs)
+
+
+def get_all_renditions(batch_size=500):
+    """
+    Return a dictionary mapping image IDs to the set of filter specs displayed
+    by any live page or site-wide setting.
+    """
+    renditions = get_site_renditions()
+
+    for model in apps.get_models():
+        if not issubclass(model, Page) or model is Page:
+            continue
+
+        pages = []
+        queryset = model.objects.live().exact_type(model)
+        for page in queryset.iterator(chunk_size=batch_size):
+            pages.append(page)
+            if len(pages) >= batch_size:
+                _merge_renditions(renditions, get_page_renditions(pages))
+                pages = []
+        _merge_renditions(renditions, get_page_renditions(pages))
+
+    return renditions
+
+
+def generate_renditions(image, filter_specs):
+    """
+    Generate the renditions of `image` for `filter_specs` that don't exist
+    yet, opening the original image file at most once.
+
+    Return the number of renditions created.
+    """
+    filters = [Filter(spec=filter_spec) for filter_spec in filter_specs]
+    existing = image.find_existing_renditions(*filters)
+    missing = [filter_ for filter_ in filters if filter_ not in existing]
+    if missing:
+        image.create_renditions(*missing)
+    return len(missing)
+
+
+def generate_renditions_for_image_id(image_id, filter_specs):
+    image = get_image_model().objects.filter(pk=image_id).first()
+    if image is None:
+        return 0
+    return generate_renditions(image, filter_specs)
+
+
+@timed("renditions")
+def _fetch_renditions(store, image_specs):
+    """
+    Add the renditions for `image_specs` (a list of `(image, filter_specs)`
+    pairs) which aren't in `store` yet, with one cache lookup, at most one
+    database query and creating any that are missing.
+    """
+    Rendition = get_image_model().get_rendition_model()
+    images = {}
+    wanted = {}
+    for image, filter_specs in image_specs:
+        for spec in filter_specs:
+            if (image.pk, spec) not in store:
+                images[image.pk] = image
+                wanted[image.pk, spec] = Filter(spec=spec).get_cache_key(image)
+
+    if not wanted:
+        return
+
+    # The rendition cache first
+    cache_keys = {
+        Rendition.construct_cache_key(images[image_id], focal_point_key, spec): (
+            image_id,
+            spec,
+        )
+        for (image_id, spec), focal_point_key in wanted.items()
+    }
+    found = {}
+    for cache_key, rendition in Rendition.cache_backend.get_many(cache_keys).items():
+        found[cache_keys[cache_key]] = rendition
+
+    # Then the database, for everything that wasn't cached
+    not_cached = {key: value for key, value in wanted.items() if key not in found}
+    if not_cached:
+        from_database = {}
+        for rendition in Rendition.objects.filter(
+            image_id__in={image_id for image_id, spec in not_cached},
+            filter_spec__in={spec for image_id, spec in not_cached},
+        ):
+            key = (rendition.image_id, rendition.filter_spec)
+            if not_cached.get(key) == rendition.focal_point_key:
+                from_database[key] = rendition
+
+        if from_database:
+            Rendition.cache_backend.set_many(
+                {
+                    Rendition.construct_cache_key(
+                        images[image_id], rendition.focal_point_key, spec
+                    ): rendition
+                    for (image_id, spec), rendition in from_database.items()
+                }
+            )
+        found.update(from_database)
+
+    for (image_id, spec), rendition in found.items():
+        # Avoid a query when accessing e.g. `rendition.alt`
+        rendition.image = images[image_id]
+        store[image_id, spec] = rendition
+
+    # Finally, create whatever is missing. Renditions are generated on publish
+    # and by `generate_renditions`, so this only happens for specs or images
+    # they don't know about. They're still created here rather than in a task:
+    # the HTML is kept in the page cache and the CDN until the page is purged,
+    # so the original image (potentially several megabytes) or a placeholder
+    # would be served long after the rendition exists.
+    missing = defaultdict(list)
+    for image_id, spec in wanted:
+        if (image_id, spec) not in found:
+            missing[image_id].append(spec)
+    for image_id, specs in missing.items():
+        logger.warning(
+            "Creating renditions %s of image %d while rendering. Are they "
+            "listed in ukgwa/images/renditions.py?",
+            ", ".join(specs),
+            image_id,
+        )
+        for spec, rendition in images[image_id].get_renditions(*specs).items():
+            store[image_id, spec] = rendition
+
+
+def _get_rendition_store(request):
+    if request is None:
+        # Nothing to share the renditions with
+        return {}
+
+    if not hasattr(request, "_renditions"):
+        request._renditions = {}
+    return request._renditions
+
+
+def prefetch_renditions(request, images, filter_specs):
+    """
+    Fetch the renditions of `images` for `filter_specs` in bulk and keep them
+    in a store on `request`, where `get_renditions` picks them up.
+
+    Renditions are looked up in the rendition cache first, then the database
+    with a single query. Missing renditions are created.
+    """
+    _fetch_renditions(
+        _get_rendition_store(request),
+        [(image, filter_specs) for image in images if image is not None],
+    )
+
+
+def _prefetch_image_renditions(request, renditions):
+    if not renditions:
+        return
+
+    images = get_image_model().objects.in_bulk(renditions.keys())
+    _fetch_renditions(
+        _get_rendition_store(request),
+        [
+            (images[image_id], sorted(filter_specs))
+            for image_id, filter_specs in renditions.items()
+            if image_id in images
+        ],
+    )
+
+
+def prefetch_page_renditions(request, page):
+    """
+    Prefetch the renditions displayed by `page` outside of its StreamFields,
+    loading its images with a single query.
+
+    The renditions displayed by StreamField blocks are prefetched with
+    `prefetch_stream_renditions`, only for the blocks which aren't rendered
+    from the fragment cache.
+    """
+    _prefetch_image_renditions(request, get_page_renditions([page], False))
+
+
+def prefetch_stream_renditions(request, stream_value, indexes):
+    """
+    Prefetch the renditions displayed by the blocks of `stream_value` at
+    `indexes`, loading their images with a single query.
+    """
+    _prefetch_image_renditions(request, get_stream_renditions(stream_value, indexes))
+
+
+def get_renditions(request, image, filter_specs):
+    """
+    Return a dictionary of the renditions of `image` for `filter_specs`,
+    keyed by filter spec, using those prefetched for `request` if possible.
+    """
+    store = _get_rendition_store(request)
+    _fetch_renditions(store, [(image, filter_specs)])
+    return {spec: store[image.pk, spec] for spec in filter_specs}
@@ -0,0 +1,37 @@
+import logging
+
+from wagtail.images import get_image_model
+from wagtail.models import Page
+
+from django_tasks import task
+
+from .renditions import generate_renditions, get_page_renditions, get_site_renditions
+
+logger = logging.getLogger(__name__)
+
+
+def _generate(renditions):
+    images = get_image_model().objects.in_bulk(renditions.keys())
+    for image_id, filter_specs in renditions.items():
+        if image := images.get(image_id):
+            try:
+                generate_renditions(image, sorted(filter_specs))
+            except Exception:
+                # The renditions will be created when the page is served instead
+                logger.exception("Unable to generate renditions for image %d", image_id)
+
+
+@task()
+def generate_page_renditions_task(page_id):
+    """
+    Generate the renditions displayed by a page, so they are ready before
+    visitors request it.
+    """
+    page = Page.objects.filter(pk=page_id).specific().first()
+    if page is not None:
+        _generate(get_page_renditions([page]))
+
+
+@task()
+def generate_site_renditions_task():
+    _generate(get_site_renditions())
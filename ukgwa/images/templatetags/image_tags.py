@@ -1,10 +1,18 @@
 from django import template
 
+from ukgwa.utils.instrumentation import timed
+
+from ..renditions import get_renditions, get_responsive_filter_specs
+
 register = template.Library()
 
 
-@register.inclusion_tag("components/responsive_image/responsive_image.html")
+@register.inclusion_tag(
+    "components/responsive_image/responsive_image.html", takes_context=True
+)
+@timed("image")
 def responsive_image(
+    context,
     image,
     rendition_1x,
     rendition_2x,
@@ -16,21 +24,19 @@ def responsive_image(
     # If it is not, the object-position inline style is not used.
     object_cover=True,
 ):
-    # Get renditions based on the provided filter specs
-    rendition_1x = image.get_rendition(rendition_1x)
-    rendition_2x = image.get_rendition(rendition_2x)
-
-    # Generate webp versions of the renditions
-    rendition_1x_webp = image.get_rendition(rendition_1x.filter_spec + "|format-webp")
-    rendition_2x_webp = image.get_rendition(rendition_2x.filter_spec + "|format-webp")
+    # Get renditions based on the provided filter specs, along with webp
+    # versions, in bulk or from those prefetched for the request.
+    filter_specs = get_responsive_filter_specs(rendition_1x, rendition_2x)
+    rendition_1x, rendition_2x, rendition_1x_webp, rendition_2x_webp = filter_specs
+    renditions = get_renditions(context.get("request"), image, filter_specs)
 
-    alt_text = rendition_1x.alt if alt_text is None else alt_text
+    alt_text = renditions[rendition_1x].alt if alt_text is None else alt_text
 
     return {
-        "rendition_1x": rendition_1x,
-        "rendition_2x": rendition_2x,
-        "rendition_1x_webp": rendition_1x_webp,
-        "rendition_2x_webp": rendition_2x_webp,
+        "rendition_1x": renditions[rendition_1x],
+        "rendition_2x": renditions[rendition_2x],
+        "rendition_1x_webp": renditions[rendition_1x_webp],
+        "rendition_2x_webp": renditions[rendition_2x_webp],
         "class_name": class_name if class_name else "",
         "img_class": img_class if img_class else "",
         "alt_text": alt_text,
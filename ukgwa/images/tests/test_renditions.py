@@ -0,0 +1,164 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtail.images.tests.utils import get_test_image_file
+
+from ukgwa.core.models import CallToActionSnippet
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import InformationPageFactory
+
+from ..models import CustomImage, Rendition
+from ..renditions import (
+    CALL_TO_ACTION_FILTER_SPECS,
+    IMAGE_BLOCK_FILTER_SPECS,
+    SOCIAL_IMAGE_FILTER_SPECS,
+    generate_renditions,
+    get_all_renditions,
+    get_page_renditions,
+    get_renditions,
+    prefetch_renditions,
+)
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+class RenditionsTestCase(TestCase):
+    def setUp(self):
+        # Renditions are cached by image ID
+        cache.clear()
+        self.image = CustomImage.objects.create(
+            title="Image", file=get_test_image_file()
+        )
+        self.cta_image = CustomImage.objects.create(
+            title="CTA image", file=get_test_image_file()
+        )
+        self.cta = CallToActionSnippet.objects.create(
+            title="CTA", link=[], image=self.cta_image
+        )
+
+    def create_page(self, **kwargs):
+        return HomePage.objects.get().add_child(
+            instance=InformationPageFactory.build(
+                body=[
+                    ("image", {"image": self.image}),
+                    ("call_to_action", self.cta),
+                ],
+                **kwargs,
+            )
+        )
+
+    def test_get_page_renditions(self):
+        page = self.create_page(social_image=self.cta_image)
+
+        self.assertEqual(
+            get_page_renditions([page]),
+            {
+                self.image.pk: set(IMAGE_BLOCK_FILTER_SPECS),
+                self.cta_image.pk: {
+                    *CALL_TO_ACTION_FILTER_SPECS,
+                    *SOCIAL_IMAGE_FILTER_SPECS,
+                },
+            },
+        )
+
+    def test_get_all_renditions_only_includes_live_pages(self):
+        self.create_page(live=False)
+        self.assertEqual(get_all_renditions(), {})
+
+        self.create_page()
+        self.assertEqual(set(get_all_renditions()), {self.image.pk, self.cta_image.pk})
+
+    def test_generate_renditions_skips_existing(self):
+        self.image.get_rendition("width-500")
+
+        created = generate_renditions(self.image, ["width-500", "width-1000"])
+
+        self.assertEqual(created, 1)
+        self.assertEqual(
+            set(self.image.renditions.values_list("filter_spec", flat=True)),
+            {"width-500", "width-1000"},
+        )
+        self.assertEqual(generate_renditions(self.image, ["width-1000"]), 0)
+
+    def test_renditions_generated_on_publish(self):
+        self.create_page().save_revision().publish()
+
+        self.assertEqual(
+            set(
+                Rendition.objects.filter(image=self.image).values_list(
+                    "filter_spec", flat=True
+                )
+            ),
+            set(IMAGE_BLOCK_FILTER_SPECS),
+        )
+
+    def test_command_with_nothing_to_generate(self):
+        stdout = StringIO()
+        call_command("generate_renditions", workers=1, stdout=stdout)
+        self.assertIn("Found 0 renditions of 0 images", stdout.getvalue())
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+class PrefetchRenditionsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.images = [
+            CustomImage.objects.create(title=f"Image {i}", file=get_test_image_file())
+            for i in range(3)
+        ]
+        self.filter_specs = ["width-500", "fill-100x100"]
+        for image in self.images:
+            image.get_renditions(*self.filter_specs)
+        cache.clear()
+
+    def test_prefetch_with_one_query(self):
+        request = RequestFactory().get("/")
+
+        with self.assertNumQueries(1):
+            prefetch_renditions(request, self.images, self.filter_specs)
+
+        with self.assertNumQueries(0):
+            for image in self.images:
+                renditions = get_renditions(request, image, self.filter_specs)
+                self.assertEqual(renditions["width-500"].image, image)
+                self.assertEqual(renditions["fill-100x100"].alt, image.title)
+
+    def test_cached_renditions_skip_database(self):
+        prefetch_renditions(RequestFactory().get("/"), self.images, self.filter_specs)
+
+        with self.assertNumQueries(0):
+            prefetch_renditions(
+                RequestFactory().get("/"), self.images, self.filter_specs
+            )
+
+    def test_missing_renditions_are_created(self):
+        request = RequestFactory().get("/")
+
+        with self.assertLogs("ukgwa.images.renditions", "WARNING") as logs:
+            renditions = get_renditions(request, self.images[0], ["width-200"])
+
+        self.assertEqual(renditions["width-200"].width, 200)
+        self.assertIn("width-200", logs.output[0])
+        self.assertTrue(
+            self.images[0].renditions.filter(filter_spec="width-200").exists()
+        )
+
+    def test_without_request(self):
+        renditions = get_renditions(None, self.images[0], self.filter_specs)
+        self.assertEqual(list(renditions), self.filter_specs)
@@ -20,17 +20,11 @@ class LinkColumnWithHeaderBlock(blocks.StructBlock):
     )
     links = blocks.ListBlock(LinkBlock())
 
-    class Meta:
-        template = ("components/navigation/footer_column.html",)
-
 
 class LogoLinkBlock(blocks.StructBlock):
     logo = ImageBlock()
     url = blocks.URLBlock(required=False)
 
-    class Meta:
-        template = ("components/navigation/footer_logo_item.html",)
-
 
 @register_setting(icon="list-ul")
 class NavigationSettings(BaseSiteSetting, ClusterableModel):
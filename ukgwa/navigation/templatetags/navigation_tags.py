@@ -1,23 +1,33 @@
 from django import template
 
+from wagtail.models import Page
+
+from ukgwa.utils.cache import (
+    add_cache_tags,
+    get_children_cache_tag,
+    get_model_cache_tag,
+)
+from ukgwa.utils.instrumentation import timed
+
+from ..utils import get_menu_children, get_navigation, get_page_lineage
+
 register = template.Library()
 
 
 # Primary nav snippets
 @register.inclusion_tag("components/navigation/primary_nav.html", takes_context=True)
+@timed("navigation")
 def primary_nav(context):
     request = context["request"]
     page = context.get("page")
 
     # Get ancestor IDs to check if current page is within a nav item's subtree
     ancestor_ids = set()
-    if page and hasattr(page, "get_ancestors"):
-        ancestor_ids = set(page.get_ancestors().values_list("pk", flat=True))
+    if page and hasattr(page, "path"):
+        ancestor_ids = get_page_lineage(request, page).ancestor_ids
 
     return {
-        "primary_nav": context["settings"]["navigation"][
-            "NavigationSettings"
-        ].primary_navigation,
+        "primary_nav": get_navigation(request)["primary_navigation"],
         "request": request,
         "current_page": page,
         "ancestor_ids": ancestor_ids,
@@ -26,80 +36,89 @@ def primary_nav(context):
 
 # Secondary nav snippets
 @register.inclusion_tag("components/navigation/secondary_nav.html", takes_context=True)
+@timed("navigation")
 def secondary_nav(context):
     request = context["request"]
     return {
-        "secondary_nav": context["settings"]["navigation"][
-            "NavigationSettings"
-        ].secondary_navigation,
+        "secondary_nav": get_navigation(request)["secondary_navigation"],
         "request": request,
     }
 
 
 # Footer nav snippets
 @register.inclusion_tag("components/navigation/footer_nav.html", takes_context=True)
+@timed("navigation")
 def footer_nav(context):
     request = context["request"]
     return {
-        "footer_nav": context["settings"]["navigation"][
-            "NavigationSettings"
-        ].footer_navigation,
+        "footer_nav": get_navigation(request)["footer_navigation"],
         "request": request,
     }
 
 
 @register.inclusion_tag("components/navigation/sidebar.html", takes_context=True)
+@timed("navigation")
 def sidebar(context):
+    request = context["request"]
     page = context["page"]
+    lineage = get_page_lineage(request, page)
 
-    # Always show "level 2" items - children of the section (depth 3)
-    # Wagtail depth: 1=Root, 2=Home, 3=Section, 4=Pages under section
-    section = None
-
-    if page.depth >= 3:
-        # Find the section ancestor at depth 3
-        for ancestor in page.get_ancestors():
-            if ancestor.depth == 3:
-                section = ancestor
-                break
-
-        # If current page is the section itself (depth 3)
-        if section is None and page.depth == 3:
-            section = page
-
-    if section:
-        # Get children of the section (the "level 2" items)
-        siblings = section.get_children().live().public().in_menu()
-        parent = section
-    else:
-        # Fallback for pages at depth 2 or less
-        siblings = page.get_siblings().live().public().in_menu()
-        parent = page.get_parent()
-
-    # Get ancestor IDs to check if current page is within a sibling's subtree
-    ancestor_ids = set(page.get_ancestors().values_list("pk", flat=True))
+    # Always show "level 2" items - children of the section (depth 3), falling
+    # back to the siblings of pages at depth 2 or less
+    parent = lineage.section or lineage.parent
+    siblings = get_menu_children(request, parent) if parent else []
 
     # Get sidebar_cta from page if available, or from context
     sidebar_cta = getattr(page, "sidebar_cta", None) or context.get("sidebar_cta")
 
+    # Titles of the parent and siblings are displayed, so purge this page from
+    # the front-end cache when any of them changes, or a sibling is added.
+    if parent:
+        add_cache_tags(
+            request,
+            get_children_cache_tag(parent),
+            *(
+                get_model_cache_tag(Page, pk)
+                for pk in [parent.pk, *(sibling["pk"] for sibling in siblings)]
+            ),
+        )
+
     return {
         "siblings": siblings,
         "parent": parent,
         "current_page": page,
-        "ancestor_ids": ancestor_ids,
-        "request": context["request"],
+        "ancestor_ids": lineage.ancestor_ids,
+        "request": request,
         "sidebar_cta": sidebar_cta,
     }
 
 
+@register.inclusion_tag("components/navigation/breadcrumbs.html", takes_context=True)
+@timed("navigation")
+def breadcrumbs(context):
+    request = context["request"]
+    page = context["page"]
+    breadcrumbs = get_page_lineage(request, page).breadcrumbs
+
+    # Purge this page from the front-end cache when an ancestor's title changes
+    add_cache_tags(
+        request, *(get_model_cache_tag(Page, crumb["pk"]) for crumb in breadcrumbs)
+    )
+
+    return {
+        "breadcrumbs": breadcrumbs,
+        "current_page": page,
+        "request": request,
+    }
+
+
 # Footer nav snippets
 @register.inclusion_tag("components/navigation/footer_links.html", takes_context=True)
+@timed("navigation")
 def footer_links(context):
     request = context["request"]
     return {
-        "footer_links": context["settings"]["navigation"][
-            "NavigationSettings"
-        ].footer_links,
+        "footer_links": get_navigation(request)["footer_links"],
         "request": request,
     }
 
@@ -108,11 +127,10 @@ def footer_links(context):
 @register.inclusion_tag(
     "components/navigation/footer_logo_cloud.html", takes_context=True
 )
+@timed("navigation")
 def footer_logo_cloud(context):
     request = context["request"]
     return {
-        "footer_logos": context["settings"]["navigation"][
-            "NavigationSettings"
-        ].footer_logo_cloud,
+        "footer_logos": get_navigation(request)["footer_logo_cloud"],
         "request": request,
     }
@@ -0,0 +1,184 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtail.models import Site
+
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import IndexPageFactory, InformationPageFactory
+
+from ..models import NavigationSettings
+from ..utils import (
+    get_menu_children,
+    get_navigation,
+    get_page_lineage,
+    invalidate_navigation_cache,
+)
+
+
+class NavigationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.site = Site.objects.get()
+        home = HomePage.objects.get()
+        self.index = home.add_child(
+            instance=IndexPageFactory.build(title="Index", slug="index")
+        )
+        self.page = self.index.add_child(
+            instance=InformationPageFactory.build(title="Info", slug="info", body=[])
+        )
+        self.navigation_settings = NavigationSettings.for_site(self.site)
+        self.navigation_settings.primary_navigation = [
+            ("link", {"page": self.page, "title": ""}),
+            ("link", {"page": self.index, "title": "Custom title"}),
+        ]
+        self.navigation_settings.footer_navigation = [
+            (
+                "column",
+                {"heading": "Quick links", "links": [{"page": self.page, "title": ""}]},
+            ),
+        ]
+        self.navigation_settings.save()
+
+    def get_request(self):
+        return RequestFactory().get("/", SERVER_NAME=self.site.hostname)
+
+    def test_compiled_navigation(self):
+        navigation = get_navigation(self.get_request())
+
+        self.assertEqual(
+            navigation["primary_navigation"],
+            [
+                {"page_id": self.page.pk, "title": "Info", "url": "/index/info/"},
+                {"page_id": self.index.pk, "title": "Custom title", "url": "/index/"},
+            ],
+        )
+        self.assertEqual(
+            navigation["footer_navigation"],
+            [
+                {
+                    "heading": "Quick links",
+                    "links": [
+                        {
+                            "page_id": self.page.pk,
+                            "title": "Info",
+                            "url": "/index/info/",
+                        }
+                    ],
+                }
+            ],
+        )
+
+    def test_navigation_is_cached(self):
+        get_navigation(self.get_request())
+
+        # Only the site is looked up, no pages or settings
+        with self.assertNumQueries(1):
+            get_navigation(self.get_request())
+
+    def test_publishing_page_in_navigation_invalidates_cache(self):
+        get_navigation(self.get_request())
+
+        self.page.title = "New title"
+        self.page.save_revision().publish()
+
+        navigation = get_navigation(self.get_request())
+        self.assertEqual(navigation["primary_navigation"][0]["title"], "New title")
+
+    def test_changing_ancestor_slug_invalidates_cache(self):
+        get_navigation(self.get_request())
+
+        self.index.slug = "new-index"
+        self.index.save_revision().publish()
+
+        navigation = get_navigation(self.get_request())
+        self.assertEqual(navigation["primary_navigation"][0]["url"], "/new-index/info/")
+
+    def test_saving_settings_invalidates_cache(self):
+        get_navigation(self.get_request())
+
+        self.navigation_settings.primary_navigation = []
+        self.navigation_settings.save()
+
+        self.assertEqual(get_navigation(self.get_request())["primary_navigation"], [])
+
+    @override_settings(SITE_SETTINGS_LOCAL_CACHE_TIMEOUT=60)
+    def test_navigation_isnt_compiled_from_outdated_settings(self):
+        get_navigation(self.get_request())
+
+        # The settings cache hasn't been invalidated yet
+        NavigationSettings.objects.update(primary_navigation=[])
+        invalidate_navigation_cache()
+
+        self.assertEqual(get_navigation(self.get_request())["primary_navigation"], [])
+
+
+class PageLineageTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.home = HomePage.objects.get()
+        self.section = self.home.add_child(
+            instance=IndexPageFactory.build(title="Section", slug="section")
+        )
+        self.page = self.section.add_child(
+            instance=InformationPageFactory.build(
+                title="Info", slug="info", body=[], show_in_menus=True
+            )
+        )
+        self.child = self.page.add_child(
+            instance=InformationPageFactory.build(title="Child", slug="child", body=[])
+        )
+        self.request = RequestFactory().get("/")
+
+    def test_ancestors_loaded_with_one_query(self):
+        root = self.home.get_parent()
+        lineage = get_page_lineage(self.request, self.child)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                lineage.ancestor_ids,
+                {root.pk, self.home.pk, self.section.pk, self.page.pk},
+            )
+            self.assertEqual(lineage.section.pk, self.section.pk)
+            self.assertEqual(lineage.parent.pk, self.page.pk)
+
+    def test_breadcrumbs_share_the_ancestors_query(self):
+        lineage = get_page_lineage(self.request, self.child)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(lineage.parent.pk, self.page.pk)
+            self.assertEqual(
+                lineage.breadcrumbs,
+                [
+                    {"pk": self.section.pk, "title": "Section", "url": "/section/"},
+                    {"pk": self.page.pk, "title": "Info", "url": "/section/info/"},
+                ],
+            )
+
+        self.assertEqual(get_page_lineage(self.request, self.section).breadcrumbs, [])
+
+    def test_lineage_memoized_on_request(self):
+        self.assertIs(
+            get_page_lineage(self.request, self.child),
+            get_page_lineage(self.request, self.child),
+        )
+
+    def test_section_is_page_itself(self):
+        with self.assertNumQueries(0):
+            lineage = get_page_lineage(self.request, self.section)
+            self.assertEqual(lineage.section, self.section)
+
+    def test_menu_children_cached_until_publish(self):
+        self.assertEqual(
+            get_menu_children(self.request, self.section),
+            [{"pk": self.page.pk, "title": "Info", "url": "/section/info/"}],
+        )
+
+        with self.assertNumQueries(0):
+            get_menu_children(self.request, self.section)
+
+        self.page.title = "New title"
+        self.page.save_revision().publish()
+
+        self.assertEqual(
+            get_menu_children(self.request, self.section)[0]["title"], "New title"
+        )
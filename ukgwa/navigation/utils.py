@@ -0,0 +1,357 @@
+"""
+Precompiled site navigation and page lineage.
+
+The navigation StreamFields are compiled into plain lists and dictionaries,
+with page titles, page URLs and logo renditions resolved up front, and stored
+in the shared cache per site. Rendering the navigation then doesn't need any
+queries or URL routing, whichever template tag displays it.
+
+The cache is invalidated by bumping a version number whenever the navigation
+settings change, or a page displayed in (or above a page displayed in) the
+navigation is published, unpublished or moved.
+
+Similarly, the lineage of a page (its ancestors, section and breadcrumbs) is
+worked out from its treebeard path with a single query, and the in-menu children listed in the
+sidebar are cached per parent page.
+"""
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+
+from ukgwa.images.renditions import FOOTER_LOGO_FILTER_SPEC
+from ukgwa.utils.cache import add_cache_tags, get_model_cache_tag
+
+from .models import NavigationSettings
+
+NAVIGATION_CACHE_VERSION_KEY = "navigation:version"
+NAVIGATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+MENU_CHILDREN_CACHE_VERSION_KEY = "menu-children:version"
+
+# Depth of the section pages whose children are listed in the sidebar.
+# 1 = Root, 2 = Home, 3 = Section, 4 = Pages under section
+SECTION_DEPTH = 3
+
+# StreamFields containing lists of `LinkBlock`s.
+LINK_FIELDS = ["primary_navigation", "secondary_navigation", "footer_links"]
+
+
+def _get_links_raw_data(navigation_settings):
+    """
+    Yield the raw value of every `LinkBlock` in `navigation_settings`.
+    """
+    for field_name in LINK_FIELDS:
+        for block in getattr(navigation_settings, field_name).raw_data:
+            yield block["value"]
+
+    for block in navigation_settings.footer_navigation.raw_data:
+        for item in block["value"]["links"]:
+            # ListBlock items are stored as {"type": "item", "value": ...}
+            yield item.get("value", item)
+
+
+def get_navigation_page_ids(navigation_settings):
+    return {
+        link["page"]
+        for link in _get_links_raw_data(navigation_settings)
+        if link["page"]
+    }
+
+
+def get_navigation_image_ids(navigation_settings):
+    return {
+        block["value"]["logo"]["image"]
+        for block in navigation_settings.footer_logo_cloud.raw_data
+        if block["value"]["logo"]["image"]
+    }
+
+
+def _compile_links(raw_links, pages, request):
+    links = []
+    for raw_link in raw_links:
+        raw_link = raw_link.get("value", raw_link)
+        page = pages.get(raw_link["page"])
+        if page is None:
+            # The page has been deleted
+            continue
+
+        links.append(
+            {
+                "page_id": page.pk,
+                "title": raw_link.get("title") or page.title,
+                "url": page.get_url(request=request),
+            }
+        )
+    return links
+
+
+def _compile_logo(raw_logo, images):
+    image = images.get(raw_logo["logo"]["image"])
+    if image is None:
+        return None
+
+    if raw_logo["logo"].get("image_is_decorative"):
+        alt_text = ""
+    else:
+        alt_text = raw_logo["logo"].get("alt_text") or image.title
+
+    rendition = image.get_rendition(FOOTER_LOGO_FILTER_SPEC)
+    return {
+        "url": raw_logo.get("url") or "",
+        "image": {
+            "url": rendition.url,
+            "width": rendition.width,
+            "height": rendition.height,
+            "alt": alt_text,
+        },
+    }
+
+
+def compile_navigation(navigation_settings, request=None):
+    """
+    Return the navigation for `navigation_settings` as plain data, loading
+    every page and image it displays with one query each.
+    """
+    page_ids = get_navigation_page_ids(navigation_settings)
+    pages = Page.objects.filter(pk__in=page_ids).in_bulk()
+
+    images = get_image_model().objects.in_bulk(
+        get_navigation_image_ids(navigation_settings)
+    )
+
+    navigation = {
+        field_name: _compile_links(
+            [
+                block["value"]
+                for block in getattr(navigation_settings, field_name).raw_data
+            ],
+            pages,
+            request,
+        )
+        for field_name in LINK_FIELDS
+    }
+    navigation["footer_navigation"] = [
+        {
+            "heading": block["value"].get("heading") or "",
+            "links": _compile_links(block["value"]["links"], pages, request),
+        }
+        for block in navigation_settings.footer_navigation.raw_data
+    ]
+    logos = (
+        _compile_logo(block["value"], images)
+        for block in navigation_settings.footer_logo_cloud.raw_data
+    )
+    navigation["footer_logo_cloud"] = [logo for logo in logos if logo]
+    navigation["page_ids"] = sorted(pages)
+    navigation["image_ids"] = sorted(images)
+    return navigation
+
+
+def _get_cache_version(key):
+    return cache.get_or_set(key, 1, timeout=None)
+
+
+def _bump_cache_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The version key doesn't exist (yet)
+        cache.set(key, 2, timeout=None)
+
+
+def get_navigation_cache_version():
+    return _get_cache_version(NAVIGATION_CACHE_VERSION_KEY)
+
+
+def invalidate_navigation_cache():
+    _bump_cache_version(NAVIGATION_CACHE_VERSION_KEY)
+
+
+def is_page_in_navigation(page):
+    """
+    Return whether changing `page` may change the navigation of any site,
+    i.e. the page or one of its descendants (whose URLs depend on its slug) is
+    displayed in the navigation.
+    """
+    page_ids = set()
+    for navigation_settings in NavigationSettings.objects.all():
+        page_ids |= get_navigation_page_ids(navigation_settings)
+
+    if not page_ids:
+        return False
+
+    return Page.objects.filter(pk__in=page_ids, path__startswith=page.path).exists()
+
+
+def is_image_in_navigation(image):
+    return any(
+        image.pk in get_navigation_image_ids(navigation_settings)
+        for navigation_settings in NavigationSettings.objects.all()
+    )
+
+
+def get_navigation(request):
+    """
+    Return the compiled navigation for the site serving `request`, memoized on
+    the request and cached across requests.
+    """
+    if hasattr(request, "_navigation"):
+        return request._navigation
+
+    site = Site.find_for_request(request)
+    if site is None:
+        request._navigation = compile_navigation(NavigationSettings(), request)
+        return request._navigation
+
+    key = f"navigation:{site.pk}:{get_navigation_cache_version()}"
+    navigation = cache.get(key)
+    if navigation is None:
+        # Load the settings from the database rather than the settings cache,
+        # which may not have been invalidated yet, so that an outdated
+        # navigation isn't cached under the new version.
+        navigation_settings = NavigationSettings.base_queryset().filter(
+            site=site
+        ).first() or NavigationSettings(site=site)
+        navigation = compile_navigation(navigation_settings, request)
+        cache.set(key, navigation, timeout=NAVIGATION_CACHE_TIMEOUT)
+
+    # The navigation is displayed on every page, so purge them all from the
+    # front-end cache when any page or image it displays changes.
+    image_model = get_image_model()
+    add_cache_tags(
+        request,
+        *(get_model_cache_tag(Page, pk) for pk in navigation["page_ids"]),
+        *(get_model_cache_tag(image_model, pk) for pk in navigation["image_ids"]),
+    )
+
+    request._navigation = navigation
+    return navigation
+
+
+def invalidate_menu_children_cache():
+    _bump_cache_version(MENU_CHILDREN_CACHE_VERSION_KEY)
+
+
+class PageLineage:
+    """
+    The ancestors of a page, worked out from its treebeard path.
+
+    Ancestor paths are prefixes of the page's own path, so every ancestor is
+    loaded with a single query, and only when first needed.
+    """
+
+    def __init__(self, page):
+        self.page = page
+
+    @cached_property
+    def ancestors(self):
+        """
+        Return `(pk, path, depth, title, url_path)` tuples for the ancestors
+        of the page, from the root down.
+        """
+        page = self.page
+        paths = [page.path[: page.steplen * depth] for depth in range(1, page.depth)]
+        return list(
+            Page.objects.filter(path__in=paths)
+            .order_by("path")
+            .values_list("pk", "path", "depth", "title", "url_path", named=True)
+        )
+
+    @cached_property
+    def ancestor_ids(self):
+        return {ancestor.pk for ancestor in self.ancestors}
+
+    @cached_property
+    def section(self):
+        """
+        Return the section (depth 3 page) the page is in, or `None` for pages
+        above the sections.
+        """
+        if self.page.depth == SECTION_DEPTH:
+            return self.page
+
+        for ancestor in self.ancestors:
+            if ancestor.depth == SECTION_DEPTH:
+                return ancestor
+        return None
+
+    @cached_property
+    def parent(self):
+        return self.ancestors[-1] if self.ancestors else None
+
+    @cached_property
+    def breadcrumbs(self):
+        """
+        Return the `title` and `url` of the ancestors below the home page,
+        from the top down.
+
+        URLs are relative to the home page (depth 2) the page is under, as
+        `{% pageurl %}` would render them, without routing each ancestor.
+        """
+        if self.page.depth <= SECTION_DEPTH:
+            # Sections and above are only under the home page
+            return []
+
+        home_url_path = next(
+            ancestor.url_path for ancestor in self.ancestors if ancestor.depth == 2
+        )
+        return [
+            {
+                "pk": ancestor.pk,
+                "title": ancestor.title,
+                "url": reverse(
+                    "wagtail_serve",
+                    args=(ancestor.url_path.removeprefix(home_url_path),),
+                ),
+            }
+            for ancestor in self.ancestors
+            if ancestor.depth > 2
+        ]
+
+
+def get_page_lineage(request, page):
+    """
+    Return the `PageLineage` of `page`, memoized on the request so that every
+    template tag displaying the page's ancestors shares the same query.
+    """
+    if request is None:
+        return PageLineage(page)
+
+    if not hasattr(request, "_page_lineages"):
+        request._page_lineages = {}
+
+    if page.pk not in request._page_lineages:
+        request._page_lineages[page.pk] = PageLineage(page)
+    return request._page_lineages[page.pk]
+
+
+def get_menu_children(request, parent):
+    """
+    Return the live, public, in-menu children of `parent` (a page or a
+    `PageLineage` ancestor) as dictionaries of their `pk`, `title` and `url`.
+
+    The result is cached until a page is published, unpublished or moved, or
+    a view restriction changes.
+    """
+    key = f"menu-children:{parent.pk}:{_get_cache_version(MENU_CHILDREN_CACHE_VERSION_KEY)}"
+    children = cache.get(key)
+    if children is None:
+        children = [
+            {
+                "pk": child.pk,
+                "title": child.title,
+                "url": child.get_url(request=request),
+            }
+            for child in Page.objects.filter(
+                path__startswith=parent.path, depth=parent.depth + 1
+            )
+            .live()
+            .public()
+            .in_menu()
+        ]
+        cache.set(key, children, timeout=NAVIGATION_CACHE_TIMEOUT)
+    return children
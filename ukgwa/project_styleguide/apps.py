@@ -1,6 +1,4 @@
-from django.apps import AppConfig
-
-import yaml
+from django.apps import AppConfig, apps
 
 
 class ProjectStyleguideConfig(AppConfig):
@@ -8,6 +6,12 @@ class ProjectStyleguideConfig(AppConfig):
     name = "ukgwa.project_styleguide"
 
     def ready(self):
+        # The pattern library is only installed when PATTERN_LIBRARY_ENABLED is set
+        if not apps.is_installed("pattern_library"):
+            return
+
+        import yaml
+
         # Register a custom !testimage and !testrendition yaml tags for use in the pattern library
         from .yaml_extensions import get_random_image, get_test_rendition
 
@@ -1,10 +1,14 @@
-from pattern_library.monkey_utils import override_tag
+from django.apps import apps
 
 from ukgwa.navigation.templatetags.navigation_tags import register
 
-override_tag(register, name="primary_nav", default_html="")
-override_tag(register, name="secondary_nav", default_html="")
-override_tag(register, name="footer_nav", default_html="")
-override_tag(register, name="sidebar", default_html="")
-override_tag(register, name="footer_links", default_html="")
-override_tag(register, name="footer_logo_cloud", default_html="")
+if apps.is_installed("pattern_library"):
+    from pattern_library.monkey_utils import override_tag
+
+    override_tag(register, name="primary_nav", default_html="")
+    override_tag(register, name="secondary_nav", default_html="")
+    override_tag(register, name="footer_nav", default_html="")
+    override_tag(register, name="sidebar", default_html="")
+    override_tag(register, name="breadcrumbs", default_html="")
+    override_tag(register, name="footer_links", default_html="")
+    override_tag(register, name="footer_logo_cloud", default_html="")
@@ -1,5 +1,8 @@
-from pattern_library.monkey_utils import override_tag
+from django.apps import apps
 
 from ukgwa.utils.templatetags.reading_time_tags import register
 
-override_tag(register, name="get_reading_time_minutes", default_html="")
+if apps.is_installed("pattern_library"):
+    from pattern_library.monkey_utils import override_tag
+
+    override_tag(register, name="get_reading_time_minutes", default_html="")
@@ -0,0 +1,8 @@
+from django.apps import apps
+
+from ukgwa.utils.templatetags.streamfield_tags import register
+
+if apps.is_installed("pattern_library"):
+    from pattern_library.monkey_utils import override_tag
+
+    override_tag(register, name="include_block_cached", default_html="")
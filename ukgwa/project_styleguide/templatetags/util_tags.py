@@ -0,0 +1,8 @@
+from django.apps import apps
+
+from ukgwa.utils.templatetags.util_tags import register
+
+if apps.is_installed("pattern_library"):
+    from pattern_library.monkey_utils import override_tag
+
+    override_tag(register, name="cache_tags", default_html="")
@@ -0,0 +1,161 @@
+"""
+Incremental updates of the search index.
+
+Wagtail updates the search index of a page every time it's saved, in the
+editor's request. Pages opt out of this (`BasePage.search_auto_update`), and
+the pages published, unpublished, created or deleted are recorded in a queue
+instead (`SearchIndexQueueEntry`), with at most one entry per page. The queue
+is processed in batches by `update_search_index_task`, deferred by
+`SEARCH_INDEX_DEBOUNCE` seconds so that pages saved repeatedly are indexed
+once, or by the `process_search_index_queue` management command.
+
+Task backends which can't defer tasks (e.g. the immediate backend) would run
+the task in the editor's request, processing whatever else is queued. The
+pages are then indexed straight away instead, without queueing them.
+
+Full reindexes (`rebuild_search_index`) split every indexed model into chunks
+of primary keys, indexed in parallel by `index_chunk`.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend, get_search_backends
+from wagtail.search.index import get_indexed_models
+
+from .models import SearchIndexQueueEntry
+
+
+def queue_search_index_updates(pages):
+    """
+    Queue the search index entries of `pages` for an update, and schedule
+    the processing of the queue. If the task backend can't defer the
+    processing, only `pages` are indexed, straight away.
+    """
+    # Imported here, as `.tasks` imports this module
+    from .tasks import update_search_index_task
+
+    now = timezone.now()
+    entries = [
+        SearchIndexQueueEntry(
+            page_id=page.pk, content_type_id=page.content_type_id, queued_at=now
+        )
+        for page in pages
+    ]
+
+    task = update_search_index_task
+    if not task.get_backend().supports_defer:
+        # Without a worker (e.g. the immediate backend), the task would run in
+        # this request
+        update_search_index(entries)
+        return
+
+    SearchIndexQueueEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["page_id"],
+        update_fields=["queued_at"],
+    )
+    delay = settings.SEARCH_INDEX_DEBOUNCE
+    task.using(run_after=now + timedelta(seconds=delay)).enqueue(delay=delay)
+
+
+def update_search_index(entries):
+    """
+    Index the pages of the queue `entries`, and remove the pages which no
+    longer exist from the index.
+    """
+    pages = Page.objects.filter(pk__in=[entry.page_id for entry in entries])
+    pages_by_model = defaultdict(list)
+    for page in pages.specific():
+        pages_by_model[type(page)].append(page)
+
+    existing_ids = {page.pk for pages in pages_by_model.values() for page in pages}
+    deleted = [entry for entry in entries if entry.page_id not in existing_ids]
+
+    for backend in get_search_backends(with_auto_update=True):
+        for model, model_pages in pages_by_model.items():
+            backend.add_bulk(model, model_pages)
+        for entry in deleted:
+            model = ContentType.objects.get_for_id(entry.content_type_id).model_class()
+            backend.delete((model or Page)(pk=entry.page_id))
+
+
+def process_search_index_queue(delay=0, batch_size=None):
+    """
+    Update the search index of the pages queued at least `delay` seconds ago,
+    `batch_size` pages at a time, and return the number of pages processed.
+    """
+    batch_size = batch_size or settings.SEARCH_INDEX_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(seconds=delay)
+    count = 0
+    while True:
+        entries = list(
+            SearchIndexQueueEntry.objects.filter(queued_at__lte=cutoff).order_by(
+                "queued_at", "pk"
+            )[:batch_size]
+        )
+        if not entries:
+            return count
+
+        update_search_index(entries)
+        # Pages queued again since the cutoff stay in the queue, to be indexed
+        # with their latest changes
+        SearchIndexQueueEntry.objects.filter(
+            pk__in=[entry.pk for entry in entries], queued_at__lte=cutoff
+        ).delete()
+        count += len(entries)
+
+
+def get_indexed_model_chunks(model, chunk_size):
+    """
+    Yield the first and last primary keys of consecutive chunks of
+    `chunk_size` objects of the indexed `model`.
+    """
+    pks = model.get_indexed_objects().order_by("pk").values_list("pk", flat=True)
+    first = last = None
+    count = 0
+    for pk in pks.iterator(chunk_size=chunk_size):
+        if first is None:
+            first = pk
+        last = pk
+        count += 1
+        if count == chunk_size:
+            yield first, last
+            first = None
+            count = 0
+    if first is not None:
+        yield first, last
+
+
+def get_search_index_chunks(chunk_size):
+    """
+    Return the chunks of every indexed model, as tuples of the model's label
+    and the first and last primary keys of the chunk.
+    """
+    return [
+        (model._meta.label, first, last)
+        for model in get_indexed_models()
+        for first, last in get_indexed_model_chunks(model, chunk_size)
+    ]
+
+
+def index_chunk(backend_name, model_label, first_pk, last_pk):
+    """
+    Index the objects of a chunk (see `get_search_index_chunks`) in a search
+    backend, and return their number.
+    """
+    model = next(
+        model for model in get_indexed_models() if model._meta.label == model_label
+    )
+    objects = list(
+        model.get_indexed_objects().filter(pk__gte=first_pk, pk__lte=last_pk)
+    )
+    backend = get_search_backend(backend_name)
+    backend.get_index_for_model(model).add_items(model, objects)
+    return len(objects)
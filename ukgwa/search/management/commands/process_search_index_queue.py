@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...indexing import process_search_index_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the search index of the pages queued since they were published, "
+        "unpublished, created or deleted. Run it from a scheduler when there's "
+        "no task worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delay",
+            type=int,
+            default=settings.SEARCH_INDEX_DEBOUNCE,
+            help="Only index the pages queued at least this number of seconds "
+            "ago, so that pages still being edited are indexed once.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.SEARCH_INDEX_BATCH_SIZE,
+            help="Number of pages indexed at a time.",
+        )
+
+    def handle(self, *args, delay, batch_size, **options):
+        start = time.monotonic()
+        count = process_search_index_queue(delay=delay, batch_size=batch_size)
+        self.stdout.write(
+            f"Updated the search index of {count} pages in "
+            f"{time.monotonic() - start:.1f}s."
+        )
@@ -0,0 +1,147 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import get_indexed_models
+
+from ...indexing import get_search_index_chunks, index_chunk
+from ...models import SearchIndexQueueEntry
+
+
+def _init_worker():
+    # Needed when the process pool doesn't fork the management command process
+    django.setup()
+
+
+def _index(backend_name, chunk):
+    try:
+        return chunk, index_chunk(backend_name, *chunk), None
+    except Exception as e:
+        return chunk, 0, f"{type(e).__name__}: {e}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index of every indexed model, in chunks of objects "
+        "indexed in parallel. Like Wagtail's `update_index`, for the database "
+        "search backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            help="Name of the search backend to rebuild, rather than all of them.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes indexing chunks in parallel.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of objects indexed at a time by a worker.",
+        )
+        parser.add_argument(
+            "--progress-every",
+            type=int,
+            default=10,
+            help="Report progress after this number of chunks.",
+        )
+
+    def handle(self, *args, backend, workers, chunk_size, progress_every, **options):
+        backend_names = [backend] if backend else list(settings.WAGTAILSEARCH_BACKENDS)
+        if connection.vendor == "sqlite":
+            # SQLite only allows one writer at a time
+            workers = 1
+        started_at = timezone.now()
+        chunks = get_search_index_chunks(chunk_size)
+        self.stdout.write(
+            f"Found {len(chunks)} chunks of up to {chunk_size} objects "
+            f"of {len(get_indexed_models())} models."
+        )
+
+        for backend_name in backend_names:
+            self.rebuild(backend_name, chunks, workers, progress_every)
+
+        if not backend:
+            # Pages queued before the rebuild started have been indexed
+            SearchIndexQueueEntry.objects.filter(queued_at__lte=started_at).delete()
+
+    def rebuild(self, backend_name, chunks, workers, progress_every):
+        backend = get_search_backend(backend_name)
+        if not backend.rebuilder_class:
+            self.stdout.write(f"{backend_name}: doesn't require rebuilding")
+            return
+
+        # The database backends have a single index, shared by every model
+        rebuilder = backend.rebuilder_class(backend.get_index_for_model(Page))
+        index = rebuilder.start()
+        for model in get_indexed_models():
+            index.add_model(model)
+
+        self.backend_name = backend_name
+        self.total = len(chunks)
+        self.progress_every = progress_every
+        self.done = self.indexed = self.errors = 0
+        start = time.monotonic()
+
+        if workers > 1:
+            self.index_in_parallel(backend_name, chunks, workers)
+        else:
+            self.report(_index(backend_name, chunk) for chunk in chunks)
+
+        rebuilder.finish()
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{backend_name}: indexed {self.indexed} objects in {elapsed:.1f}s "
+                f"({self.errors} errors)."
+            )
+        )
+        if self.errors:
+            raise CommandError(
+                f"{self.errors} chunks couldn't be indexed. Run the command again."
+            )
+
+    def index_in_parallel(self, backend_name, chunks, workers):
+        # Connections can't be shared with the worker processes
+        connections.close_all()
+        pending = set()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for chunk in chunks:
+                # Keep a bounded number of chunks in flight
+                while len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self.report(future.result() for future in finished)
+
+                pending.add(pool.submit(_index, backend_name, chunk))
+
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self.report(future.result() for future in finished)
+
+    def report(self, results):
+        for (model_label, first_pk, last_pk), indexed, error in results:
+            self.done += 1
+            self.indexed += indexed
+            if error:
+                self.errors += 1
+                self.stderr.write(f"{model_label} {first_pk} to {last_pk}: {error}")
+
+            if self.done % self.progress_every == 0 or self.done == self.total:
+                self.stdout.write(
+                    f"{self.backend_name}: [{self.done}/{self.total}] "
+                    f"{self.indexed} objects indexed, {self.errors} errors"
+                )
@@ -0,0 +1,24 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class SearchIndexQueueEntry(models.Model):
+    """
+    A page whose search index entry must be updated, or removed if the page
+    no longer exists (see `ukgwa.search.indexing`).
+
+    There's at most one entry per page: queueing a page again moves its entry
+    to the back of the queue.
+    """
+
+    # Not a foreign key, so that entries outlive the pages deleted
+    page_id = models.IntegerField(unique=True)
+    # The specific type of the page, to remove it from the index once deleted
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    queued_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name_plural = "search index queue entries"
+
+    def __str__(self):
+        return f"Page {self.page_id}"
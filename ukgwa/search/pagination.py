@@ -0,0 +1,52 @@
+import math
+
+from ukgwa.utils.pagination import KeysetPage, KeysetPaginator, decode_cursor
+from ukgwa.utils.query import fetch_in_pk_order
+
+
+class RankedResultsPaginator(KeysetPaginator):
+    """
+    Paginate ranked search results, a list of primary keys from the best match
+    (see `get_ranked_results`), fetching the items of `queryset` for the page
+    displayed only.
+
+    Cursors are the primary key of the first or last result displayed, looked
+    up in the ranked results. If it's no longer there (e.g. the results have
+    changed since), the page `number` is used instead.
+    """
+
+    def __init__(self, result_ids, queryset, per_page):
+        super().__init__(queryset, per_page, ordering=("pk",))
+        self.result_ids = result_ids
+        self.positions = {pk: position for position, pk in enumerate(result_ids)}
+
+    @property
+    def count(self):
+        return len(self.result_ids)
+
+    def _get_position(self, cursor):
+        values = decode_cursor(cursor, 1)
+        if values is None:
+            return None
+        try:
+            return self.positions.get(values[0])
+        except TypeError:
+            # Not hashable
+            return None
+
+    def get_page(self, number=None, after=None, before=None):
+        """
+        Return the page following the `after` cursor or preceding the `before`
+        cursor, or the page `number` without a valid cursor.
+        """
+        if (position := self._get_position(after)) is not None:
+            start = position + 1
+        elif (position := self._get_position(before)) is not None:
+            start = max(0, position - self.per_page)
+        else:
+            start = (self._validate_number(number) - 1) * self.per_page
+
+        end = start + self.per_page
+        items = fetch_in_pk_order(self.queryset, self.result_ids[start:end])
+        number = max(1, math.ceil(min(end, self.count) / self.per_page))
+        return KeysetPage(self, items, number, start > 0, end < self.count)
@@ -0,0 +1,244 @@
+"""
+Ranked site search.
+
+Pages are searched with the "default" Wagtail search backend. In production,
+this is PostgreSQL full-text search: each page is indexed as a `tsvector`
+(with a GIN index) whose lexemes are weighted by the boost of the field they
+come from, so that matches in the title rank above matches in the listing
+summary and introduction, then the body (see `BasePage.search_fields`).
+
+Only the primary keys of the best `SEARCH_MAX_RESULTS` matches are kept, in
+order (see `get_ranked_results`), and the pages displayed are then fetched one
+page of results at a time (see `RankedResultsPaginator`). The ranked results
+of popular queries, those searched for at least `SEARCH_CACHE_MIN_HITS` times
+within `SEARCH_CACHE_TIMEOUT` seconds, are stored in the "default" cache.
+Like the page cache, they're all invalidated at once by bumping a version
+number when pages are published, unpublished, moved or deleted.
+"""
+
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from wagtail.models import Page
+from wagtail.search import index
+from wagtail.search.backends import get_search_backend
+
+from ukgwa.utils.instrumentation import timed
+
+SEARCH_CACHE_VERSION_KEY = "search:version"
+
+# Longer queries are truncated
+MAX_QUERY_LENGTH = 200
+
+# Only the start of long pages is searched for a snippet to display
+HEADLINE_MAX_LENGTH = 10_000
+# Matches are delimited with these characters, which don't appear in text, so
+# that the rest of the snippet can be escaped
+HEADLINE_START = "\x02"
+HEADLINE_STOP = "\x03"
+HEADLINE_OPTIONS = (
+    f"StartSel={HEADLINE_START}, StopSel={HEADLINE_STOP}, "
+    'MinWords=15, MaxWords=35, MaxFragments=2, FragmentDelimiter=" … "'
+)
+
+
+# Control characters, including NUL (which databases reject in parameters) and
+# the headline delimiters
+CONTROL_CHARACTERS_RE = re.compile(r"[\x00-\x1f\x7f-\x9f]")
+
+
+def remove_control_characters(text):
+    return CONTROL_CHARACTERS_RE.sub(" ", text)
+
+
+def normalise_query(query):
+    """
+    Remove control characters, collapse whitespace and case, so that
+    equivalent queries share their cache entries.
+    """
+    query = remove_control_characters(query)
+    return " ".join(query.split()).lower()[:MAX_QUERY_LENGTH].strip()
+
+
+def get_search_queryset(site):
+    return Page.objects.live().public().descendant_of(site.root_page, inclusive=True)
+
+
+def get_search_cache_version():
+    return cache.get_or_set(SEARCH_CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_search_cache():
+    """
+    Invalidate the cached results of every query. Existing entries are left
+    to expire.
+    """
+    try:
+        cache.incr(SEARCH_CACHE_VERSION_KEY)
+    except ValueError:
+        # The version key doesn't exist (yet)
+        cache.set(SEARCH_CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def get_search_cache_key(site, query):
+    query_hash = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    return f"search:{site.pk}:{query_hash}"
+
+
+def rank_results(site, query):
+    """
+    Return a list of the primary keys of the best `SEARCH_MAX_RESULTS` pages
+    of `site` matching every word of `query`, from the best match.
+    """
+    # Only the primary keys are needed
+    results = (
+        get_search_queryset(site)
+        .only("pk")
+        .search(query, operator="and", order_by_relevance=True)
+    )
+    limit = settings.SEARCH_MAX_RESULTS
+    return [page.pk for page in results[:limit]]
+
+
+@timed("search")
+def get_ranked_results(site, query):
+    """
+    Return the ranked results of the normalised `query` (see `rank_results`),
+    from the cache for popular queries.
+    """
+    if not query:
+        return []
+
+    key = get_search_cache_key(site, query)
+    hits_key = f"{key}:hits"
+    cached = cache.get_many([key, hits_key, SEARCH_CACHE_VERSION_KEY])
+    entry = cached.get(key)
+    version = cached.get(SEARCH_CACHE_VERSION_KEY)
+    if version is None:
+        version = get_search_cache_version()
+
+    if entry is not None and entry["version"] == version:
+        return entry["results"]
+
+    results = rank_results(site, query)
+
+    # Count the searches made for the query since it was first searched for,
+    # so that only popular queries take up space in the cache
+    if hits_key not in cached:
+        cache.add(hits_key, 0, timeout=settings.SEARCH_CACHE_TIMEOUT)
+    try:
+        hits = cache.incr(hits_key)
+    except ValueError:
+        # Expired in the meantime
+        hits = 1
+
+    if hits >= settings.SEARCH_CACHE_MIN_HITS:
+        cache.set(
+            key,
+            {"version": version, "results": results},
+            timeout=settings.SEARCH_CACHE_TIMEOUT,
+        )
+    return results
+
+
+def get_searchable_text(page):
+    """
+    Return the text indexed for `page`, other than its title, in the order of
+    its search fields.
+    """
+    texts = []
+    for search_field in page.get_search_fields():
+        # Related objects are only indexed, not displayed
+        if (
+            not isinstance(search_field, index.SearchField)
+            or search_field.field_name == "title"
+        ):
+            continue
+
+        try:
+            field = search_field.get_field(type(page))
+        except FieldDoesNotExist:
+            field = None
+        value = getattr(page, search_field.field_name, None)
+        if callable(value):
+            value = value()
+
+        if hasattr(field, "get_searchable_content"):
+            # Rich text and StreamFields, without their markup
+            texts.extend(field.get_searchable_content(value))
+        elif value:
+            texts.append(str(value))
+
+    return " ".join(text.strip() for text in texts if text and text.strip())
+
+
+def _get_postgresql_headlines(connection, texts, query):
+    # A single query for every page of results, rather than a `SearchHeadline`
+    # annotation per page
+    config = getattr(get_search_backend(), "config", None)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT ts_headline(options.config, document.body, "
+            "plainto_tsquery(options.config, %s), %s) "
+            "FROM (SELECT COALESCE(%s::regconfig, get_current_ts_config()) "
+            "AS config) AS options, "
+            "unnest(%s::text[]) WITH ORDINALITY AS document(body, number) "
+            "ORDER BY document.number",
+            [query, HEADLINE_OPTIONS, config, texts],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _get_headline(text, query, length=240):
+    """
+    Highlight the words of `query` in an excerpt of `text` around the first
+    match, for databases without `ts_headline()`.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return text[:length]
+
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b", re.IGNORECASE
+    )
+    match = pattern.search(text)
+    start = max(0, match.start() - length // 4) if match else 0
+    end = start + length
+    excerpt = pattern.sub(
+        lambda match: f"{HEADLINE_START}{match.group(0)}{HEADLINE_STOP}",
+        text[start:end],
+    )
+    return f"{'… ' if start else ''}{excerpt}{' …' if end < len(text) else ''}"
+
+
+def _format_headline(headline):
+    return mark_safe(
+        escape(headline)
+        .replace(HEADLINE_START, "<mark>")
+        .replace(HEADLINE_STOP, "</mark>")
+    )
+
+
+@timed("search")
+def get_headlines(pages, query):
+    """
+    Return a snippet of the text of each of `pages` with the words of `query`
+    highlighted (in `<mark>` elements).
+    """
+    texts = [get_searchable_text(page)[:HEADLINE_MAX_LENGTH] for page in pages]
+    if not texts:
+        return []
+
+    connection = connections[router.db_for_read(Page)]
+    if connection.vendor == "postgresql":
+        headlines = _get_postgresql_headlines(connection, texts, query)
+    else:
+        headlines = [_get_headline(text, query) for text in texts]
+    return [_format_headline(headline) for headline in headlines]
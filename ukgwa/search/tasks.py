@@ -0,0 +1,13 @@
+from django_tasks import task
+
+from .indexing import process_search_index_queue
+
+
+@task()
+def update_search_index_task(delay=0):
+    """
+    Update the search index of the pages queued at least `delay` seconds ago.
+    Pages queued again since have their own task, so they are indexed once
+    their editors are done with them.
+    """
+    process_search_index_queue(delay=delay)
@@ -0,0 +1,188 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from wagtail.models import Page, Site
+from wagtail.search.backends import get_search_backend
+from wagtail.search.models import IndexEntry
+
+from ukgwa.standardpages.factories import InformationPageFactory
+from ukgwa.standardpages.models import InformationPage
+
+from ..indexing import (
+    get_indexed_model_chunks,
+    process_search_index_queue,
+    queue_search_index_updates,
+    update_search_index,
+)
+from ..models import SearchIndexQueueEntry
+
+
+def search(query):
+    return list(get_search_backend().search(query, Page))
+
+
+class SearchIndexQueueTestCase(TestCase):
+    def setUp(self):
+        self.home = Site.objects.get().root_page
+        self.page = self.home.add_child(
+            instance=InformationPageFactory.build(title="Census")
+        )
+
+    def test_new_pages_are_indexed(self):
+        self.assertEqual(search("census"), [self.page.page_ptr])
+        self.assertFalse(SearchIndexQueueEntry.objects.exists())
+
+    def test_saving_doesnt_update_the_index(self):
+        self.page.title = "Population"
+        with mock.patch("ukgwa.search.tasks.update_search_index_task") as task_mock:
+            self.page.save()
+
+        task_mock.enqueue.assert_not_called()
+        self.assertEqual(search("census"), [self.page.page_ptr])
+
+    def test_publishing_updates_the_index(self):
+        self.page.title = "Population"
+        self.page.save_revision().publish()
+
+        self.assertEqual(search("census"), [])
+        self.assertEqual(search("population"), [self.page.page_ptr])
+
+    def test_deleting_removes_the_page_from_the_index(self):
+        self.page.delete()
+
+        self.assertEqual(search("census"), [])
+        self.assertFalse(
+            IndexEntry.objects.filter(object_id=str(self.page.pk)).exists()
+        )
+
+    def test_duplicates_are_collapsed(self):
+        with mock.patch("ukgwa.search.tasks.update_search_index_task"):
+            queue_search_index_updates([self.page])
+            queue_search_index_updates([self.page])
+
+        self.assertEqual(SearchIndexQueueEntry.objects.count(), 1)
+        self.assertEqual(process_search_index_queue(), 1)
+        self.assertFalse(SearchIndexQueueEntry.objects.exists())
+
+    def test_deferred_with_backends_supporting_it(self):
+        with (
+            self.settings(SEARCH_INDEX_DEBOUNCE=30),
+            mock.patch("ukgwa.search.tasks.update_search_index_task") as task_mock,
+        ):
+            task_mock.get_backend.return_value.supports_defer = True
+            queue_search_index_updates([self.page])
+
+        entry = SearchIndexQueueEntry.objects.get()
+        task_mock.using.assert_called_once_with(
+            run_after=entry.queued_at + timedelta(seconds=30)
+        )
+        task_mock.using.return_value.enqueue.assert_called_once_with(delay=30)
+
+    def test_only_the_pages_are_indexed_without_deferring(self):
+        other_page = self.home.add_child(
+            instance=InformationPageFactory.build(title="Census returns")
+        )
+        IndexEntry.objects.all().delete()
+        SearchIndexQueueEntry.objects.create(
+            page_id=other_page.pk,
+            content_type_id=other_page.content_type_id,
+            queued_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        # The test settings use the immediate backend
+        queue_search_index_updates([self.page])
+
+        self.assertEqual(search("census"), [self.page.page_ptr])
+        self.assertEqual(SearchIndexQueueEntry.objects.get().page_id, other_page.pk)
+
+    def test_recently_queued_pages_are_kept(self):
+        SearchIndexQueueEntry.objects.create(
+            page_id=self.page.pk,
+            content_type_id=self.page.content_type_id,
+            queued_at=timezone.now(),
+        )
+
+        self.assertEqual(process_search_index_queue(delay=30), 0)
+        self.assertTrue(SearchIndexQueueEntry.objects.exists())
+
+    def test_batches(self):
+        pages = [
+            self.home.add_child(
+                instance=InformationPageFactory.build(title=f"Census {i}")
+            )
+            for i in range(4)
+        ]
+        IndexEntry.objects.all().delete()
+        SearchIndexQueueEntry.objects.bulk_create(
+            SearchIndexQueueEntry(
+                page_id=page.pk,
+                content_type_id=page.content_type_id,
+                queued_at=timezone.now(),
+            )
+            for page in [self.page, *pages]
+        )
+
+        with mock.patch(
+            "ukgwa.search.indexing.update_search_index", wraps=update_search_index
+        ) as update_mock:
+            self.assertEqual(process_search_index_queue(batch_size=2), 5)
+
+        self.assertEqual(update_mock.call_count, 3)
+        self.assertEqual(len(search("census")), 5)
+
+    def test_command(self):
+        SearchIndexQueueEntry.objects.create(
+            page_id=self.page.pk + 100,
+            content_type_id=self.page.content_type_id,
+            queued_at=timezone.now() - timedelta(minutes=1),
+        )
+        stdout = StringIO()
+
+        call_command("process_search_index_queue", stdout=stdout)
+
+        self.assertIn("Updated the search index of 1 pages", stdout.getvalue())
+        self.assertFalse(SearchIndexQueueEntry.objects.exists())
+
+
+class RebuildSearchIndexTestCase(TestCase):
+    def setUp(self):
+        home = Site.objects.get().root_page
+        self.pages = [
+            home.add_child(instance=InformationPageFactory.build(title=f"Census {i}"))
+            for i in range(5)
+        ]
+
+    def test_chunks(self):
+        ids = [page.pk for page in self.pages]
+
+        self.assertEqual(
+            list(get_indexed_model_chunks(InformationPage, 2)),
+            [(ids[0], ids[1]), (ids[2], ids[3]), (ids[4], ids[4])],
+        )
+
+    def test_command(self):
+        IndexEntry.objects.all().delete()
+        SearchIndexQueueEntry.objects.create(
+            page_id=self.pages[0].pk,
+            content_type_id=self.pages[0].content_type_id,
+            queued_at=timezone.now(),
+        )
+        stdout = StringIO()
+
+        call_command(
+            "rebuild_search_index",
+            workers=1,
+            chunk_size=2,
+            progress_every=1,
+            stdout=stdout,
+        )
+
+        # With the root and home pages
+        self.assertIn("default: indexed 7 objects", stdout.getvalue())
+        self.assertEqual(len(search("census")), 5)
+        self.assertFalse(SearchIndexQueueEntry.objects.exists())
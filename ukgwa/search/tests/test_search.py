@@ -0,0 +1,246 @@
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtail.models import Page, Site
+from wagtail.rich_text import RichText
+
+from ukgwa.standardpages.factories import InformationPageFactory
+from ukgwa.utils.pagination import encode_cursor
+
+from ..pagination import RankedResultsPaginator
+from ..results import (
+    get_headlines,
+    get_ranked_results,
+    invalidate_search_cache,
+    normalise_query,
+    rank_results,
+)
+from ..views import search
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.site = Site.objects.select_related("root_page").get()
+        self.home = self.site.root_page
+        self.body_match = self.home.add_child(
+            instance=InformationPageFactory.build(
+                title="Statistics",
+                body=[("paragraph", RichText("<p>Results of the census</p>"))],
+            )
+        )
+        self.title_match = self.home.add_child(
+            instance=InformationPageFactory.build(title="Census", body=[])
+        )
+        self.summary_match = self.home.add_child(
+            instance=InformationPageFactory.build(
+                title="Population",
+                listing_summary="How the census counts people",
+                body=[],
+            )
+        )
+        self.draft = self.home.add_child(
+            instance=InformationPageFactory.build(title="Census draft", live=False)
+        )
+
+    def get_result_ids(self, query):
+        return get_ranked_results(self.site, query)
+
+    def test_normalise_query(self):
+        self.assertEqual(normalise_query("  Census\n RECORDS "), "census records")
+        self.assertEqual(normalise_query(""), "")
+        self.assertEqual(normalise_query("census\x00\x02records\x03"), "census records")
+
+    def test_results(self):
+        self.assertCountEqual(
+            self.get_result_ids("census"),
+            [self.title_match.pk, self.summary_match.pk, self.body_match.pk],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Only weighted on PostgreSQL")
+    def test_results_are_ranked_by_field(self):
+        self.assertEqual(
+            self.get_result_ids("census"),
+            [self.title_match.pk, self.summary_match.pk, self.body_match.pk],
+        )
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.get_result_ids("census results"), [self.body_match.pk])
+
+    def test_empty_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_ranked_results(self.site, ""), [])
+
+    @override_settings(SEARCH_CACHE_MIN_HITS=2)
+    def test_popular_queries_are_cached(self):
+        with mock.patch(
+            "ukgwa.search.results.rank_results", wraps=rank_results
+        ) as rank_results_mock:
+            # Not popular yet
+            get_ranked_results(self.site, "census")
+            get_ranked_results(self.site, "census")
+            self.assertEqual(rank_results_mock.call_count, 2)
+
+            with self.assertNumQueries(0):
+                results = get_ranked_results(self.site, "census")
+            self.assertEqual(len(results), 3)
+            self.assertEqual(rank_results_mock.call_count, 2)
+
+            invalidate_search_cache()
+            get_ranked_results(self.site, "census")
+            self.assertEqual(rank_results_mock.call_count, 3)
+
+    @override_settings(SEARCH_CACHE_MIN_HITS=1)
+    def test_publishing_invalidates_cached_results(self):
+        get_ranked_results(self.site, "census")
+
+        self.draft.save_revision().publish()
+
+        self.assertIn(self.draft.pk, self.get_result_ids("census"))
+
+    def test_headlines(self):
+        self.body_match.body = [
+            ("paragraph", RichText("<p>Results of the <b>census</b> & more</p>"))
+        ]
+
+        headline, empty_headline = get_headlines(
+            [self.body_match, self.title_match], "census"
+        )
+
+        self.assertEqual(headline, "Results of the <mark>census</mark> &amp; more")
+        self.assertEqual(empty_headline, "")
+
+
+class RankedResultsPaginatorTestCase(TestCase):
+    def setUp(self):
+        home = Site.objects.get().root_page
+        self.pages = [
+            home.add_child(instance=InformationPageFactory.build(title=f"Page {i}"))
+            for i in range(5)
+        ]
+        self.paginator = RankedResultsPaginator(
+            [page.pk for page in [self.pages[i] for i in (4, 3, 1, 2, 0)]],
+            Page.objects.live().specific(),
+            per_page=2,
+        )
+
+    def get_ids(self, page):
+        return [item.pk for item in page.object_list]
+
+    def test_pages(self):
+        first = self.paginator.get_page()
+        self.assertEqual(self.paginator.num_pages, 3)
+        self.assertEqual(self.get_ids(first), [self.pages[4].pk, self.pages[3].pk])
+        self.assertFalse(first.has_previous)
+
+        second = self.paginator.get_page(2, after=first.next_cursor)
+        self.assertEqual(self.get_ids(second), [self.pages[1].pk, self.pages[2].pk])
+        self.assertEqual(second.number, 2)
+        self.assertTrue(second.has_previous)
+        self.assertTrue(second.has_next)
+
+        last = self.paginator.get_page(3, after=second.next_cursor)
+        self.assertEqual(self.get_ids(last), [self.pages[0].pk])
+        self.assertFalse(last.has_next)
+
+        previous = self.paginator.get_page(2, before=last.previous_cursor)
+        self.assertEqual(self.get_ids(previous), self.get_ids(second))
+
+    def test_page_number_without_cursor(self):
+        page = self.paginator.get_page(3)
+
+        self.assertEqual(self.get_ids(page), [self.pages[0].pk])
+        self.assertEqual(page.number, 3)
+
+    def test_invalid_cursor(self):
+        page = self.paginator.get_page(2, after="not-a-cursor")
+
+        self.assertEqual(page.number, 2)
+        self.assertEqual(self.get_ids(page), [self.pages[1].pk, self.pages[2].pk])
+
+    def test_cursor_of_result_no_longer_ranked(self):
+        cursor = encode_cursor([self.pages[0].pk + 100])
+
+        page = self.paginator.get_page(3, after=cursor)
+
+        self.assertEqual(self.get_ids(page), [self.pages[0].pk])
+
+    def test_unpublished_pages_are_skipped(self):
+        self.pages[3].unpublish()
+
+        page = self.paginator.get_page()
+
+        self.assertEqual(self.get_ids(page), [self.pages[4].pk])
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+class SearchViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        home = Site.objects.get().root_page
+        self.page = home.add_child(
+            instance=InformationPageFactory.build(
+                title="Census records",
+                introduction="Where to find the <census>",
+                body=[],
+            )
+        )
+
+    def test_search(self):
+        response = self.client.get("/search/", {"q": "Census", "search_type": "site"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["search_results"]), [self.page])
+        self.assertContains(response, "1 result for “Census”")
+        self.assertContains(response, "Where to find the &lt;<mark>census</mark>&gt;")
+        self.assertContains(response, 'value="site" checked')
+
+    @override_settings(SEARCH_CACHE_CONTROL_S_MAXAGE=60)
+    def test_results_are_only_cached_briefly(self):
+        response = self.client.get("/search/", {"q": "Census"})
+
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+        self.assertNotIn("Cache-Tag", response)
+
+    def test_no_results(self):
+        response = self.client.get("/search/", {"q": "tax"})
+
+        self.assertContains(response, "No results for “tax”")
+
+    def test_control_characters_are_ignored(self):
+        response = self.client.get("/search/", {"q": "\x00Census\x02"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["search_results"]), [self.page])
+        self.assertEqual(response.context["search_query"], "Census")
+
+        response = self.client.get("/search/", {"q": "\x00"})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_found_without_a_default_site(self):
+        Site.objects.update(hostname="example.com", is_default_site=False)
+
+        with self.assertRaises(Http404):
+            search(RequestFactory().get("/search/", {"q": "Census"}))
+
+    def test_other_search_types_redirect_to_the_archive(self):
+        response = self.client.get("/search/", {"search_type": "url", "q": "gov.uk"})
+
+        self.assertRedirects(
+            response,
+            "https://webarchive.nationalarchives.gov.uk/search/result"
+            "?search_type=url&q=gov.uk",
+            fetch_redirect_response=False,
+        )
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+
+from wagtail.models import Page, Site
+
+from ukgwa.utils.instrumentation import set_route
+
+from .pagination import RankedResultsPaginator
+from .results import (
+    MAX_QUERY_LENGTH,
+    get_headlines,
+    get_ranked_results,
+    normalise_query,
+    remove_control_characters,
+)
+
+ARCHIVE_SEARCH_URL = "https://webarchive.nationalarchives.gov.uk/search/result"
+
+
+def search(request):
+    """
+    Search the pages of the site.
+
+    The featured search form is submitted here, so other types of search
+    (e.g. by keyword or URL) are redirected to the archive's search.
+    """
+    search_type = request.GET.get("search_type", "site")
+    if search_type != "site":
+        return redirect(f"{ARCHIVE_SEARCH_URL}?{request.GET.urlencode()}")
+
+    set_route("search")
+    # Falls back to the default site, so there's nothing to search without one
+    site = Site.find_for_request(request)
+    if site is None:
+        raise Http404
+
+    search_query = remove_control_characters(request.GET.get("q", ""))
+    search_query = search_query.strip()[:MAX_QUERY_LENGTH]
+    query = normalise_query(search_query)
+
+    paginator = RankedResultsPaginator(
+        get_ranked_results(site, query),
+        Page.objects.live().specific(),
+        per_page=settings.DEFAULT_PER_PAGE,
+    )
+    search_results = paginator.get_page(
+        request.GET.get("page"),
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+    )
+    for result, headline in zip(
+        search_results.object_list, get_headlines(search_results.object_list, query)
+    ):
+        result.search_headline = headline
+
+    return TemplateResponse(
+        request,
+        "pages/search/search.html",
+        {"search_query": search_query, "search_results": search_results},
+    )
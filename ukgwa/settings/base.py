@@ -56,22 +56,13 @@ if "CSRF_TRUSTED_ORIGINS" in env:
 # Application definition
 
 INSTALLED_APPS = [
-    # Scout APM is an app that we use for the performance monitoring.
-    # You set configure it by setting the following environment variables:
-    #
-    #   SCOUT_MONITOR="True"
-    #   SCOUT_KEY="paste api key here"
-    #   SCOUT_NAME="ukgwa-(staging|production)"
-    #
-    # According to the official docs, it's important that Scout is listed
-    # first: https://scoutapm.com/docs/python/django
-    "scout_apm.django",
     # First party apps
     "ukgwa.core",
     "ukgwa.home",
     "ukgwa.images",
     "ukgwa.navigation",
     "ukgwa.project_styleguide",
+    "ukgwa.search",
     "ukgwa.standardpages",
     "ukgwa.users",
     "ukgwa.utils",
@@ -95,7 +86,6 @@ INSTALLED_APPS = [
     # Third party apps
     "crispy_forms",
     "django_extensions",
-    "pattern_library",
     "wagtailaccessibility",
     "birdbath",
     # Django
@@ -109,6 +99,20 @@ INSTALLED_APPS = [
     "django.contrib.sitemaps",
 ]
 
+# Scout APM is an app that we use for the performance monitoring.
+# You set configure it by setting the following environment variables:
+#
+#   SCOUT_MONITOR="True"
+#   SCOUT_KEY="paste api key here"
+#   SCOUT_NAME="ukgwa-(staging|production)"
+#
+# It's only installed when monitoring, as importing it and its instruments
+# slows down the start of every process (see `manage.py profile_imports`).
+if env.get("SCOUT_MONITOR", "").lower() in ("yes", "true", "t", "1"):
+    # According to the official docs, it's important that Scout is listed
+    # first: https://scoutapm.com/docs/python/django
+    INSTALLED_APPS.insert(0, "scout_apm.django")
+
 
 # Middleware classes
 # https://docs.djangoproject.com/en/stable/ref/settings/#middleware
@@ -120,6 +124,12 @@ MIDDLEWARE = [
     # SecurityMiddleware.
     # http://whitenoise.evans.io/en/stable/#quickstart-for-django-apps
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Times each request and its hot paths, when INSTRUMENTATION_ENABLED is
+    # set. Kept near the top so it covers the other middleware, but below
+    # Whitenoise so that static files aren't timed.
+    "ukgwa.utils.instrumentation.InstrumentationMiddleware",
+    # Reports N+1 and slow queries, when QUERY_DETECTOR_ENABLED is set
+    "ukgwa.utils.query_detector.QueryDetectorMiddleware",
     "xff.middleware.XForwardedForMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -142,20 +152,23 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
-                "wagtail.contrib.settings.context_processors.settings",
+                # Wagtail's `settings` variable, using a cache shared across
+                # workers. See ukgwa/utils/settings_cache.py.
+                "ukgwa.core.context_processors.site_settings",
                 # This is a custom context processor that lets us add custom
                 # global variables to all the templates.
                 "ukgwa.core.context_processors.global_vars",
             ],
-            "builtins": [
-                "pattern_library.loader_tags",
-            ],
         },
     }
 ]
 
 WSGI_APPLICATION = "ukgwa.wsgi.application"
 
+# Whether the site is served through WSGI or ASGI (ukgwa/asgi.py sets it), see
+# gunicorn.conf.py and docs/server-modes.md.
+SERVER_MODE = env.get("SERVER_MODE", "wsgi")
+
 
 # Database
 # This setting will use DATABASE_URL environment variable.
@@ -163,7 +176,13 @@ WSGI_APPLICATION = "ukgwa.wsgi.application"
 # https://github.com/kennethreitz/dj-database-url
 
 DATABASES = {
-    "default": dj_database_url.config(conn_max_age=600, default="postgres:///ukgwa")
+    "default": dj_database_url.config(
+        # Under ASGI, each request's synchronous code runs in its own thread,
+        # so persistent connections would be left open rather than reused.
+        # https://docs.djangoproject.com/en/4.2/ref/databases/#persistent-connections
+        conn_max_age=0 if SERVER_MODE == "asgi" else 600,
+        default="postgres:///ukgwa",
+    )
 }
 
 
@@ -221,7 +240,29 @@ else:
 # Search
 # https://docs.wagtail.io/en/latest/topics/search/backends.html
 
-WAGTAILSEARCH_BACKENDS = {"default": {"BACKEND": "wagtail.search.backends.database"}}
+# On PostgreSQL, pages are indexed as weighted tsvectors, stemmed as English.
+# Changing the configuration requires running `./manage.py update_index`.
+WAGTAILSEARCH_BACKENDS = {
+    "default": {
+        "BACKEND": "wagtail.search.backends.database",
+        "SEARCH_CONFIG": "english",
+    }
+}
+
+# Site search, see ukgwa/search/results.py.
+# Maximum number of results ranked for a query.
+SEARCH_MAX_RESULTS = int(env.get("SEARCH_MAX_RESULTS", 500))
+# Number of seconds the results of a popular query are cached for.
+SEARCH_CACHE_TIMEOUT = int(env.get("SEARCH_CACHE_TIMEOUT", 60 * 60))
+# Number of times a query must be searched for within SEARCH_CACHE_TIMEOUT
+# for its results to be cached.
+SEARCH_CACHE_MIN_HITS = int(env.get("SEARCH_CACHE_MIN_HITS", 3))
+# Number of seconds the search index update of a page is deferred by, with
+# task backends which support it, so that a page saved repeatedly is indexed
+# once. See ukgwa/search/indexing.py.
+SEARCH_INDEX_DEBOUNCE = int(env.get("SEARCH_INDEX_DEBOUNCE", 30))
+# Number of queued pages indexed at a time.
+SEARCH_INDEX_BATCH_SIZE = int(env.get("SEARCH_INDEX_BATCH_SIZE", 100))
 
 
 # Password validation
@@ -508,11 +549,20 @@ if (
     "FRONTEND_CACHE_CLOUDFLARE_TOKEN" in env
     or "FRONTEND_CACHE_CLOUDFLARE_BEARER_TOKEN" in env
 ):
-    INSTALLED_APPS.append("wagtail.contrib.frontend_cache")
+    # Pages are purged on publish by the project's own signal handlers (see
+    # ukgwa.utils.signal_handlers), which also purge the pages depending on
+    # them, so "wagtail.contrib.frontend_cache" is not added to INSTALLED_APPS.
     WAGTAILFRONTENDCACHE = {
         "default": {
-            "BACKEND": "wagtail.contrib.frontend_cache.backends.CloudflareBackend",
+            "BACKEND": "ukgwa.utils.frontend_cache.CloudflareBackend",
             "ZONEID": env["FRONTEND_CACHE_CLOUDFLARE_ZONEID"],
+            # Purging by cache tag requires a Cloudflare Enterprise zone. When
+            # enabled, dependent pages are purged using the "Cache-Tag" header
+            # set on page responses instead of URL by URL.
+            "CACHE_TAGS": env.get("FRONTEND_CACHE_CLOUDFLARE_CACHE_TAGS", "false")
+            .lower()
+            .strip()
+            == "true",
         }
     }
 
@@ -549,6 +599,11 @@ except ValueError:
     pass
 
 
+# Search results aren't purged from the front-end cache when pages change, so
+# they're only cached for this many seconds. See urls.py.
+SEARCH_CACHE_CONTROL_S_MAXAGE = int(env.get("SEARCH_CACHE_CONTROL_S_MAXAGE", 60))
+
+
 # Give front-end cache 30 second to revalidate the cache to avoid hitting the
 # backend. See urls.py.
 CACHE_CONTROL_STALE_WHILE_REVALIDATE = int(
@@ -556,6 +611,61 @@ CACHE_CONTROL_STALE_WHILE_REVALIDATE = int(
 )
 
 
+# Server-side full-page cache for anonymous visitors, stored in the "default"
+# cache. See ukgwa/utils/page_cache.py.
+PAGE_CACHE_ENABLED = env.get("PAGE_CACHE_ENABLED", "false").lower().strip() == "true"
+# Number of seconds a cached page is served before being regenerated.
+PAGE_CACHE_TIMEOUT = int(env.get("PAGE_CACHE_TIMEOUT", 300))
+# Number of seconds a stale page can still be served while one worker
+# regenerates it.
+PAGE_CACHE_STALE_TIMEOUT = int(env.get("PAGE_CACHE_STALE_TIMEOUT", 60))
+# Maximum number of seconds a worker can hold the regeneration lock for.
+PAGE_CACHE_LOCK_TIMEOUT = 30
+
+# Identifies the deployed code, so that rendered HTML cached with a previous
+# release's templates isn't served (see ukgwa/utils/fragment_cache.py). Heroku
+# sets `HEROKU_SLUG_COMMIT` with the "runtime-dyno-metadata" lab enabled.
+RELEASE_VERSION = env.get("RELEASE_VERSION") or env.get("HEROKU_SLUG_COMMIT", "")
+
+# Number of seconds each worker process keeps site settings for, in front of
+# the "default" cache. Changes made in other processes are picked up on the
+# next request, as the settings are keyed by the version number in the
+# "default" cache. See ukgwa/utils/settings_cache.py.
+SITE_SETTINGS_LOCAL_CACHE_TIMEOUT = int(
+    env.get("SITE_SETTINGS_LOCAL_CACHE_TIMEOUT", 30)
+)
+
+
+# Timing of SQL queries, template rendering, renditions, embeds, site settings
+# and cache lookups for each request. Staff users get the timings in a
+# Server-Timing header. See ukgwa/utils/instrumentation.py.
+INSTRUMENTATION_ENABLED = (
+    env.get("INSTRUMENTATION_ENABLED", "false").lower().strip() == "true"
+)
+# Number of seconds between logging each worker's histograms of the timings.
+# Set to 0 to disable logging them.
+INSTRUMENTATION_LOG_INTERVAL = int(env.get("INSTRUMENTATION_LOG_INTERVAL", 60))
+# Bearer token a metrics scraper authenticates to /metrics/ with. Staff users
+# can always see the metrics.
+INSTRUMENTATION_METRICS_TOKEN = env.get("INSTRUMENTATION_METRICS_TOKEN", "")
+
+
+# Report queries repeated from the same place (usually N+1 patterns) and slow
+# queries of every request, e.g. on staging. See ukgwa/utils/query_detector.py.
+QUERY_DETECTOR_ENABLED = (
+    env.get("QUERY_DETECTOR_ENABLED", "false").lower().strip() == "true"
+)
+# Number of times a query can be repeated from the same place before being
+# reported.
+QUERY_DETECTOR_THRESHOLD = int(env.get("QUERY_DETECTOR_THRESHOLD", 5))
+# Number of milliseconds above which a query is reported as slow.
+QUERY_DETECTOR_SLOW_QUERY_MS = int(env.get("QUERY_DETECTOR_SLOW_QUERY_MS", 100))
+# Raise an exception for repeated queries, rather than logging a warning.
+QUERY_DETECTOR_RAISE = (
+    env.get("QUERY_DETECTOR_RAISE", "false").lower().strip() == "true"
+)
+
+
 # Required to get e.g. wagtail-sharing working on Heroku and probably many other platforms.
 # https://docs.djangoproject.com/en/stable/ref/settings/#use-x-forwarded-port
 USE_X_FORWARDED_PORT = env.get("USE_X_FORWARDED_PORT", "true").lower().strip() == "true"
@@ -751,6 +861,13 @@ DEFAULT_PER_PAGE = 20
 
 # Styleguide
 PATTERN_LIBRARY_ENABLED = env.get("PATTERN_LIBRARY_ENABLED", "false").lower() == "true"
+
+# The pattern library wraps template tags to render placeholders, and loads
+# YAML and Markdown to do so, so it's only installed when enabled.
+if PATTERN_LIBRARY_ENABLED:
+    INSTALLED_APPS += ["pattern_library"]
+    TEMPLATES[0]["OPTIONS"]["builtins"] = ["pattern_library.loader_tags"]
+
 PATTERN_LIBRARY = {
     "SECTIONS": (
         ("components", ["components"]),
@@ -798,9 +915,14 @@ BIRDBATH_CHECKS = ["birdbath.checks.contrib.heroku.HerokuNotProductionCheck"]
 BIRDBATH_REQUIRED = env.get("BIRDBATH_REQUIRED", "true").lower() == "true"
 # Add project specific processors here to anonymise or delete sensitive data.
 # See https://git.torchbox.com/internal/django-birdbath/#processors
+# Subclasses of ukgwa.utils.anonymisation.BatchAnonymiser are run in batches,
+# resumably, by the anonymise_data command.
 BIRDBATH_PROCESSORS = [
-    "birdbath.processors.users.UserEmailAnonymiser",
-    "birdbath.processors.users.UserPasswordAnonymiser",
+    "ukgwa.utils.anonymisation.UserAnonymiser",
+    "ukgwa.utils.anonymisation.CommentAnonymiser",
+    "ukgwa.utils.anonymisation.CommentReplyAnonymiser",
+    "ukgwa.utils.anonymisation.RevisionCommentAnonymiser",
+    "ukgwa.utils.anonymisation.FormSubmissionAnonymiser",
 ]
 
 # Isolates the browsing context exclusively to same-origin documents.
@@ -9,7 +9,14 @@ SECRET_KEY = "foo"
 
 
 # Enable FE component library
-PATTERN_LIBRARY_ENABLED = True
+if not PATTERN_LIBRARY_ENABLED:  # noqa
+    PATTERN_LIBRARY_ENABLED = True
+    INSTALLED_APPS += ["pattern_library"]  # noqa
+    TEMPLATES[0]["OPTIONS"]["builtins"] = ["pattern_library.loader_tags"]  # noqa
+
+
+# Send Server-Timing headers, see ukgwa/utils/instrumentation.py
+INSTRUMENTATION_ENABLED = True
 
 
 # Allow requests from the local IPs to see more debug information.
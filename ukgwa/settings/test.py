@@ -31,6 +31,12 @@ CACHES = {
     }
 }
 
+# Don't keep site settings in memory across tests, as they are rolled back
+SITE_SETTINGS_LOCAL_CACHE_TIMEOUT = 0
+
+# Fail tests rather than logging repeated queries
+QUERY_DETECTOR_RAISE = True
+
 # Wagtail
 WAGTAILADMIN_BASE_URL = "http://testserver"
 
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("standardpages", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="informationpage",
+            name="reading_time",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,5 +1,4 @@
 from django.conf import settings
-from django.core.paginator import Paginator
 from django.db import models
 
 from wagtail.admin.panels import FieldPanel, InlinePanel
@@ -7,17 +6,23 @@ from wagtail.fields import StreamField
 from wagtail.search import index
 
 from ukgwa.core.blocks import StoryBlock
-from ukgwa.core.models import BasePage
+from ukgwa.core.models import BasePage, ListingFieldsMixin, ReadingTimeMixin
+from ukgwa.utils.cache import add_cache_tags, get_children_cache_tag
+from ukgwa.utils.pagination import KeysetPaginator
 
+from .utils import get_live_child_count
 
-class InformationPage(BasePage):
+
+class InformationPage(ReadingTimeMixin, BasePage):
     template = "pages/standardpages/information_page.html"
 
+    reading_time_fields = ["body"]
+
     introduction = models.TextField(blank=True)
     body = StreamField(StoryBlock())
 
     search_fields = BasePage.search_fields + [
-        index.SearchField("introduction"),
+        index.SearchField("introduction", boost=1),
         index.SearchField("body"),
     ]
 
@@ -40,14 +45,27 @@ class IndexPage(BasePage):
 
     content_panels = BasePage.content_panels + [FieldPanel("introduction")]
 
-    search_fields = BasePage.search_fields + [index.SearchField("introduction")]
+    search_fields = BasePage.search_fields + [
+        index.SearchField("introduction", boost=1)
+    ]
 
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        subpages = self.get_children().live().order_by("title")
-        per_page = settings.DEFAULT_PER_PAGE
-        page_number = request.GET.get("page")
-        subpages = Paginator(subpages, per_page).get_page(page_number)
+        paginator = KeysetPaginator(
+            self.get_children().live().defer_streamfields().specific(),
+            per_page=settings.DEFAULT_PER_PAGE,
+            ordering=("title", "pk"),
+            count=get_live_child_count(self),
+        )
+        subpages = paginator.get_page(
+            request.GET.get("page"),
+            after=request.GET.get("after"),
+            before=request.GET.get("before"),
+        )
+        ListingFieldsMixin.prefetch_listing_images(subpages.object_list)
+        # Purge the listing from the front-end cache when a child is published
+        # or unpublished, not just when a page already listed changes
+        add_cache_tags(request, get_children_cache_tag(self))
 
         context["subpages"] = subpages
 
@@ -1,12 +1,22 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.rich_text import RichText
 from wagtail.test.utils import WagtailPageTestCase
 
 from ukgwa.core.models import PageRelatedPage
 from ukgwa.home.models import HomePage
+from ukgwa.images.models import CustomImage
 from ukgwa.standardpages.factories import (
     IndexPageFactory,
     InformationPageFactory,
 )
 from ukgwa.standardpages.models import IndexPage, InformationPage
+from ukgwa.standardpages.utils import get_live_child_count
 
 
 class StandrdPageTests(WagtailPageTestCase):
@@ -37,3 +47,121 @@ class StandrdPageTests(WagtailPageTestCase):
         info_page.refresh_from_db()
 
         self.assertEqual(list(info_page.related_pages), [p1, p3, p4, p2])
+
+
+class ReadingTimeTests(WagtailPageTestCase):
+    def setUp(self):
+        self.page = HomePage.objects.get().add_child(
+            instance=InformationPageFactory.build(
+                body=[
+                    ("heading", "Four words heading here"),
+                    ("paragraph", RichText("<p>One two</p><p>three</p>")),
+                    (
+                        "accordion",
+                        {"sections": [{"title": "Title", "content": "Some content"}]},
+                    ),
+                    ("image", {"image": None}),
+                ]
+            )
+        )
+
+    def test_reading_time_stored_on_save(self):
+        self.page.refresh_from_db()
+        # Image blocks without an image aren't displayed
+        self.assertEqual(self.page.reading_time, {"body": {"words": 10, "images": 0}})
+
+    def test_reading_time_minutes(self):
+        self.page.reading_time = {"body": {"words": 550, "images": 3}}
+        # 120 seconds for the words, 30 for the images
+        self.assertEqual(self.page.get_reading_time_minutes("body"), 2)
+
+        self.page.reading_time = {"body": {"words": 0, "images": 0}}
+        self.assertEqual(self.page.get_reading_time_minutes("body"), 1)
+
+    def test_backfill_command(self):
+        InformationPage.objects.update(reading_time={})
+
+        call_command("backfill_reading_time", stdout=StringIO())
+
+        self.page.refresh_from_db()
+        self.assertEqual(self.page.reading_time["body"]["words"], 10)
+
+
+@override_settings(
+    DEFAULT_PER_PAGE=2,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class IndexPageListingTests(WagtailPageTestCase):
+    def setUp(self):
+        cache.clear()
+        self.index_page = HomePage.objects.get().add_child(
+            instance=IndexPageFactory.build(title="Index", slug="index")
+        )
+        self.children = [
+            self.index_page.add_child(
+                instance=InformationPageFactory.build(title=title, body=[])
+            )
+            for title in ["Alpha", "Charlie", "Delta"]
+        ]
+        # Pages of another type are listed too
+        self.children.insert(
+            1,
+            self.index_page.add_child(instance=IndexPageFactory.build(title="Bravo")),
+        )
+
+    def get_context(self, **params):
+        request = RequestFactory().get("/index/", params)
+        return self.index_page.get_context(request)
+
+    def test_pages_are_listed_by_title(self):
+        subpages = self.get_context()["subpages"]
+        self.assertEqual(subpages.object_list, self.children[:2])
+        self.assertIsInstance(subpages.object_list[0], InformationPage)
+        self.assertIsInstance(subpages.object_list[1], IndexPage)
+        self.assertEqual(subpages.paginator.num_pages, 2)
+
+        subpages = self.get_context(page=2, after=subpages.next_cursor)["subpages"]
+        self.assertEqual(subpages.object_list, self.children[2:])
+
+    def test_listing_queries(self):
+        image = CustomImage.objects.create(title="Image", file=get_test_image_file())
+        for child in self.children:
+            child.listing_image = image
+            child.save()
+        # Cache the child count
+        self.get_context()
+
+        with self.assertNumQueries(4):
+            # The children, their specific instances (one query per page
+            # type, however many pages there are) and the listing images
+            subpages = self.get_context()["subpages"]
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [subpage.listing_image for subpage in subpages], [image, image]
+            )
+
+    def test_child_count_is_invalidated_on_publish(self):
+        self.assertEqual(get_live_child_count(self.index_page), 4)
+
+        self.index_page.add_child(
+            instance=InformationPageFactory.build(title="Echo", body=[])
+        ).save_revision().publish()
+        self.assertEqual(get_live_child_count(self.index_page), 5)
+
+        self.children[0].unpublish()
+        self.assertEqual(get_live_child_count(self.index_page), 4)
+
+        self.children[2].delete()
+        self.assertEqual(get_live_child_count(self.index_page), 3)
+
+    def test_index_page_renders(self):
+        response = self.client.get("/index/")
+        self.assertContains(response, "Alpha")
+        self.assertContains(response, "1/2")
+        self.assertContains(response, "after=")
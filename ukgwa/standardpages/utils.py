@@ -0,0 +1,42 @@
+from django.core.cache import cache
+
+from wagtail.models import Page
+
+CHILD_COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_child_count_cache_key(page_id):
+    return f"child-count:{page_id}"
+
+
+def get_live_child_count(page):
+    """
+    Return the number of live children of `page`, cached until one of its
+    children is published, unpublished, moved or deleted.
+    """
+    key = get_child_count_cache_key(page.pk)
+    count = cache.get(key)
+    if count is None:
+        count = page.get_children().live().count()
+        cache.set(key, count, timeout=CHILD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_child_count_cache(*parent_ids):
+    cache.delete_many(
+        [get_child_count_cache_key(parent_id) for parent_id in parent_ids]
+    )
+
+
+def invalidate_parent_child_count_cache(page):
+    """
+    Invalidate the cached child count of the parent of `page`, looked up from
+    the page's treebeard path.
+    """
+    if page.depth <= 1:
+        return
+
+    parent_path = page.path[: -page.steplen]
+    invalidate_child_count_cache(
+        *Page.objects.filter(path=parent_path).values_list("pk", flat=True)
+    )
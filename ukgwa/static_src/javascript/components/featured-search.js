@@ -0,0 +1,30 @@
+class FeaturedSearch {
+    static selector() {
+        return '[data-featured-search]';
+    }
+
+    constructor(node) {
+        this.form = node;
+        this.siteSearchUrl = this.form.getAttribute('action');
+        this.archiveSearchUrl = this.form.dataset.archiveSearchUrl;
+
+        if (this.archiveSearchUrl) {
+            this.form.addEventListener('submit', () => this.handleSubmit());
+        }
+    }
+
+    // Submit keyword and URL searches to the archive's search directly,
+    // rather than through a redirect from the site search
+    handleSubmit() {
+        const searchType = this.form.querySelector(
+            'input[name="search_type"]:checked',
+        );
+        const isSiteSearch = searchType && searchType.value === 'site';
+        this.form.setAttribute(
+            'action',
+            isSiteSearch ? this.siteSearchUrl : this.archiveSearchUrl,
+        );
+    }
+}
+
+export default FeaturedSearch;
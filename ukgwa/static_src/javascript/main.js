@@ -1,5 +1,6 @@
 import { initAll } from '@nationalarchives/frontend/nationalarchives/all';
 
+import FeaturedSearch from './components/featured-search';
 import Header from './components/header';
 import SkipLink from './components/skip-link';
 import YouTubeConsentManager from './components/youtube-consent-manager';
@@ -16,6 +17,7 @@ document.addEventListener('DOMContentLoaded', () => {
     initComponent(SkipLink);
     initComponent(YouTubeConsentManager);
     initComponent(TableHint);
+    initComponent(FeaturedSearch);
 
     // Initialise custom header with extended mobile breakpoint
     // Must be initialised before initAll() to prevent TNA's default header from taking over
@@ -2,17 +2,18 @@ from django.apps import apps
 from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
-from django.views.decorators.cache import never_cache
+from django.views.decorators.cache import cache_control, never_cache
 from django.views.decorators.vary import vary_on_headers
 from django.views.generic import TemplateView
 
 from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
-from wagtail.contrib.sitemaps.views import sitemap
 from wagtail.documents import urls as wagtaildocs_urls
 from wagtail.utils.urlpatterns import decorate_urlpatterns
 
+from ukgwa.search.views import search
 from ukgwa.utils.cache import get_default_cache_control_decorator
+from ukgwa.utils.views import metrics, sitemap_index, sitemap_shard
 
 private_urlpatterns = []
 
@@ -27,11 +28,19 @@ private_urlpatterns += [
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
+    path("metrics/", metrics, name="metrics"),
 ]
 
 
 # Public URLs that are meant to be cached.
-urlpatterns = [path("sitemap.xml", sitemap)]
+urlpatterns = [
+    path("sitemap.xml", sitemap_index, name="sitemap"),
+    path(
+        "sitemap-<int:section_id>-<int:chunk>.xml",
+        sitemap_shard,
+        name="sitemap_shard",
+    ),
+]
 
 
 if settings.DEBUG:
@@ -77,6 +86,13 @@ if getattr(settings, "PATTERN_LIBRARY_ENABLED", False) and apps.is_installed(
 # Set public URLs to use the "default" cache settings.
 urlpatterns = decorate_urlpatterns(urlpatterns, get_default_cache_control_decorator())
 
+# Search results have no cache tags and aren't purged when pages change, so
+# they're only cached briefly.
+urlpatterns += decorate_urlpatterns(
+    [path("search/", search, name="search")],
+    cache_control(public=True, s_maxage=settings.SEARCH_CACHE_CONTROL_S_MAXAGE),
+)
+
 # Set private URLs to use the "never cache" cache settings.
 private_urlpatterns = decorate_urlpatterns(private_urlpatterns, never_cache)
 
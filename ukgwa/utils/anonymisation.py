@@ -0,0 +1,195 @@
+"""
+Anonymising pulled data in batches, resumably.
+
+The processors are listed in `BIRDBATH_PROCESSORS`, so that they still run
+with `run_birdbath`, but are run by the `anonymise_data` command (see `fab
+pull-production-data`), which unlike `run_birdbath`:
+
+- reads each model with a single server-side cursor (`QuerySet.iterator`),
+  loading only the fields being anonymised, rather than every object at
+  once;
+- saves `batch_size` objects at a time in a single `UPDATE` (see
+  `bulk_update_from_values`), each batch in its own transaction, rather
+  than all processors in a single transaction;
+- records the primary key of the last object saved in an
+  `AnonymisationCheckpoint`, in the same transaction as the batch, so that an
+  interrupted run carries on from there. Checkpoints are stored in the
+  database, so they're replaced with the data when a new dump is imported.
+
+Processors which aren't `BatchAnonymiser`s (e.g. birdbath's deleters) are run
+in a single transaction, as by `run_birdbath`.
+"""
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.models import Comment, CommentReply, Revision
+from wagtail.models.pages import COMMENTS_RELATION_NAME
+
+from birdbath.processors import BaseModelAnonymiser
+from birdbath.processors.users import BaseUserAnonymiser
+
+from .models import AnonymisationCheckpoint
+from .query import bulk_update_from_values
+
+
+class BatchAnonymiser(BaseModelAnonymiser):
+    """
+    A birdbath anonymiser processing its objects `batch_size` at a time.
+
+    Only the primary key, the `update_fields` and the `read_fields` are
+    loaded.
+    """
+
+    batch_size = 1000
+    read_fields = []
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .only("pk", *self.update_fields, *self.read_fields)
+            .order_by("pk")
+        )
+
+    def run(self, **kwargs):
+        # Called by `run_birdbath`, without a checkpoint
+        for _ in run_in_batches(self):
+            pass
+
+
+def get_processor_name(processor):
+    return f"{type(processor).__module__}.{type(processor).__qualname__}"
+
+
+def run_in_batches(processor, checkpoint=None):
+    """
+    Anonymise the objects of `processor`, after the last one recorded in
+    `checkpoint` if given, and yield the number of objects saved in each
+    batch.
+    """
+    queryset = processor.get_queryset()
+    if checkpoint is not None and checkpoint.last_pk is not None:
+        queryset = queryset.filter(pk__gt=checkpoint.last_pk)
+
+    batch = []
+    for obj in queryset.iterator(chunk_size=processor.batch_size):
+        processor.process_object(obj)
+        batch.append(obj)
+        if len(batch) >= processor.batch_size:
+            yield save_batch(processor, batch, checkpoint)
+            batch = []
+    if batch:
+        yield save_batch(processor, batch, checkpoint)
+
+    if checkpoint is not None:
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save(update_fields=["completed_at"])
+
+
+def save_batch(processor, batch, checkpoint):
+    with transaction.atomic():
+        bulk_update_from_values(processor.model, batch, list(processor.update_fields))
+        if checkpoint is not None:
+            checkpoint.last_pk = batch[-1].pk
+            checkpoint.save(update_fields=["last_pk"])
+    return len(batch)
+
+
+def get_checkpoint(processor):
+    checkpoint, _ = AnonymisationCheckpoint.objects.get_or_create(
+        processor=get_processor_name(processor)
+    )
+    return checkpoint
+
+
+class UserAnonymiser(BatchAnonymiser, BaseUserAnonymiser):
+    """
+    Replace the names, email addresses and passwords of users (other than
+    superusers and `BIRDBATH_USER_ANONYMISER_EXCLUDE_EMAIL_RE` matches).
+    """
+
+    anonymise_fields = ["username", "first_name", "last_name", "email", "password"]
+
+    # Generating a name with Faker takes longer than saving it, so names are
+    # picked from a sample
+    @cached_property
+    def first_names(self):
+        return [self.faker.first_name() for _ in range(1000)]
+
+    @cached_property
+    def last_names(self):
+        return [self.faker.last_name() for _ in range(1000)]
+
+    def generate_first_name(self, field, obj):
+        return self.faker.random.choice(self.first_names)
+
+    def generate_last_name(self, field, obj):
+        return self.faker.random.choice(self.last_names)
+
+    def generate_username(self, field, obj):
+        # Unique, as usernames must be
+        return f"user-{obj.pk}"
+
+    def generate_email(self, field, obj):
+        return f"user-{obj.pk}@example.com"
+
+    def generate_password(self, field, obj):
+        # An unusable password, rather than hashing a random one, which takes
+        # as long as logging in
+        return make_password(None)
+
+
+class CommentAnonymiser(BatchAnonymiser):
+    model = Comment
+    anonymise_fields = ["text"]
+
+
+class CommentReplyAnonymiser(BatchAnonymiser):
+    model = CommentReply
+    anonymise_fields = ["text"]
+
+
+class RevisionCommentAnonymiser(BatchAnonymiser):
+    """
+    Replace the text of the comments (and their replies) saved with page
+    revisions.
+    """
+
+    model = Revision
+    update_fields = ["content"]
+    # Revisions include the whole page
+    batch_size = 100
+
+    def get_queryset(self):
+        return super().get_queryset().filter(content__has_key=COMMENTS_RELATION_NAME)
+
+    def process_object(self, obj):
+        for comment in obj.content[COMMENTS_RELATION_NAME]:
+            comment["text"] = self.get_random_string()
+            for reply in comment.get("replies", []):
+                reply["text"] = self.get_random_string()
+
+
+class FormSubmissionAnonymiser(BatchAnonymiser):
+    """
+    Replace the values entered in forms, keeping their field names.
+    """
+
+    model = FormSubmission
+    update_fields = ["form_data"]
+
+    def anonymise_value(self, value):
+        if isinstance(value, str) and value:
+            return self.get_random_lowercase_string(length=len(value))
+        if isinstance(value, list):
+            return [self.anonymise_value(item) for item in value]
+        return value
+
+    def process_object(self, obj):
+        obj.form_data = {
+            name: self.anonymise_value(value) for name, value in obj.form_data.items()
+        }
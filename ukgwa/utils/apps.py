@@ -5,3 +5,8 @@ class UtilsConfig(AppConfig):
     default_auto_field = "django.db.models.AutoField"
     name = "ukgwa.utils"
     label = "utils"
+
+    def ready(self):
+        from .signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
@@ -1,16 +1,262 @@
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.views.decorators.cache import cache_control
 
-from wagtail.contrib.frontend_cache.utils import purge_url_from_cache
-from wagtail.models import Site
+from wagtail.contrib.frontend_cache.utils import (
+    PurgeBatch,
+    get_backends,
+    purge_urls_from_cache,
+)
+from wagtail.embeds.embeds import get_embed_hash
+from wagtail.models import Page, ReferenceIndex, Site
+
+from .tasks import purge_site_urls_from_cache_task, purge_tags_from_cache_task
+
+# Response header used by Cloudflare to associate cached responses with
+# surrogate keys, so that they can later be purged by tag.
+# https://developers.cloudflare.com/cache/how-to/purge-cache/purge-by-tags/
+CACHE_TAG_HEADER = "Cache-Tag"
+
+
+def get_cache_tag(obj):
+    """
+    Return the surrogate key (cache tag) used for `obj` in `Cache-Tag` headers.
+
+    All pages share the "page" prefix regardless of their specific type, so that
+    references to a page via a plain `Page` instance produce the same tag.
+    """
+    if isinstance(obj, str):
+        return obj
+    return get_model_cache_tag(type(obj), obj.pk)
+
+
+def get_model_cache_tag(model, pk):
+    """
+    Return the cache tag of the `model` instance with primary key `pk`.
+
+    Prefer this to instantiating the model just to get its tag, which runs a
+    query for models with a callable default, such as an image's collection.
+    """
+    if issubclass(model, Page):
+        return f"page-{pk}"
+    if issubclass(model, Site):
+        return f"site-{pk}"
+    return f"{model._meta.label_lower}-{pk}"
+
+
+def get_children_cache_tag(page):
+    """
+    Return the cache tag of the listings of the children of `page` (or of the
+    page with that primary key), such as an index page or a sidebar, which
+    change when a child is published or unpublished.
+    """
+    pk = page.pk if isinstance(page, Page) else page
+    return f"page-{pk}-children"
+
+
+def get_embed_cache_tag(url, max_width=None, max_height=None):
+    """
+    Return the cache tag of the stored embed of `url`, which is known before
+    the embed has been fetched.
+    """
+    return f"embed-{get_embed_hash(url, max_width, max_height)}"
+
+
+def add_cache_tags(request, *objs):
+    """
+    Record that the response to `request` depends on each of `objs`.
+    Objects can be model instances or pre-built tag strings. `None` values are
+    ignored to make it easier to pass optional relations.
+    """
+    if request is None:
+        return
+
+    if not hasattr(request, "_cache_tags"):
+        request._cache_tags = set()
+
+    request._cache_tags.update(get_cache_tag(obj) for obj in objs if obj is not None)
+
+
+def get_cache_tags(request):
+    return getattr(request, "_cache_tags", set())
+
+
+def set_cache_tag_header(request, response):
+    """
+    Add the `Cache-Tag` header to `response`, listing every tag recorded for
+    `request`. Template responses are rendered lazily, so tags recorded by
+    template tags are only known once rendering has finished.
+    """
+
+    def _set_header(response):
+        if tags := get_cache_tags(request):
+            response[CACHE_TAG_HEADER] = ",".join(sorted(tags))
+        return response
+
+    if getattr(response, "is_rendered", True):
+        return _set_header(response)
+
+    response.add_post_render_callback(_set_header)
+    return response
+
+
+def _split_backends():
+    """
+    Return the names of configured front-end cache backends that can purge by
+    tag, and the names of those that can only purge by URL.
+    """
+    tag_backends, url_backends = [], []
+    for name, backend in get_backends().items():
+        if getattr(backend, "cache_tags_enabled", False):
+            tag_backends.append(name)
+        else:
+            url_backends.append(name)
+    return tag_backends, url_backends
+
+
+def get_referencing_pages(objects, max_depth=2):
+    """
+    Return live pages that reference any of `objects`, according to the
+    Wagtail reference index.
+
+    References from non-page objects (e.g. a snippet used on a page) are
+    followed up to `max_depth` levels, so that changing a page linked from a
+    call to action also finds the pages displaying that call to action.
+    """
+    page_content_type = ContentType.objects.get_for_model(Page)
+    page_ids = set()
+    seen = {(type(obj), obj.pk) for obj in objects}
+
+    for _ in range(max_depth):
+        if not objects:
+            break
+
+        references = ReferenceIndex.get_references_to_in_bulk(objects).values_list(
+            "base_content_type_id", "content_type_id", "object_id"
+        )
+        next_objects = []
+        non_page_ids = {}
+        for base_content_type_id, content_type_id, object_id in references:
+            if base_content_type_id == page_content_type.pk:
+                page_ids.add(int(object_id))
+            else:
+                non_page_ids.setdefault(content_type_id, set()).add(object_id)
+
+        for content_type_id, object_ids in non_page_ids.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model is None:
+                continue
+            for obj in model._default_manager.filter(pk__in=object_ids):
+                if (type(obj), obj.pk) not in seen:
+                    seen.add((type(obj), obj.pk))
+                    next_objects.append(obj)
+
+        objects = next_objects
+
+    return Page.objects.live().filter(pk__in=page_ids)
+
+
+def _get_parent_paths(objects):
+    return {
+        obj.path[: -obj.steplen]
+        for obj in objects
+        if isinstance(obj, Page) and obj.depth > 2
+    }
+
+
+def get_purge_tags(objects):
+    """
+    Return the cache tags to purge when `objects` change: their own, and those
+    of the listings of the parents of pages, which list them.
+    """
+    tags = {get_cache_tag(obj) for obj in objects}
+    if parent_paths := _get_parent_paths(objects):
+        tags.update(
+            get_children_cache_tag(pk)
+            for pk in Page.objects.filter(path__in=parent_paths).values_list(
+                "pk", flat=True
+            )
+        )
+    return sorted(tags)
+
+
+def purge_objects_from_cache(objects):
+    """
+    Purge every cached response that depends on `objects`.
+
+    Backends with cache tag support receive a single, deduplicated list of tags.
+    Other backends are sent the URLs of the affected pages, their parent pages
+    (which list them) and any page that references them, in batches. Both are
+    sent from tasks, which only run outside the editor's request with a task
+    backend that defers them.
+    """
+    if settings.DEBUG:
+        return
+
+    objects = [obj for obj in objects if obj is not None]
+    if not objects:
+        return
+
+    tag_backends, url_backends = _split_backends()
+
+    if tag_backends:
+        purge_tags_from_cache_task.enqueue(
+            get_purge_tags(objects), backends=tag_backends
+        )
+
+    if url_backends:
+        purge_object_urls_from_cache(objects, backends=url_backends)
+
+
+def purge_object_urls_from_cache(objects, backends=None):
+    """
+    Purge the URLs of `objects` (pages), their parent pages and the pages
+    referencing them from the front-end cache `backends`.
+
+    The URLs are worked out straight away, as a deleted page and the references
+    to it are gone once the transaction commits, and the purge task only
+    receives the URLs.
+    """
+    pages = [obj for obj in objects if isinstance(obj, Page)]
+
+    batch = PurgeBatch()
+    batch.add_pages(pages)
+    batch.add_pages(Page.objects.live().filter(path__in=_get_parent_paths(pages)))
+    batch.add_pages(get_referencing_pages(objects))
+    batch.purge(backends=backends)
+
+
+def purge_site_from_cache(site):
+    """
+    Purge every page on `site`. Used when a site-wide setting (e.g. navigation)
+    changes, as it is displayed on every page.
+    """
+    if settings.DEBUG:
+        return
+
+    tag_backends, url_backends = _split_backends()
+
+    if tag_backends:
+        purge_tags_from_cache_task.enqueue([get_cache_tag(site)], backends=tag_backends)
+
+    if url_backends:
+        # Every page of the site, so not in the editor's request
+        purge_site_urls_from_cache_task.enqueue(site.pk, backends=url_backends)
+
+
+def purge_site_urls_from_cache(site, backends=None):
+    batch = PurgeBatch()
+    batch.add_pages(Page.objects.live().descendant_of(site.root_page, inclusive=True))
+    batch.purge(backends=backends)
 
 
 def purge_cache_on_all_sites(path):
     if settings.DEBUG:
         return
 
-    for site in Site.objects.all():
-        purge_url_from_cache("{}{}".format(site.root_url.rstrip("/"), path))
+    purge_urls_from_cache(
+        {"{}{}".format(site.root_url.rstrip("/"), path) for site in Site.objects.all()}
+    )
 
 
 def get_default_cache_control_kwargs():
@@ -0,0 +1,175 @@
+"""
+Embeds (e.g. YouTube videos) resolved ahead of time.
+
+Wagtail fetches an embed's HTML and metadata from the provider's oEmbed
+endpoint the first time it's displayed, which blocks the request being served.
+Instead, the embeds of a page are fetched when it's published and stored in
+Wagtail's `Embed` model, and rendering only reads them from the database.
+
+Stale embeds (past the provider's `cache_age`, or older than a maximum age) are
+refreshed in the background by the `refresh_embeds` command, with a bounded
+number of requests to providers at a time. An embed which can't be fetched
+keeps its stored copy. Only the StreamField fragments displaying an embed whose
+stored copy changed are invalidated.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.apps import apps
+from django.db.models import Q
+from django.utils import timezone
+
+from wagtail.embeds.embeds import get_embed_hash, get_finder_for_embed
+from wagtail.embeds.models import Embed
+from wagtail.fields import StreamField
+from wagtail.models import Page
+
+from .cache import get_embed_cache_tag
+from .fragment_cache import invalidate_fragments
+from .page_cache import invalidate_page_cache
+from .streamfield import iter_embeds
+
+logger = logging.getLogger(__name__)
+
+EMBED_REFRESH_WORKERS = 4
+
+# The fields of an embed displayed by `ukgwa.core.blocks.EmbedBlock`
+DISPLAYED_EMBED_FIELDS = ["html", "thumbnail_url", "provider_name", "width", "height"]
+
+
+def get_stored_embed(url, max_width=None, max_height=None):
+    """
+    Return the stored embed for `url`, even if it's stale, or `None` if it
+    hasn't been fetched yet. The provider is never contacted.
+    """
+    return Embed.objects.filter(hash=get_embed_hash(url, max_width, max_height)).first()
+
+
+def get_page_embeds(pages):
+    """
+    Return the set of `(url, max_width, max_height)` of the embeds displayed
+    by `pages` (specific page instances).
+    """
+    embeds = set()
+    for page in pages:
+        for field in page._meta.get_fields():
+            if not isinstance(field, StreamField):
+                continue
+
+            stream_value = getattr(page, field.name)
+            embeds.update(iter_embeds(stream_value.stream_block, stream_value.raw_data))
+    return embeds
+
+
+def get_all_embeds(batch_size=500):
+    """
+    Return the set of `(url, max_width, max_height)` of the embeds displayed
+    by any live page.
+    """
+    embeds = set()
+    for model in apps.get_models():
+        if not issubclass(model, Page) or model is Page:
+            continue
+
+        queryset = model.objects.live().exact_type(model)
+        embeds.update(get_page_embeds(queryset.iterator(chunk_size=batch_size)))
+    return embeds
+
+
+def get_embeds_to_refresh(embeds, max_age=None):
+    """
+    Return those of `embeds` which haven't been fetched yet, are past their
+    provider's `cache_until` or, with a `max_age` (a `timedelta`), were last
+    fetched longer ago than that.
+    """
+    embeds = {get_embed_hash(*embed): embed for embed in embeds}
+    now = timezone.now()
+    stale = Q(cache_until__lte=now)
+    if max_age is not None:
+        stale |= Q(last_updated__lte=now - max_age)
+
+    fresh = set(
+        Embed.objects.filter(hash__in=embeds)
+        .exclude(stale)
+        .values_list("hash", flat=True)
+    )
+    return [embed for embed_hash, embed in embeds.items() if embed_hash not in fresh]
+
+
+def _find_embed(embed):
+    try:
+        return embed, get_finder_for_embed(*embed), None
+    except Exception as e:
+        # Whatever the finder raises, the stored copy (if any) is kept
+        return embed, None, e
+
+
+def _store_embed(url, max_width, max_height, embed_dict):
+    """
+    Store the result of a finder, like `wagtail.embeds.embeds.get_embed` does.
+    Return whether what's displayed of the embed changed, or it's new.
+    """
+    for field in ["width", "height"]:
+        try:
+            embed_dict[field] = int(embed_dict[field])
+        except (KeyError, TypeError, ValueError):
+            embed_dict[field] = None
+
+    embed_dict["html"] = embed_dict.get("html") or ""
+    embed_dict["thumbnail_url"] = embed_dict.get("thumbnail_url") or ""
+    # Don't keep the expiry date of the previous copy
+    embed_dict.setdefault("cache_until", None)
+
+    embed_hash = get_embed_hash(url, max_width, max_height)
+    previous = (
+        Embed.objects.filter(hash=embed_hash).values(*DISPLAYED_EMBED_FIELDS).first()
+    )
+    Embed.objects.update_or_create(
+        hash=embed_hash,
+        defaults=dict(url=url, max_width=max_width, **embed_dict),
+    )
+    return previous is None or any(
+        field in embed_dict and embed_dict[field] != previous[field]
+        for field in DISPLAYED_EMBED_FIELDS
+    )
+
+
+def refresh_embeds(embeds, workers=EMBED_REFRESH_WORKERS):
+    """
+    Fetch `embeds` (`(url, max_width, max_height)` tuples) from their
+    providers, `workers` at a time, and store them.
+
+    Yield `(embed, error)` as each of them is done, `error` being `None` if
+    the embed was stored.
+
+    Only the requests to providers are made in the worker threads, the
+    results are stored by the calling thread.
+    """
+    changed = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_find_embed, embed) for embed in embeds]
+            for future in as_completed(futures):
+                embed, embed_dict, error = future.result()
+                if error is None and _store_embed(*embed, embed_dict):
+                    changed.append(embed)
+                yield embed, error
+    finally:
+        if changed:
+            # Fragments rendered without the new copies. Page cache entries
+            # aren't stored per page, so they're all invalidated.
+            invalidate_fragments(*(get_embed_cache_tag(*embed) for embed in changed))
+            invalidate_page_cache()
+
+
+def fetch_page_embeds(page):
+    """
+    Fetch the embeds displayed by `page` which haven't been fetched yet or are
+    stale, e.g. when it's published.
+    """
+    for (url, *_), error in refresh_embeds(
+        get_embeds_to_refresh(get_page_embeds([page]))
+    ):
+        if error is not None:
+            logger.warning("Unable to fetch embed %s: %r", url, error)
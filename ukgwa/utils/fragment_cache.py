@@ -0,0 +1,207 @@
+"""
+Cache of rendered StreamField blocks.
+
+The HTML of each top-level block of a live page's StreamField is cached, keyed
+by the page's live revision and the block's ID, so rendering the page again
+doesn't convert the block's value (which may query pages, snippets and images)
+or render its template.
+
+The pages, snippets, images and embeds a block references are worked out from
+its raw data. Each of them has a version number in the cache, which is included
+in the fragment's key and bumped when the object, or a snippet it's displayed
+through, changes. Editing a call to action snippet only invalidates the
+fragments displaying it, for example.
+
+Fragments are keyed by their content rather than the URL they're displayed at,
+so they're shared between pages and used whether the page cache is enabled or
+not. The key also includes `RELEASE_VERSION`, so fragments rendered with the
+templates of a previous release aren't used after a deploy.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+from wagtail.blocks import StreamValue
+from wagtail.models import Page, ReferenceIndex
+
+from .cache import (
+    add_cache_tags,
+    get_cache_tag,
+    get_embed_cache_tag,
+    get_model_cache_tag,
+)
+from .instrumentation import timed
+from .streamfield import iter_chooser_ids, iter_embeds
+from .streamfield_prefetch import prefetch_stream_references
+
+FRAGMENT_CACHE_VERSION_KEY = "stream-fragment:version"
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _get_dependency_key(tag):
+    return f"stream-fragment-dependency:{tag}"
+
+
+def _bump(key, initial):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The version key doesn't exist (yet)
+        cache.set(key, initial, timeout=None)
+
+
+def _get_referencing_object_tags(objs):
+    """
+    Yield the cache tags of the non-page objects referencing any of `objs`
+    according to the reference index, e.g. a call to action displaying an
+    image or linking to a page.
+    """
+    references = (
+        ReferenceIndex.get_references_to_in_bulk(objs)
+        .exclude(base_content_type=ContentType.objects.get_for_model(Page))
+        .values_list("content_type_id", "object_id")
+        .distinct()
+    )
+    for content_type_id, object_id in references:
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is not None:
+            yield get_model_cache_tag(model, object_id)
+
+
+def invalidate_fragments(*objs):
+    """
+    Invalidate the fragments displaying any of `objs`, directly or through a
+    snippet referencing them. Objects can also be cache tags, e.g. of an embed.
+    """
+    tags = {get_cache_tag(obj) for obj in objs}
+    if instances := [obj for obj in objs if not isinstance(obj, str)]:
+        tags.update(_get_referencing_object_tags(instances))
+    for tag in tags:
+        _bump(_get_dependency_key(tag), 1)
+
+
+def invalidate_all_fragments():
+    _bump(FRAGMENT_CACHE_VERSION_KEY, 2)
+
+
+class CachedStreamChild:
+    """
+    A block of a `StreamValue`, whose value is only converted from the raw
+    data if its HTML isn't cached.
+    """
+
+    def __init__(self, stream_value, index):
+        raw_data = stream_value.raw_data[index]
+        self.stream_value = stream_value
+        self.index = index
+        self.block_type = raw_data["type"]
+        self.id = raw_data.get("id")
+        self.raw_value = raw_data.get("value")
+        self.cache_key = None
+        self.html = None
+
+    @cached_property
+    def dependencies(self):
+        """
+        Return the cache tags of the objects and embeds displayed by the block.
+        """
+        block = self.stream_value.stream_block.child_blocks[self.block_type]
+        return sorted(
+            {
+                get_model_cache_tag(model, pk)
+                for model, pk in iter_chooser_ids(block, self.raw_value)
+            }
+            | {
+                get_embed_cache_tag(*embed)
+                for embed in iter_embeds(block, self.raw_value)
+            }
+        )
+
+    @cached_property
+    def child(self):
+        return self.stream_value[self.index]
+
+
+def _get_fragment_key(revision_id, stream_child, versions):
+    dependencies = ",".join(
+        f"{tag}={versions.get(_get_dependency_key(tag), 0)}"
+        for tag in stream_child.dependencies
+    )
+    return "stream-fragment:{}:{}:{}:{}:{}".format(
+        settings.RELEASE_VERSION,
+        versions.get(FRAGMENT_CACHE_VERSION_KEY, 1),
+        revision_id,
+        stream_child.id,
+        hashlib.md5(dependencies.encode(), usedforsecurity=False).hexdigest(),
+    )
+
+
+def get_stream_children(stream_value, revision_id=None, request=None):
+    """
+    Return a `CachedStreamChild` for each block of `stream_value`, with the
+    HTML of any cached block, using two cache round trips for the whole
+    stream. The objects referenced by the other blocks are loaded in bulk,
+    and the renditions they display prefetched for `request`.
+
+    Without a `revision_id` (e.g. for previews), nothing is cached.
+    """
+    if not isinstance(stream_value, StreamValue):
+        # e.g. in the pattern library
+        return stream_value
+
+    children = [
+        CachedStreamChild(stream_value, index)
+        for index in range(len(stream_value.raw_data))
+    ]
+    if revision_id:
+        cacheable = [child for child in children if child.id]
+        dependency_keys = {
+            _get_dependency_key(tag)
+            for child in cacheable
+            for tag in child.dependencies
+        }
+        with timed("cache"):
+            versions = cache.get_many([FRAGMENT_CACHE_VERSION_KEY, *dependency_keys])
+
+        for child in cacheable:
+            child.cache_key = _get_fragment_key(revision_id, child, versions)
+        with timed("cache"):
+            fragments = cache.get_many([child.cache_key for child in cacheable])
+        for child in cacheable:
+            child.html = fragments.get(child.cache_key)
+
+    # Imported here, as `ukgwa.images.renditions` imports this module (through
+    # the blocks)
+    from ukgwa.images.renditions import prefetch_stream_renditions
+
+    # Load what the blocks to render reference in bulk
+    missing = [child.index for child in children if child.html is None]
+    if missing:
+        prefetch_stream_references(stream_value, missing)
+        prefetch_stream_renditions(request, stream_value, missing)
+    return children
+
+
+def render_stream_child(stream_child, context):
+    """
+    Render `stream_child` with the template `context`, from the cache if
+    possible, and cache the result.
+    """
+    if not isinstance(stream_child, CachedStreamChild):
+        return stream_child.render_as_block(context=context.flatten())
+
+    # The response still depends on the referenced objects, e.g. for purging
+    # the front-end cache.
+    add_cache_tags(context.get("request"), *stream_child.dependencies)
+
+    if stream_child.html is not None:
+        return stream_child.html
+
+    html = stream_child.child.render_as_block(context=context.flatten())
+    if stream_child.cache_key:
+        cache.set(stream_child.cache_key, html, timeout=FRAGMENT_CACHE_TIMEOUT)
+    return html
@@ -0,0 +1,66 @@
+import logging
+
+from wagtail.contrib.frontend_cache.backends import (
+    CloudflareBackend as WagtailCloudflareBackend,
+)
+
+import requests
+
+logger = logging.getLogger("wagtail.frontendcache")
+
+
+class CloudflareBackend(WagtailCloudflareBackend):
+    """
+    Cloudflare front-end cache backend which can also purge by cache tag.
+
+    Purging by tag is only available on Cloudflare Enterprise zones, so it has
+    to be enabled explicitly with the `CACHE_TAGS` option. When disabled, this
+    behaves exactly like Wagtail's backend and only purges by URL.
+    """
+
+    # Cloudflare accepts up to 30 tags per purge_cache call.
+    TAG_CHUNK_SIZE = 30
+
+    def __init__(self, params):
+        self.cache_tags_enabled = params.pop("CACHE_TAGS", False)
+        super().__init__(params)
+
+    def _get_headers(self):
+        headers = {"Content-Type": "application/json"}
+
+        if self.cloudflare_token:
+            headers["Authorization"] = f"Bearer {self.cloudflare_token}"
+        else:
+            headers["X-Auth-Email"] = self.cloudflare_email
+            headers["X-Auth-Key"] = self.cloudflare_api_key
+
+        return headers
+
+    def _purge_tags(self, tags):
+        try:
+            response = requests.post(
+                self.cloudflare_purge_endpoint_url,
+                json={"tags": tags},
+                headers=self._get_headers(),
+            )
+            response.raise_for_status()
+            response_json = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            logger.exception("Couldn't purge tags %s from Cloudflare.", tags)
+            return
+
+        if response_json["success"] is False:
+            error_messages = ", ".join(
+                str(err["message"]) for err in response_json["errors"]
+            )
+            logger.error(
+                "Couldn't purge tags %s from Cloudflare. Cloudflare errors '%s'",
+                tags,
+                error_messages,
+            )
+
+    def purge_tags(self, tags):
+        tags = sorted(set(tags))
+        for start in range(0, len(tags), self.TAG_CHUNK_SIZE):
+            end = start + self.TAG_CHUNK_SIZE
+            self._purge_tags(tags[start:end])
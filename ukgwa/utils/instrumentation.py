@@ -0,0 +1,352 @@
+"""
+Timing of the hot paths of serving a request.
+
+`InstrumentationMiddleware` times the whole request, every SQL query and the
+stages wrapped in `timed`: rendering templates, fetching renditions, the
+`responsive_image`, reading time and navigation template tags, embeds, site
+settings and cache lookups. Each stage is totalled over the request. Stages
+can be nested, e.g. the SQL queries run while rendering the navigation count
+towards both "sql" and "navigation".
+
+The timings are:
+
+- sent in a `Server-Timing` header to staff users (or everyone with `DEBUG`),
+  which browsers display in their developer tools;
+- added to histograms per route and stage, kept by each worker process. They
+  are logged as JSON every `INSTRUMENTATION_LOG_INTERVAL` seconds, and the
+  `metrics` view exports them in the Prometheus text format.
+
+Nothing is timed unless `INSTRUMENTATION_ENABLED` is set.
+
+The timings of the current request are kept in a context variable, so they
+follow the request between the event loop and the threads running its
+synchronous code under ASGI. For the same reason, queries are timed by a
+wrapper installed on every database connection as it's opened (see
+`install_query_timer`), rather than on the connection of the thread the
+middleware runs in.
+"""
+
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+# Upper bounds of the histogram buckets, in seconds
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def is_instrumentation_enabled():
+    return getattr(settings, "INSTRUMENTATION_ENABLED", False)
+
+
+class RequestTimings:
+    """
+    The total duration and number of calls of each stage of a request.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = None
+        self.route = None
+        # Stage name -> [duration in seconds, number of calls]
+        self.stages = {}
+
+    def add(self, name, duration):
+        stage = self.stages.setdefault(name, [0.0, 0])
+        stage[0] += duration
+        stage[1] += 1
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+    def get_server_timing(self):
+        metrics = [
+            f'{name};dur={duration * 1000:.1f};desc="{count} calls"'
+            for name, (duration, count) in self.stages.items()
+        ]
+        metrics.append(f"total;dur={self.duration * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def get_request_timings():
+    """
+    Return the `RequestTimings` of the current request, or `None` when it
+    isn't instrumented.
+    """
+    return _request_timings.get()
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in the block (or decorated function) to the `name`
+    stage of the current request, if it's instrumented.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def set_route(name):
+    """
+    Record the current request against `name` (e.g. a page type) rather than
+    the URL pattern it matched.
+    """
+    if timings := _request_timings.get():
+        timings.route = name
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed("sql"):
+        return execute(sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Time the queries of `connection` during instrumented requests. Connected
+    to `connection_created`.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class Histogram:
+    def __init__(self):
+        # The last bucket counts the values above every bound
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_buckets(self):
+        """
+        Return `(upper bound, number of values <= upper bound)` pairs, the
+        last bound being infinity.
+        """
+        cumulative = []
+        total = 0
+        for bound, count in zip((*HISTOGRAM_BUCKETS, float("inf")), self.buckets):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+
+class RouteHistograms:
+    """
+    A thread-safe histogram of the time spent in each stage, per route.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, timings):
+        values = {"total": timings.duration}
+        values.update(
+            (name, duration) for name, (duration, count) in timings.stages.items()
+        )
+        with self._lock:
+            for stage, value in values.items():
+                key = (timings.route, stage)
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram()
+                self._histograms[key].observe(value)
+
+    def pop(self):
+        """
+        Return the histograms, keyed by `(route, stage)`, and start afresh.
+        """
+        with self._lock:
+            histograms, self._histograms = self._histograms, {}
+        return histograms
+
+    def copy(self):
+        with self._lock:
+            return dict(self._histograms)
+
+
+# Since the worker process started, for the metrics endpoint
+histograms = RouteHistograms()
+# Since they were last logged
+_log_histograms = RouteHistograms()
+_last_logged = time.monotonic()
+_log_lock = threading.Lock()
+
+
+def log_histograms():
+    """
+    Log the histograms recorded since they were last logged, as one line of
+    JSON.
+    """
+    global _last_logged
+
+    with _log_lock:
+        now = time.monotonic()
+        interval = now - _last_logged
+        _last_logged = now
+        recorded = _log_histograms.pop()
+
+    if not recorded:
+        return
+
+    routes = {}
+    for (route, stage), histogram in sorted(recorded.items()):
+        routes.setdefault(route, {})[stage] = {
+            "count": histogram.count,
+            "sum": round(histogram.sum, 6),
+            "buckets": {
+                "+Inf" if bound == float("inf") else str(bound): count
+                for bound, count in histogram.get_cumulative_buckets()
+            },
+        }
+    logger.info(
+        json.dumps(
+            {
+                "event": "request_timings",
+                "pid": os.getpid(),
+                "interval": round(interval, 3),
+                "routes": routes,
+            }
+        )
+    )
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def get_prometheus_metrics():
+    """
+    Return the histograms of this worker process in the Prometheus text
+    exposition format.
+    """
+    lines = [
+        "# HELP ukgwa_request_stage_seconds Time spent in each stage of requests.",
+        "# TYPE ukgwa_request_stage_seconds histogram",
+    ]
+    for (route, stage), histogram in sorted(histograms.copy().items()):
+        labels = f'route="{_escape_label(route)}",stage="{_escape_label(stage)}"'
+        for bound, count in histogram.get_cumulative_buckets():
+            le = "+Inf" if bound == float("inf") else str(bound)
+            lines.append(
+                f'ukgwa_request_stage_seconds_bucket{{{labels},le="{le}"}} {count}'
+            )
+        lines.append(f"ukgwa_request_stage_seconds_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"ukgwa_request_stage_seconds_count{{{labels}}} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def get_route(request, response):
+    """
+    Return the name to record `request` against: the route set during the
+    request (see `set_route`), or the name of the view it was resolved to.
+    Not found responses are grouped together, as they could be any URL.
+    """
+    if response.status_code == 404:
+        return "not-found"
+
+    if timings := _request_timings.get():
+        if timings.route:
+            return timings.route
+
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return "unresolved"
+    return resolver_match.view_name or resolver_match.route
+
+
+def can_see_server_timing(request):
+    if settings.DEBUG:
+        return True
+    user = getattr(request, "user", None)
+    return user is not None and user.is_staff
+
+
+class InstrumentationMiddleware:
+    """
+    Time each request, its SQL queries and the stages wrapped in `timed`,
+    report them in the `Server-Timing` header to staff and record them in the
+    route histograms.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not is_instrumentation_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        try:
+            response = self.get_response(request)
+            timings.finish()
+            timings.route = get_route(request, response)
+        finally:
+            _request_timings.reset(token)
+
+        if can_see_server_timing(request):
+            response[SERVER_TIMING_HEADER] = timings.get_server_timing()
+        self.record(timings)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+            timings.finish()
+            timings.route = get_route(request, response)
+        finally:
+            _request_timings.reset(token)
+
+        # Loading the user may query the database
+        if await sync_to_async(can_see_server_timing)(request):
+            response[SERVER_TIMING_HEADER] = timings.get_server_timing()
+        self.record(timings)
+        return response
+
+    def record(self, timings):
+        histograms.observe(timings)
+        _log_histograms.observe(timings)
+        log_interval = settings.INSTRUMENTATION_LOG_INTERVAL
+        if log_interval and time.monotonic() - _last_logged >= log_interval:
+            log_histograms()
+
+    def process_template_response(self, request, response):
+        # Template responses are rendered once every middleware has returned
+        response.render = timed("render")(response.render)
+        return response
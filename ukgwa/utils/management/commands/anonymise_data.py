@@ -0,0 +1,97 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from birdbath.models import Execution
+from birdbath.settings import BIRDBATH_CHECKS, BIRDBATH_PROCESSORS
+
+from ukgwa.utils.anonymisation import BatchAnonymiser, get_checkpoint, run_in_batches
+from ukgwa.utils.models import AnonymisationCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the BIRDBATH_PROCESSORS, anonymising data in batches. Run it again "
+        "to resume an interrupted run."
+    )
+    # Birdbath's system check fails until the data has been anonymised
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--skip-checks",
+            action="store_true",
+            help="Skip the BIRDBATH_CHECKS, e.g. that this isn't production.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Run every processor from the start, ignoring previous runs.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of objects saved at a time, rather than each "
+            "processor's default.",
+        )
+        parser.add_argument(
+            "--progress-interval",
+            type=int,
+            default=10000,
+            help="Report progress every this number of objects.",
+        )
+
+    def handle(
+        self, *args, skip_checks, restart, batch_size, progress_interval, **options
+    ):
+        if not skip_checks:
+            for check_path in BIRDBATH_CHECKS:
+                if not import_string(check_path)().check():
+                    raise CommandError(
+                        f"Check {check_path} failed. Refusing to run processors."
+                    )
+
+        if restart:
+            AnonymisationCheckpoint.objects.all().delete()
+
+        for processor_path in BIRDBATH_PROCESSORS:
+            processor = import_string(processor_path)()
+            start = time.perf_counter()
+            try:
+                if isinstance(processor, BatchAnonymiser):
+                    if batch_size:
+                        processor.batch_size = batch_size
+                    self.run_batches(processor_path, processor, progress_interval)
+                else:
+                    with transaction.atomic():
+                        processor.run()
+            except Exception as e:
+                raise CommandError(
+                    f"{processor_path} failed: {e}. Run the command again to resume."
+                ) from e
+            self.stdout.write(
+                f"{processor_path}: done in {time.perf_counter() - start:.1f}s"
+            )
+
+        # Like `run_birdbath`, for birdbath's system check
+        Execution.objects.create()
+        self.stdout.write("Processing completed")
+
+    def run_batches(self, processor_path, processor, progress_interval):
+        checkpoint = get_checkpoint(processor)
+        if checkpoint.completed_at is not None:
+            self.stdout.write(f"{processor_path}: already done")
+            return
+        if checkpoint.last_pk is not None:
+            self.stdout.write(
+                f"{processor_path}: resuming after primary key {checkpoint.last_pk}"
+            )
+
+        count = 0
+        for batch_count in run_in_batches(processor, checkpoint):
+            if (count + batch_count) // progress_interval > count // progress_interval:
+                self.stdout.write(f"{processor_path}: {count + batch_count} objects")
+            count += batch_count
+        self.stdout.write(f"{processor_path}: {count} objects anonymised")
@@ -0,0 +1,50 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from ukgwa.core.models import ReadingTimeMixin
+
+
+class Command(BaseCommand):
+    help = "Calculate and store the reading time of all existing pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of pages loaded and updated at a time.",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        for model in apps.get_models():
+            if not issubclass(model, ReadingTimeMixin):
+                continue
+
+            # Only load the fields needed to calculate the reading time
+            queryset = model.objects.only(
+                "pk", "reading_time", *model.reading_time_fields
+            ).order_by("pk")
+
+            updated = 0
+            batch = []
+            for page in queryset.iterator(chunk_size=batch_size):
+                reading_time = page.calculate_reading_time()
+                if reading_time != page.reading_time:
+                    page.reading_time = reading_time
+                    batch.append(page)
+
+                if len(batch) >= batch_size:
+                    updated += self.update(model, batch)
+                    batch = []
+
+            updated += self.update(model, batch)
+            self.stdout.write(
+                f"Updated the reading time of {updated} {model._meta.verbose_name_plural}."
+            )
+
+    def update(self, model, pages):
+        if not pages:
+            return 0
+
+        model.objects.bulk_update(pages, ["reading_time"])
+        return len(pages)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from wagtail.models import Site
+
+from ukgwa.utils.sitemaps import generate_sitemaps
+
+
+class Command(BaseCommand):
+    help = "Generate the sitemap index and shards of every site ahead of time."
+
+    def handle(self, *args, **options):
+        for site in Site.objects.select_related("root_page"):
+            count = generate_sitemaps(site)
+            self.stdout.write(f"Generated {count} sitemap shards for {site}.")
@@ -0,0 +1,112 @@
+import itertools
+import math
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+
+def percentile(sorted_values, percent):
+    """
+    Return the `percent` percentile of `sorted_values` (nearest rank).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def request_url(url, timeout):
+    """
+    Request `url` and return the status code (or `None` if the request
+    failed) and the time taken, in seconds.
+    """
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError, ConnectionError):
+        status = None
+    return status, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        "Request URLs of a running server concurrently and report the throughput "
+        "and latency percentiles, e.g. to compare the WSGI and ASGI server modes. "
+        "See docs/server-modes.md."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls",
+            nargs="+",
+            help="URLs to request, in turn.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Number of requests made at the same time.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Total number of requests to make.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=20,
+            help="Number of requests made before measuring, to fill caches.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Number of seconds after which a request has failed.",
+        )
+
+    def handle(self, *args, urls, concurrency, requests, warmup, timeout, **options):
+        for url in itertools.islice(itertools.cycle(urls), warmup):
+            request_url(url, timeout)
+
+        # Each thread takes the next URL until enough requests have been made
+        url_iterator = itertools.islice(itertools.cycle(urls), requests)
+
+        def worker():
+            results = []
+            for url in url_iterator:
+                results.append(request_url(url, timeout))
+            return results
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(worker) for _ in range(concurrency)]
+            results = [result for future in futures for result in future.result()]
+        elapsed = time.perf_counter() - start
+
+        errors = sum(
+            1 for status, duration in results if status is None or status >= 500
+        )
+        durations = sorted(duration for status, duration in results)
+
+        self.stdout.write(
+            f"{len(results)} requests in {elapsed:.2f}s with {concurrency} "
+            f"concurrent requests, {errors} errors"
+        )
+        self.stdout.write(f"Throughput: {len(results) / elapsed:.1f} requests/s")
+        self.stdout.write(
+            "Latency: "
+            + ", ".join(
+                f"p{percent} {percentile(durations, percent) * 1000:.0f}ms"
+                for percent in (50, 90, 99)
+            )
+            + f", max {durations[-1] * 1000 if durations else 0:.0f}ms"
+        )
@@ -0,0 +1,105 @@
+import subprocess
+import sys
+from collections import Counter
+from typing import NamedTuple
+
+from django.core.management.base import BaseCommand
+
+SETUP_SCRIPT = """
+import django
+django.setup()
+"""
+
+URLS_SCRIPT = """
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+
+class ImportTime(NamedTuple):
+    module: str
+    # Microseconds spent importing the module itself, and with its imports
+    self_time: int
+    cumulative_time: int
+
+
+def parse_import_times(output):
+    """
+    Return the `ImportTime` of every module listed in the output of
+    `python -X importtime`.
+    """
+    import_times = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        times = line.removeprefix("import time:")
+        self_time, cumulative_time, module = times.split("|")
+        if not self_time.strip().isdigit():
+            # The header
+            continue
+        import_times.append(
+            ImportTime(module.strip(), int(self_time), int(cumulative_time))
+        )
+    return import_times
+
+
+def get_package_times(import_times):
+    """
+    Return the time spent importing each top-level package, heaviest first.
+    """
+    package_times = Counter()
+    for import_time in import_times:
+        package_times[import_time.module.split(".")[0]] += import_time.self_time
+    return package_times.most_common()
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the time spent importing modules while setting up Django in a new "
+        "process, per package and for the slowest modules."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of packages and modules listed.",
+        )
+        parser.add_argument(
+            "--urls",
+            action="store_true",
+            help="Also import the URLconf, as the first request does.",
+        )
+
+    def handle(self, *args, limit, urls, **options):
+        script = SETUP_SCRIPT + (URLS_SCRIPT if urls else "")
+        # The settings module is inherited from the environment
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        import_times = parse_import_times(result.stderr)
+        total = sum(import_time.self_time for import_time in import_times)
+
+        self.stdout.write(
+            f"Imported {len(import_times)} modules in {total / 1000:.0f}ms"
+        )
+
+        self.stdout.write("\nPackages:")
+        for package, package_time in get_package_times(import_times)[:limit]:
+            self.stdout.write(
+                f"{package_time / 1000:>8.1f}ms {package_time / total:>6.1%}  {package}"
+            )
+
+        self.stdout.write("\nModules (self, cumulative):")
+        slowest = sorted(
+            import_times, key=lambda import_time: import_time.self_time, reverse=True
+        )
+        for import_time in slowest[:limit]:
+            self.stdout.write(
+                f"{import_time.self_time / 1000:>8.1f}ms "
+                f"{import_time.cumulative_time / 1000:>8.1f}ms  {import_time.module}"
+            )
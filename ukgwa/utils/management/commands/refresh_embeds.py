@@ -0,0 +1,56 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from ukgwa.utils.embeds import (
+    EMBED_REFRESH_WORKERS,
+    get_all_embeds,
+    get_embeds_to_refresh,
+    refresh_embeds,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch the embeds displayed on live pages which haven't been fetched yet "
+        "or are stale, so that rendering pages never waits for a provider. "
+        "Embeds which can't be fetched keep their stored copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=EMBED_REFRESH_WORKERS,
+            help="Number of requests made to providers in parallel.",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=7,
+            help="Refresh embeds fetched more than this number of days ago, even "
+            "if their provider's cache age hasn't passed.",
+        )
+
+    def handle(self, *args, workers, max_age, **options):
+        embeds = get_embeds_to_refresh(
+            get_all_embeds(), max_age=datetime.timedelta(days=max_age)
+        )
+        self.stdout.write(f"Refreshing {len(embeds)} embeds.")
+
+        start = time.monotonic()
+        refreshed = errors = 0
+        for (url, *_), error in refresh_embeds(embeds, workers=workers):
+            if error is None:
+                refreshed += 1
+            else:
+                errors += 1
+                self.stderr.write(f"{url}: {type(error).__name__}: {error}")
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed {refreshed} embeds in {elapsed:.1f}s ({errors} errors)."
+            )
+        )
@@ -0,0 +1,79 @@
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from wagtail.models import Site
+
+from ukgwa.utils.warmup import warm_up
+
+# Times setting up Django in a new interpreter, as this one already has been
+SETUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import django
+django.setup()
+print(time.perf_counter() - start)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Report how long a new process takes to set up Django, to warm up and to "
+        "serve its first requests, e.g. to check the effect of the worker "
+        "warm-up. See ukgwa/utils/warmup.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            default=["/"],
+            help="Paths requested after warming up, twice each.",
+        )
+        parser.add_argument(
+            "--skip-warm-up",
+            action="store_true",
+            help="Serve the first requests without warming up, as a comparison.",
+        )
+        parser.add_argument(
+            "--host",
+            help="Host header of the requests (by default, the default site's).",
+        )
+
+    def handle(self, *args, paths, skip_warm_up, host, **options):
+        setup_time = float(
+            subprocess.run(
+                [sys.executable, "-c", SETUP_SCRIPT],
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout.splitlines()[-1]
+        )
+        self.stdout.write(f"Django set-up: {setup_time * 1000:.0f}ms")
+
+        if skip_warm_up:
+            self.stdout.write("Warm-up: skipped")
+        else:
+            report = warm_up()
+            duration = sum(stage["duration"] for stage in report.values())
+            self.stdout.write(f"Warm-up: {duration * 1000:.0f}ms")
+            for name, stage in report.items():
+                self.stdout.write(f"    {name}: {stage['duration'] * 1000:.0f}ms")
+
+        if host is None:
+            host = Site.objects.get(is_default_site=True).hostname
+        client = Client(HTTP_HOST=host)
+        self.stdout.write("Requests (first, then second):")
+        for path in paths:
+            durations = []
+            for _ in range(2):
+                start = time.perf_counter()
+                response = client.get(path)
+                durations.append(time.perf_counter() - start)
+            self.stdout.write(
+                f"    {path} ({response.status_code}): "
+                + ", ".join(f"{duration * 1000:.0f}ms" for duration in durations)
+            )
@@ -0,0 +1,110 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from wagtail.images import get_image_model
+
+from ukgwa.utils.s3_sync import S3_SYNC_WORKERS, sync_bucket
+
+ORIGINAL_IMAGES_PREFIX = "original_images/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the media of an S3 bucket to MEDIA_ROOT, skipping the files "
+        "already downloaded. Run it again to resume an interrupted sync. "
+        "Credentials are read from the environment, e.g. AWS_ACCESS_KEY_ID and "
+        "AWS_SECRET_ACCESS_KEY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("bucket", help="Name of the bucket.")
+        parser.add_argument(
+            "--originals-only",
+            action="store_true",
+            help="Only download the original images referenced in the database, "
+            "rather than every file (including renditions).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="",
+            help="Only download the files whose key starts with this prefix.",
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the local files (under the prefix) which weren't synced.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=S3_SYNC_WORKERS,
+            help="Number of files downloaded in parallel.",
+        )
+        parser.add_argument(
+            "--endpoint-url",
+            help="URL of the S3 API, e.g. of a local MinIO server.",
+        )
+        parser.add_argument(
+            "--progress-interval",
+            type=int,
+            default=500,
+            help="Report progress every this number of files.",
+        )
+
+    def handle(
+        self,
+        *args,
+        bucket,
+        originals_only,
+        prefix,
+        delete,
+        workers,
+        endpoint_url,
+        progress_interval,
+        **options,
+    ):
+        import boto3
+
+        keys = None
+        if originals_only:
+            prefix = ORIGINAL_IMAGES_PREFIX
+            keys = set(get_image_model().objects.values_list("file", flat=True))
+            self.stdout.write(f"Syncing the {len(keys)} original images.")
+
+        client = boto3.client("s3", endpoint_url=endpoint_url)
+        counts = {"downloaded": 0, "skipped": 0, "failed": 0}
+        downloaded_bytes = 0
+        start = time.perf_counter()
+
+        for result in sync_bucket(
+            client,
+            bucket,
+            settings.MEDIA_ROOT,
+            prefix=prefix,
+            keys=keys,
+            workers=workers,
+            delete=delete,
+        ):
+            counts[result.status] += 1
+            if result.status == "downloaded":
+                downloaded_bytes += result.obj.size
+            elif result.status == "failed":
+                self.stderr.write(f"Couldn't download {result.obj.key}: {result.error}")
+            if sum(counts.values()) % progress_interval == 0:
+                self.write_progress(counts, downloaded_bytes, start)
+
+        self.write_progress(counts, downloaded_bytes, start)
+        if counts["failed"]:
+            raise CommandError(
+                f"{counts['failed']} files couldn't be downloaded. Run the command "
+                "again to retry them."
+            )
+
+    def write_progress(self, counts, downloaded_bytes, start):
+        self.stdout.write(
+            f"{sum(counts.values())} files in {time.perf_counter() - start:.0f}s: "
+            f"{counts['downloaded']} downloaded ({downloaded_bytes / 1e6:.1f} MB), "
+            f"{counts['skipped']} already up to date, {counts['failed']} failed"
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="AnonymisationCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False
+                    ),
+                ),
+                ("processor", models.CharField(max_length=255, unique=True)),
+                ("last_pk", models.BigIntegerField(null=True)),
+                ("completed_at", models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
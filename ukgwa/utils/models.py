@@ -79,3 +79,18 @@ class LinkFields(models.Model):
             "Link",
         )
     ]
+
+
+class AnonymisationCheckpoint(models.Model):
+    """
+    How far an anonymisation processor got, so that an interrupted
+    `anonymise_data` command carries on from there (see
+    `ukgwa.utils.anonymisation`).
+    """
+
+    processor = models.CharField(max_length=255, unique=True)
+    last_pk = models.BigIntegerField(null=True)
+    completed_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return self.processor
@@ -0,0 +1,185 @@
+"""
+Server-side full-page cache for anonymous page requests.
+
+Rendered responses are stored in the default cache backend (Redis in
+production) and served without running the page's `get_context` or rendering
+any templates. Entries are keyed by site, path, normalised querystring and the
+request headers the public URLs vary on.
+
+All entries are invalidated at once by bumping a version number whenever
+content changes (see `invalidate_page_cache`), as navigation, settings and
+listings make most pages depend on most content.
+
+Entries become stale after `PAGE_CACHE_TIMEOUT` seconds, or when the version
+changes, but are kept for a further `PAGE_CACHE_STALE_TIMEOUT` seconds. Only
+one worker (the one holding a short-lived lock) regenerates a stale entry, the
+others keep serving the stale copy in the meantime.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .instrumentation import timed
+from .templatetags.querystring_modify import clean_querydict
+
+PAGE_CACHE_VERSION_KEY = "page-cache:version"
+PAGE_CACHE_HEADER = "X-Page-Cache"
+
+# Request headers the public URLs vary on (see `ukgwa/urls.py`). "Cookie" is
+# handled by bypassing the cache for requests carrying a session or messages.
+PAGE_CACHE_VARY_HEADERS = [
+    "HTTP_X_REQUESTED_WITH",
+    "HTTP_X_FORWARDED_PROTO",
+    "HTTP_ACCEPT_ENCODING",
+]
+
+# Response headers which are not stored with cache entries.
+PAGE_CACHE_EXCLUDED_HEADERS = {"set-cookie", "vary", "cache-control", "expires"}
+
+
+def is_page_cache_enabled():
+    return getattr(settings, "PAGE_CACHE_ENABLED", False)
+
+
+def is_request_cacheable(request):
+    """
+    Only anonymous, non-preview GET/HEAD requests without session or message
+    cookies can be served from or stored in the page cache.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+
+    if getattr(request, "is_preview", False):
+        return False
+
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+
+    if "messages" in request.COOKIES:
+        return False
+
+    user = getattr(request, "user", None)
+    return not (user and user.is_authenticated)
+
+
+def is_response_cacheable(response):
+    if response.status_code != 200 or response.streaming:
+        return False
+
+    if response.cookies:
+        return False
+
+    cache_control = response.get("Cache-Control", "")
+    return "private" not in cache_control and "no-cache" not in cache_control
+
+
+def get_page_cache_key(request, site):
+    querydict = request.GET.copy()
+    clean_querydict(querydict, remove_blanks=True)
+    querystring = "&".join(
+        f"{key}={value}"
+        for key, values in sorted(querydict.lists())
+        for value in sorted(values)
+    )
+    vary = "|".join(request.META.get(header, "") for header in PAGE_CACHE_VARY_HEADERS)
+    key_hash = hashlib.md5(
+        f"{request.path}?{querystring}#{vary}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"page-cache:{site.pk}:{key_hash}"
+
+
+def get_page_cache_version():
+    return cache.get_or_set(PAGE_CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_page_cache():
+    """
+    Invalidate every cached page. Existing entries are left to expire.
+    """
+    try:
+        cache.incr(PAGE_CACHE_VERSION_KEY)
+    except ValueError:
+        # The version key doesn't exist (yet)
+        cache.set(PAGE_CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def _response_from_entry(entry, status):
+    response = HttpResponse(entry["content"], status=entry["status"])
+    for header, value in entry["headers"]:
+        response[header] = value
+    response[PAGE_CACHE_HEADER] = status
+    return response
+
+
+def _entry_from_response(response, version):
+    return {
+        "version": version,
+        "expires": time.time() + settings.PAGE_CACHE_TIMEOUT,
+        "status": response.status_code,
+        "content": response.content,
+        "headers": [
+            (header, value)
+            for header, value in response.items()
+            if header.lower() not in PAGE_CACHE_EXCLUDED_HEADERS
+        ],
+    }
+
+
+def serve_from_page_cache(request, site, get_response, is_cacheable=None):
+    """
+    Return a response for `request` from the page cache, falling back to
+    calling `get_response` (and storing the result) on a miss.
+
+    `is_cacheable` is an optional callable which is only evaluated on a miss,
+    to check whether the page can be cached at all (e.g. it's not private).
+    """
+    if not is_page_cache_enabled() or not is_request_cacheable(request):
+        return get_response()
+
+    key = get_page_cache_key(request, site)
+    lock_key = f"{key}:lock"
+
+    with timed("cache"):
+        cached = cache.get_many([key, PAGE_CACHE_VERSION_KEY])
+    entry = cached.get(key)
+    version = cached.get(PAGE_CACHE_VERSION_KEY)
+    if version is None:
+        version = get_page_cache_version()
+
+    if entry is not None:
+        if entry["version"] == version and entry["expires"] > time.time():
+            return _response_from_entry(entry, "hit")
+
+        # Expired, or rendered before content changed (which invalidates every
+        # page at once). Stampede protection: only regenerate if nobody else
+        # already is, otherwise carry on serving the stale copy.
+        locked = cache.add(lock_key, 1, timeout=settings.PAGE_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            return _response_from_entry(entry, "stale")
+    else:
+        # Without a stale copy to serve, render the page even if another
+        # worker is already doing so.
+        locked = cache.add(lock_key, 1, timeout=settings.PAGE_CACHE_LOCK_TIMEOUT)
+
+    try:
+        response = get_response()
+        if hasattr(response, "render") and callable(response.render):
+            with timed("render"):
+                response = response.render()
+
+        if is_response_cacheable(response) and (is_cacheable is None or is_cacheable()):
+            cache.set(
+                key,
+                _entry_from_response(response, version),
+                timeout=settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE_TIMEOUT,
+            )
+            response[PAGE_CACHE_HEADER] = "miss"
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+    return response
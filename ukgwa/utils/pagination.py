@@ -0,0 +1,218 @@
+"""
+Keyset (seek) pagination.
+
+Rather than counting the items and skipping `OFFSET` rows for every page, the
+next page is fetched by seeking past the ordering values of the last item
+displayed, which are passed in the querystring as an opaque cursor. This keeps
+every page as cheap as the first, whatever the number of items.
+"""
+
+import base64
+import binascii
+import json
+import math
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# The range of a 64-bit integer column, the largest databases can bind
+MIN_INTEGER, MAX_INTEGER = -(2**63), 2**63 - 1
+
+
+def encode_cursor(values):
+    data = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _is_in_range(value):
+    """
+    Return whether `value` can be compared to a column in the database: floats
+    must be finite, and integers fit in 64 bits.
+    """
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, int):
+        return MIN_INTEGER <= value <= MAX_INTEGER
+    return True
+
+
+def decode_cursor(cursor, length):
+    """
+    Return the list of `length` values encoded in `cursor`, or `None` if it's
+    missing or invalid. Values are strings, finite floats or 64-bit integers.
+    """
+    if not cursor:
+        return None
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    if not all(isinstance(value, (str, int, float)) for value in values):
+        return None
+    if not all(_is_in_range(value) for value in values):
+        return None
+    return values
+
+
+class KeysetPage:
+    def __init__(self, paginator, object_list, number, has_previous, has_next):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def previous_page_number(self):
+        return self.number - 1
+
+    @property
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return self.paginator.get_cursor(self.object_list[0])
+        return None
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return self.paginator.get_cursor(self.object_list[-1])
+        return None
+
+
+class KeysetPaginator:
+    """
+    Paginate `queryset` in ascending order of the `ordering` fields, which must
+    end with a unique field (such as `pk`) so that every item has a distinct
+    position.
+
+    The total number of items is only used to display the number of pages, so
+    pass `count` if it's already known (e.g. cached) to avoid a `COUNT(*)`.
+    """
+
+    def __init__(self, queryset, per_page, ordering=("title", "pk"), count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count
+        return self.queryset.count()
+
+    @cached_property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def get_cursor(self, item):
+        return encode_cursor(getattr(item, field) for field in self.ordering)
+
+    def _get_field(self, name):
+        opts = self.queryset.model._meta
+        return opts.pk if name == "pk" else opts.get_field(name)
+
+    def _to_python(self, name, value):
+        field = self._get_field(name)
+        value = field.to_python(value)
+        # e.g. the range of integer fields in the database
+        field.run_validators(value)
+        return value
+
+    def _decode_cursor(self, cursor):
+        """
+        Return the ordering values encoded in `cursor`, converted to the types
+        of the ordering fields, or `None` if it's missing or invalid.
+        """
+        values = decode_cursor(cursor, len(self.ordering))
+        if values is None:
+            return None
+
+        try:
+            values = [
+                self._to_python(name, value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except FieldDoesNotExist:
+            # e.g. ordering by a related field, left to the database
+            return values
+        except (ValidationError, OverflowError, TypeError):
+            return None
+
+        # e.g. a float converted to an integer too large to bind
+        if not all(_is_in_range(value) for value in values):
+            return None
+        return values
+
+    def _seek(self, values, lookup):
+        """
+        Return a `Q` object matching the items after (`lookup="gt"`) or before
+        (`lookup="lt"`) the position given by `values`.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            equal = {name: value for name, value in zip(self.ordering[:i], values)}
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[i]})
+        return condition
+
+    def _validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return 1
+        return min(max(number, 1), self.num_pages)
+
+    def get_page(self, number=None, after=None, before=None):
+        """
+        Return the page following the `after` cursor or preceding the `before`
+        cursor. Without a valid cursor, fall back to `OFFSET` pagination using
+        the page `number`, e.g. for links made before cursors were used.
+
+        `number` is otherwise only used to display the current page number.
+        """
+        number = self._validate_number(number)
+        limit = self.per_page + 1
+
+        if (values := self._decode_cursor(after)) is not None:
+            queryset = self.queryset.filter(self._seek(values, "gt"))
+            items = list(queryset.order_by(*self.ordering)[:limit])
+            has_previous, has_next = True, len(items) > self.per_page
+            items = items[: self.per_page]
+
+        elif (values := self._decode_cursor(before)) is not None:
+            # Seek backwards, then put the items back in order
+            queryset = self.queryset.filter(self._seek(values, "lt"))
+            ordering = [f"-{field}" for field in self.ordering]
+            items = list(queryset.order_by(*ordering)[:limit])
+            has_previous, has_next = len(items) > self.per_page, True
+            items = items[: self.per_page][::-1]
+
+        else:
+            offset = (number - 1) * self.per_page
+            queryset = self.queryset.order_by(*self.ordering)
+            items = list(queryset[offset:][:limit])
+            has_previous, has_next = number > 1, len(items) > self.per_page
+            items = items[: self.per_page]
+
+        # Keep the displayed page number consistent with the items found
+        if not has_previous:
+            number = 1
+        elif not has_next:
+            number = self.num_pages
+
+        return KeysetPage(self, items, number, has_previous, has_next)
@@ -1,4 +1,5 @@
-from django.db.models import Case, IntegerField, QuerySet, When
+from django.db import connections, router, transaction
+from django.db.models import Case, F, Func, IntegerField, QuerySet, Value, When
 
 
 def order_by_pk_position(
@@ -12,6 +13,9 @@ def order_by_pk_position(
 
     Use the `exclude_non_matches` option to exclude items with
     a PK value not in `pks`.
+
+    This adds a branch to the query per PK, so prefer `fetch_in_pk_order`
+    when a list is suitable.
     """
     if exclude_non_matches:
         queryset = queryset.filter(pk__in=pks)
@@ -20,3 +24,97 @@ def order_by_pk_position(
     return queryset.annotate(
         pk_pos_order=Case(*cases, default=len(pks), output_field=IntegerField())
     ).order_by("pk_pos_order")
+
+
+def fetch_in_pk_order(queryset: QuerySet, pks: list | tuple) -> list:
+    """
+    Return a list of the items in `queryset` with a PK in `pks`, ordered
+    according to the PK's position in `pks`.
+
+    On PostgreSQL, the ordering is done by the database with
+    `array_position()`, which takes a single array parameter however many PKs
+    there are. Other databases fetch the items and reorder them in Python.
+    """
+    pks = list(dict.fromkeys(pks))
+    if not pks:
+        return []
+
+    queryset = queryset.filter(pk__in=pks)
+
+    if connections[queryset.db].vendor == "postgresql":
+        from django.contrib.postgres.fields import ArrayField
+
+        pk_field = queryset.model._meta.pk
+        # Multi-table inheritance PKs are relations to the parent's PK
+        pk_field = getattr(pk_field, "target_field", pk_field)
+        return list(
+            queryset.annotate(
+                pk_position=Func(
+                    Value(pks, output_field=ArrayField(pk_field)),
+                    F("pk"),
+                    function="array_position",
+                    output_field=IntegerField(),
+                )
+            ).order_by("pk_position")
+        )
+
+    items = {item.pk: item for item in queryset}
+    return [items[pk] for pk in pks if pk in items]
+
+
+def bulk_update_from_values(model, objs: list, fields: list) -> None:
+    """
+    Save the `fields` of `objs`, instances of `model`, like
+    `QuerySet.bulk_update()`.
+
+    `bulk_update()` adds a `CASE` branch per object and field, which for
+    thousands of objects is slow to build and to run. On PostgreSQL and
+    SQLite (3.33+), the values are instead joined to the table as a `VALUES`
+    list, in an `UPDATE ... FROM` query. Other databases use `bulk_update()`.
+    """
+    if not objs:
+        return
+
+    opts = model._meta
+    columns = [opts.pk, *(opts.get_field(name) for name in fields)]
+    connection = connections[router.db_for_write(model)]
+    if not (
+        connection.vendor == "postgresql"
+        or (
+            connection.vendor == "sqlite"
+            and connection.Database.sqlite_version_info >= (3, 33)
+        )
+    ) or any(field not in opts.local_concrete_fields for field in columns):
+        # e.g. fields of a parent model, in another table
+        model._default_manager.bulk_update(objs, fields)
+        return
+
+    quote_name = connection.ops.quote_name
+    table = quote_name(opts.db_table)
+    # The columns of a VALUES list are named column1, column2, etc.
+    assignments = ", ".join(
+        f"{quote_name(field.column)} = v.column{i}"
+        for i, field in enumerate(columns[1:], start=2)
+    )
+    # The casts give the values their column's type, e.g. for JSON
+    row = "({})".format(
+        ", ".join(f"CAST(%s AS {field.db_type(connection)})" for field in columns)
+    )
+
+    batch_size = connection.ops.bulk_batch_size(columns, objs)
+    with transaction.atomic(using=connection.alias, savepoint=False):
+        for start in range(0, len(objs), batch_size):
+            end = start + batch_size
+            batch = objs[start:end]
+            params = [
+                field.get_db_prep_save(getattr(obj, field.attname), connection)
+                for obj in batch
+                for field in columns
+            ]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET {assignments} "
+                    f"FROM (VALUES {', '.join([row] * len(batch))}) AS v "
+                    f"WHERE {table}.{quote_name(opts.pk.column)} = v.column1",
+                    params,
+                )
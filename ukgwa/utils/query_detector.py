@@ -0,0 +1,257 @@
+"""
+Detection of N+1 and slow queries.
+
+`QueryDetector` records the SQL queries run while it's active, along with
+where they were run from: the innermost template tags or variables being
+rendered (e.g. `components/card/card.html:12`) and functions of the project.
+Queries which only differ by their parameters are grouped together, and a
+group run `threshold` times or more from the same place is reported as a
+repeated query, usually a sign of an N+1 pattern, such as reading a foreign
+key or generating a page's URL for each item of a listing.
+
+The detector can be used directly, e.g. by the benchmarks:
+
+    with QueryDetector() as detector:
+        self.client.get("/")
+    detector.check()
+
+or on every request with `QueryDetectorMiddleware`, enabled with
+`QUERY_DETECTOR_ENABLED`. Problems are logged as warnings, or raise
+`RepeatedQueriesError` when `QUERY_DETECTOR_RAISE` is set (e.g. in tests).
+
+Active detectors are kept in a context variable, and queries are recorded by
+a wrapper installed on every database connection as it's opened (see
+`install_query_recorder`), so that a request's queries are recorded whichever
+thread runs them under ASGI.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import sys
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules of the project which are never the call site of a query, e.g. as
+# their execute wrappers are on the stack of every query.
+IGNORED_FILES = {__file__, instrumentation.__file__}
+
+# Number of template nodes and project functions identifying a call site
+CALL_SITE_DEPTH = 4
+
+_IN_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_active_detectors = contextvars.ContextVar("active_query_detectors", default=())
+
+
+class RepeatedQueriesError(Exception):
+    pass
+
+
+def normalize_sql(sql):
+    """
+    Return `sql` without its literal values, so that queries which only
+    differ by their parameters (including the length of `IN` lists) are
+    the same.
+    """
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def get_call_site(depth=CALL_SITE_DEPTH):
+    """
+    Return the innermost template nodes being rendered and functions of the
+    project on the current stack, as `path:line` strings.
+    """
+    call_site = []
+    frame = sys._getframe(1)
+    while frame is not None and len(call_site) < depth:
+        code = frame.f_code
+        if code.co_name == "render_annotated":
+            # Django's `Node.render_annotated`, wrapping every template node
+            node = frame.f_locals.get("self")
+            origin = getattr(node, "origin", None)
+            token = getattr(node, "token", None)
+            if origin is not None and token is not None:
+                name = origin.template_name or origin.name
+                call_site.append(f"{name}:{token.lineno}")
+        elif (
+            code.co_filename.startswith(PROJECT_DIR)
+            and code.co_filename not in IGNORED_FILES
+        ):
+            path = os.path.relpath(code.co_filename, os.path.dirname(PROJECT_DIR))
+            call_site.append(f"{path}:{frame.f_lineno} in {code.co_name}")
+        frame = frame.f_back
+    return tuple(call_site)
+
+
+def _record_query(execute, sql, params, many, context):
+    detectors = _active_detectors.get()
+    if not detectors:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        query = RecordedQuery(sql, get_call_site(), time.perf_counter() - start)
+        for detector in detectors:
+            detector.queries.append(query)
+
+
+def install_query_recorder(connection, **kwargs):
+    """
+    Record the queries of `connection` while a `QueryDetector` is active.
+    Connected to `connection_created`.
+    """
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class RecordedQuery(NamedTuple):
+    sql: str
+    call_site: tuple
+    # Seconds
+    duration: float
+
+
+class RepeatedQuery(NamedTuple):
+    # Normalised SQL
+    sql: str
+    call_site: tuple
+    count: int
+    # Total seconds
+    duration: float
+
+
+class QueryDetector:
+    """
+    Record the queries run while active, to report
+    those repeated `threshold` times or more from the same call site, and
+    those taking `slow_query_ms` milliseconds or more.
+    """
+
+    def __init__(self, threshold=None, slow_query_ms=None):
+        self.threshold = (
+            settings.QUERY_DETECTOR_THRESHOLD if threshold is None else threshold
+        )
+        self.slow_query_ms = (
+            settings.QUERY_DETECTOR_SLOW_QUERY_MS
+            if slow_query_ms is None
+            else slow_query_ms
+        )
+        self.queries = []
+
+    def __enter__(self):
+        self._token = _active_detectors.set((*_active_detectors.get(), self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active_detectors.reset(self._token)
+
+    def get_repeated_queries(self):
+        groups = {}
+        for query in self.queries:
+            key = (normalize_sql(query.sql), query.call_site)
+            count, duration = groups.get(key, (0, 0.0))
+            groups[key] = (count + 1, duration + query.duration)
+
+        repeated = [
+            RepeatedQuery(sql, call_site, count, duration)
+            for (sql, call_site), (count, duration) in groups.items()
+            if count >= self.threshold
+        ]
+        return sorted(repeated, key=lambda query: query.count, reverse=True)
+
+    def get_slow_queries(self):
+        return [
+            query
+            for query in self.queries
+            if query.duration * 1000 >= self.slow_query_ms
+        ]
+
+    def get_report(self, repeated_queries=None, slow_queries=None):
+        if repeated_queries is None:
+            repeated_queries = self.get_repeated_queries()
+        if slow_queries is None:
+            slow_queries = self.get_slow_queries()
+
+        lines = []
+        for query in repeated_queries:
+            lines.append(
+                f"Repeated {query.count} times ({query.duration * 1000:.1f}ms): "
+                f"{query.sql}"
+            )
+            lines.extend(f"    {frame}" for frame in query.call_site)
+        for query in slow_queries:
+            lines.append(f"Slow ({query.duration * 1000:.1f}ms): {query.sql}")
+            lines.extend(f"    {frame}" for frame in query.call_site)
+        return "\n".join(lines)
+
+    def check(self, description="Queries", raise_error=None):
+        """
+        Log any repeated or slow queries, or raise `RepeatedQueriesError` for
+        repeated queries if `raise_error` (by default `QUERY_DETECTOR_RAISE`)
+        is set.
+        """
+        if raise_error is None:
+            raise_error = settings.QUERY_DETECTOR_RAISE
+
+        repeated_queries = self.get_repeated_queries()
+        slow_queries = self.get_slow_queries()
+        if not repeated_queries and not slow_queries:
+            return
+
+        report = self.get_report(repeated_queries, slow_queries)
+        message = f"{description}: {len(self.queries)} queries\n{report}"
+        if repeated_queries and raise_error:
+            raise RepeatedQueriesError(message)
+        logger.warning(message)
+
+
+class QueryDetectorMiddleware:
+    """
+    Check the queries of every request with a `QueryDetector`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_DETECTOR_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with QueryDetector() as detector:
+            response = self.get_response(request)
+        detector.check(f"{request.method} {request.get_full_path()}")
+        return response
+
+    async def __acall__(self, request):
+        with QueryDetector() as detector:
+            response = await self.get_response(request)
+        detector.check(f"{request.method} {request.get_full_path()}")
+        return response
@@ -0,0 +1,259 @@
+"""
+Downloading media from an S3 bucket to a local directory.
+
+Used to pull production or staging media into a development environment (see
+the `sync_media_from_s3` command and `fab pull-production-media`). Compared
+to `aws s3 sync`:
+
+- it can be restricted to a set of keys, e.g. the original images referenced
+  by the database, skipping the renditions, which are regenerated locally;
+- objects are listed page by page and downloaded `workers` at a time, with a
+  bounded number of downloads queued, so that syncing starts straight away
+  and memory doesn't grow with the size of the bucket;
+- downloaded objects are recorded in a manifest, one line of JSON each, so
+  that an interrupted sync resumes where it stopped. Objects whose size and
+  ETag match the manifest are skipped, as are those whose local copy has the
+  same size and an MD5 matching their ETag (e.g. files synced before with
+  `aws s3 sync`). ETags aren't always an MD5 (e.g. for objects uploaded in
+  several parts), in which case the object is downloaded again.
+
+Objects are downloaded to a temporary file, which is renamed once complete,
+so that a local file is never left half written.
+
+The client is a boto3 S3 client, created with an `endpoint_url` to sync from
+a local S3-compatible server such as MinIO.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+S3_SYNC_WORKERS = 8
+
+MANIFEST_NAME = ".s3-sync-manifest.jsonl"
+PARTIAL_SUFFIX = ".s3-sync-part"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class S3Object(NamedTuple):
+    key: str
+    size: int
+    etag: str
+
+
+class SyncResult(NamedTuple):
+    obj: S3Object
+    # "downloaded", "skipped" or "failed"
+    status: str
+    error: Exception = None
+
+
+class Manifest:
+    """
+    The size and ETag of the objects downloaded to a directory, appended to
+    as objects are downloaded (from several threads).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self):
+        if not self.path.exists():
+            return
+        with self.path.open() as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line of an interrupted run
+                    continue
+                self.entries[entry["key"]] = (entry["size"], entry["etag"])
+
+    def matches(self, obj):
+        return self.entries.get(obj.key) == (obj.size, obj.etag)
+
+    def record(self, obj):
+        line = json.dumps({"key": obj.key, "size": obj.size, "etag": obj.etag})
+        with self._lock:
+            self.entries[obj.key] = (obj.size, obj.etag)
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.path.open("a")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def compact(self, keys):
+        """
+        Rewrite the manifest with only the entries of `keys`.
+        """
+        with self._lock:
+            self.close()
+            temporary_path = self.path.with_name(self.path.name + PARTIAL_SUFFIX)
+            with temporary_path.open("w") as f:
+                for key, (size, etag) in self.entries.items():
+                    if key in keys:
+                        f.write(
+                            json.dumps({"key": key, "size": size, "etag": etag}) + "\n"
+                        )
+            os.replace(temporary_path, self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def list_objects(client, bucket, prefix=""):
+    """
+    Yield the `S3Object`s of `bucket` under `prefix`, a page at a time.
+    """
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            if item["Key"].endswith("/"):
+                # A "directory" created by the S3 console
+                continue
+            yield S3Object(item["Key"], item["Size"], item["ETag"].strip('"'))
+
+
+def get_local_path(local_dir, key):
+    path = (Path(local_dir) / key).resolve()
+    if not path.is_relative_to(Path(local_dir).resolve()):
+        raise ValueError(f"Key {key!r} is outside of the local directory")
+    return path
+
+
+def is_multipart_etag(etag):
+    # ETags of objects uploaded in several parts aren't the MD5 of the object
+    return "-" in etag
+
+
+def get_md5(path):
+    md5 = hashlib.md5(usedforsecurity=False)
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def is_up_to_date(obj, path, manifest):
+    """
+    Return whether the local copy of `obj` at `path` is up to date.
+    """
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return False
+    if size != obj.size:
+        return False
+    if manifest.matches(obj):
+        return True
+    # Downloaded by another tool, or before the manifest was lost
+    if not is_multipart_etag(obj.etag) and get_md5(path) == obj.etag:
+        manifest.record(obj)
+        return True
+    return False
+
+
+def download_object(client, bucket, obj, path):
+    """
+    Download `obj` to `path`, through a temporary file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + PARTIAL_SUFFIX)
+    response = client.get_object(Bucket=bucket, Key=obj.key)
+    try:
+        with temporary_path.open("wb") as f:
+            for chunk in response["Body"].iter_chunks(CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(temporary_path, path)
+    finally:
+        temporary_path.unlink(missing_ok=True)
+
+
+def _sync_object(client, bucket, obj, local_dir, manifest):
+    path = get_local_path(local_dir, obj.key)
+    if is_up_to_date(obj, path, manifest):
+        return SyncResult(obj, "skipped")
+    try:
+        download_object(client, bucket, obj, path)
+    except Exception as e:
+        logger.warning("Couldn't download %s", obj.key, exc_info=True)
+        return SyncResult(obj, "failed", e)
+    manifest.record(obj)
+    return SyncResult(obj, "downloaded")
+
+
+def sync_bucket(
+    client,
+    bucket,
+    local_dir,
+    prefix="",
+    keys=None,
+    workers=S3_SYNC_WORKERS,
+    delete=False,
+):
+    """
+    Download the objects of `bucket` under `prefix` (only those in `keys`, if
+    given) to `local_dir`, keeping their keys as paths, `workers` at a time.
+
+    Yield a `SyncResult` as each object is done. If `delete` is set, local
+    files under `prefix` which weren't synced are then deleted.
+    """
+    local_dir = Path(local_dir)
+    manifest = Manifest(local_dir / MANIFEST_NAME)
+    manifest.load()
+    synced_keys = set()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for obj in list_objects(client, bucket, prefix):
+                if keys is not None and obj.key not in keys:
+                    continue
+                synced_keys.add(obj.key)
+                # Bound the queue, so that objects are listed as they're synced
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+                pending.add(
+                    pool.submit(_sync_object, client, bucket, obj, local_dir, manifest)
+                )
+            for future in wait(pending).done:
+                yield future.result()
+    finally:
+        manifest.close()
+
+    # Only once every object has been listed
+    if delete:
+        for path in delete_other_files(local_dir, prefix, synced_keys):
+            logger.info("Deleted %s", path)
+    manifest.compact(synced_keys if delete else manifest.entries.keys())
+
+
+def delete_other_files(local_dir, prefix, keys):
+    """
+    Delete the files of `local_dir` under `prefix` which aren't in `keys`,
+    and yield their paths.
+    """
+    local_dir = Path(local_dir)
+    root = get_local_path(local_dir, prefix) if prefix else local_dir
+    if not root.is_dir():
+        return
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.name == MANIFEST_NAME:
+            continue
+        if path.relative_to(local_dir).as_posix() not in keys:
+            path.unlink()
+            yield path
@@ -0,0 +1,200 @@
+"""
+Cache of site settings, shared by the `settings` context processor, context
+processors and template tags.
+
+Every site setting (`BaseSiteSetting` subclass) of a site is stored together
+under one key in the "default" cache (Redis), so they are loaded in a single
+round trip. The key includes a version number which is bumped whenever a site
+setting, site or image is saved.
+
+In front of that, each worker process keeps the settings of recently requested
+sites for `SITE_SETTINGS_LOCAL_CACHE_TIMEOUT` seconds, keyed by the same
+version number, so requests only need to fetch the (small) version number from
+Redis, once per request. Saving a setting changes the version, so every
+process picks the change up straight away.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from wagtail.contrib.settings.context_processors import (
+    SettingModuleProxy,
+    SettingProxy,
+)
+from wagtail.contrib.settings.models import BaseSiteSetting
+from wagtail.contrib.settings.registry import registry
+from wagtail.models import Site
+
+from .instrumentation import timed
+
+SITE_SETTINGS_CACHE_VERSION_KEY = "site-settings:version"
+SITE_SETTINGS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class LocalCache:
+    """
+    A small thread-safe, least recently used cache with a timeout, local to
+    the process.
+    """
+
+    def __init__(self, max_size=100):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                return None
+
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        if timeout <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalCache()
+
+
+def get_site_setting_models():
+    return [model for model in registry if issubclass(model, BaseSiteSetting)]
+
+
+def _load_site_settings(site):
+    site_settings = {}
+    for model in get_site_setting_models():
+        instance = model.base_queryset().filter(site=site).first()
+        if instance is None:
+            # Created with default values the first time it's requested, like
+            # `for_site` does, but without sending `post_save`, which would
+            # invalidate the cache being filled.
+            model.objects.bulk_create([model(site=site)], ignore_conflicts=True)
+            instance = model.base_queryset().get(site=site)
+        site_settings[model._meta.label_lower] = instance
+    return site_settings
+
+
+def get_site_settings_version(request=None):
+    """
+    Return the version number of the site settings cache, memoized on
+    `request` if given.
+    """
+    if request is not None and hasattr(request, "_site_settings_version"):
+        return request._site_settings_version
+
+    version = cache.get_or_set(SITE_SETTINGS_CACHE_VERSION_KEY, 1, timeout=None)
+    if request is not None:
+        request._site_settings_version = version
+    return version
+
+
+@timed("settings")
+def get_site_settings(site, version=None):
+    """
+    Return a dictionary of every site setting of `site`, keyed by model label.
+    Pass the `version` of the cache if it's already known.
+
+    The instances are shared between requests, so they mustn't be changed.
+    """
+    if version is None:
+        version = get_site_settings_version()
+
+    site_settings = local_cache.get((site.pk, version))
+    if site_settings is not None:
+        return site_settings
+
+    key = f"site-settings:{site.pk}:{version}"
+    site_settings = cache.get(key)
+    if site_settings is None:
+        site_settings = _load_site_settings(site)
+        cache.set(key, site_settings, timeout=SITE_SETTINGS_CACHE_TIMEOUT)
+
+    local_cache.set(
+        (site.pk, version), site_settings, settings.SITE_SETTINGS_LOCAL_CACHE_TIMEOUT
+    )
+    return site_settings
+
+
+def get_site_setting(model, request_or_site):
+    """
+    Return the `model` setting for a request or site, like `model.for_request`
+    or `model.for_site` would, from the site settings cache.
+
+    For requests, the result is memoized on the request.
+    """
+    if isinstance(request_or_site, Site):
+        return get_site_settings(request_or_site)[model._meta.label_lower]
+
+    request = request_or_site
+    attr_name = model.get_cache_attr_name()
+    if hasattr(request, attr_name):
+        return getattr(request, attr_name)
+
+    site = Site.find_for_request(request)
+    if site is None:
+        return model.for_request(request)
+
+    # Copy the shared instance, so it can generate page URLs for the request
+    site_settings = get_site_settings(site, get_site_settings_version(request))
+    instance = copy.copy(site_settings[model._meta.label_lower])
+    instance._page_url_cache = {}
+    instance._request = request
+    setattr(request, attr_name, instance)
+    return instance
+
+
+def invalidate_site_settings_cache():
+    try:
+        cache.incr(SITE_SETTINGS_CACHE_VERSION_KEY)
+    except ValueError:
+        # The version key doesn't exist (yet)
+        cache.set(SITE_SETTINGS_CACHE_VERSION_KEY, 2, timeout=None)
+    local_cache.clear()
+
+
+class CachedSettingModuleProxy(SettingModuleProxy):
+    def get_setting(self, model_name):
+        model = registry.get_by_natural_key(self.app_label, model_name)
+        if (
+            model is not None
+            and issubclass(model, BaseSiteSetting)
+            and self.request_or_site is not None
+        ):
+            return get_site_setting(model, self.request_or_site)
+        return super().get_setting(model_name)
+
+
+class CachedSettingProxy(SettingProxy):
+    """
+    A drop-in replacement for Wagtail's `settings` template variable, loading
+    site settings from the site settings cache.
+    """
+
+    def __missing__(self, app_label):
+        self[app_label] = value = CachedSettingModuleProxy(
+            self.request_or_site, app_label
+        )
+        return value
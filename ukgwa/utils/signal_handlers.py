@@ -0,0 +1,198 @@
+from django.apps import apps
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+
+from wagtail.contrib.settings.models import BaseSiteSetting
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from ukgwa.images.tasks import (
+    generate_page_renditions_task,
+    generate_site_renditions_task,
+)
+from ukgwa.navigation.models import NavigationSettings
+from ukgwa.navigation.utils import (
+    invalidate_menu_children_cache,
+    invalidate_navigation_cache,
+    is_image_in_navigation,
+    is_page_in_navigation,
+)
+from ukgwa.search.indexing import queue_search_index_updates
+from ukgwa.search.results import invalidate_search_cache
+from ukgwa.standardpages.utils import (
+    invalidate_child_count_cache,
+    invalidate_parent_child_count_cache,
+)
+
+from .cache import purge_objects_from_cache, purge_site_from_cache
+from .fragment_cache import invalidate_all_fragments, invalidate_fragments
+from .instrumentation import install_query_timer
+from .page_cache import invalidate_page_cache
+from .query_detector import install_query_recorder
+from .settings_cache import invalidate_site_settings_cache
+from .sitemaps import invalidate_page_sitemaps, invalidate_sitemaps
+from .tasks import fetch_page_embeds_task
+
+
+def page_published_signal_handler(instance, **kwargs):
+    invalidate_page_cache()
+    invalidate_search_cache()
+    queue_search_index_updates([instance])
+    invalidate_menu_children_cache()
+    invalidate_fragments(instance)
+    invalidate_parent_child_count_cache(instance)
+    if is_page_in_navigation(instance):
+        invalidate_navigation_cache()
+    purge_objects_from_cache([instance])
+    generate_page_renditions_task.enqueue(instance.pk)
+    fetch_page_embeds_task.enqueue(instance.pk)
+    invalidate_page_sitemaps(instance.path)
+
+
+def page_unpublished_signal_handler(instance, **kwargs):
+    invalidate_page_cache()
+    invalidate_search_cache()
+    queue_search_index_updates([instance])
+    invalidate_menu_children_cache()
+    invalidate_fragments(instance)
+    invalidate_parent_child_count_cache(instance)
+    if is_page_in_navigation(instance):
+        invalidate_navigation_cache()
+    purge_objects_from_cache([instance])
+    invalidate_page_sitemaps(instance.path)
+
+
+def page_moved_signal_handler(
+    instance, parent_page_before=None, parent_page_after=None, **kwargs
+):
+    # The URLs of the page and its descendants have changed
+    invalidate_page_cache()
+    invalidate_search_cache()
+    invalidate_menu_children_cache()
+    invalidate_child_count_cache(
+        *(parent.pk for parent in [parent_page_before, parent_page_after] if parent)
+    )
+    invalidate_sitemaps()
+    invalidate_all_fragments()
+    if is_page_in_navigation(instance):
+        invalidate_navigation_cache()
+
+
+def page_slug_changed_signal_handler(instance, **kwargs):
+    # Fragments may link to the page or any of its descendants
+    invalidate_all_fragments()
+
+
+def page_created_signal_handler(instance, created=False, **kwargs):
+    # New pages are searchable in the admin before they are published
+    if created:
+        queue_search_index_updates([instance])
+
+
+def page_deleted_signal_handler(instance, **kwargs):
+    invalidate_fragments(instance)
+    # The `Page` row of a specific page is deleted last, once the page can be
+    # removed from the search index
+    if type(instance) is Page:
+        queue_search_index_updates([instance])
+    if instance.live:
+        invalidate_search_cache()
+        invalidate_parent_child_count_cache(instance)
+        invalidate_page_sitemaps(instance.path)
+
+
+def snippet_saved_signal_handler(instance, **kwargs):
+    invalidate_page_cache()
+    invalidate_fragments(instance)
+    if isinstance(instance, get_image_model()):
+        # Site settings are cached with their images, e.g. the default sharing
+        # image
+        invalidate_site_settings_cache()
+        if is_image_in_navigation(instance):
+            invalidate_navigation_cache()
+    purge_objects_from_cache([instance])
+
+
+def navigation_settings_saved_signal_handler(instance, **kwargs):
+    invalidate_navigation_cache()
+
+
+def site_setting_saved_signal_handler(instance, created=False, **kwargs):
+    # Settings may be created with values, e.g. when importing data
+    invalidate_site_settings_cache()
+
+    # Settings are created with their default values the first time they are
+    # requested for a site, which doesn't change what's displayed.
+    if created:
+        return
+
+    invalidate_page_cache()
+    purge_site_from_cache(instance.site)
+    generate_site_renditions_task.enqueue()
+
+
+def view_restriction_changed_signal_handler(instance, **kwargs):
+    invalidate_page_cache()
+    invalidate_menu_children_cache()
+    invalidate_sitemaps()
+
+
+def site_changed_signal_handler(instance, **kwargs):
+    # Sitemaps contain full URLs, including the site's hostname and port
+    invalidate_sitemaps()
+    invalidate_site_settings_cache()
+
+
+def register_signal_handlers():
+    # Pages purge themselves, their parent and anything referencing them.
+    page_published.connect(page_published_signal_handler)
+    page_unpublished.connect(page_unpublished_signal_handler)
+    post_page_move.connect(page_moved_signal_handler)
+    page_slug_changed.connect(page_slug_changed_signal_handler)
+
+    # Deleting a page doesn't unpublish it, but changes its parent's listing.
+    for model in apps.get_models():
+        if issubclass(model, Page):
+            post_delete.connect(page_deleted_signal_handler, sender=model)
+            # Pages are indexed from a queue rather than on every save.
+            post_save.connect(page_created_signal_handler, sender=model)
+
+    # Snippets and images are displayed on the pages which reference them.
+    for model_label in ["core.CallToActionSnippet", "images.CustomImage"]:
+        post_save.connect(
+            snippet_saved_signal_handler, sender=apps.get_model(model_label)
+        )
+
+    # Restricted pages are never stored in the page cache, so drop any copy
+    # made before the restriction was added.
+    post_save.connect(
+        view_restriction_changed_signal_handler, sender=PageViewRestriction
+    )
+    post_delete.connect(
+        view_restriction_changed_signal_handler, sender=PageViewRestriction
+    )
+
+    post_save.connect(site_changed_signal_handler, sender=Site)
+    post_delete.connect(site_changed_signal_handler, sender=Site)
+
+    # The navigation is compiled and cached separately from the settings.
+    post_save.connect(
+        navigation_settings_saved_signal_handler, sender=NavigationSettings
+    )
+
+    # Site settings (navigation, social media, tracking...) are displayed on
+    # every page of the site.
+    for model in apps.get_models():
+        if issubclass(model, BaseSiteSetting):
+            post_save.connect(site_setting_saved_signal_handler, sender=model)
+
+    # Queries are timed and recorded by wrappers on every connection, which
+    # only do so during instrumented requests and while detecting queries.
+    connection_created.connect(install_query_timer)
+    connection_created.connect(install_query_recorder)
@@ -0,0 +1,286 @@
+"""
+Sitemap index and per-section sitemap shards.
+
+Rather than resolving the URL and last modification date of every live page on
+each request, the sitemap is split into one shard per section (the children of
+a site's root page, plus the root page itself), further split into chunks of
+`SITEMAP_CHUNK_SIZE` pages for large sections. The index and each chunk are
+rendered once, when first requested, and kept in the shared cache:
+
+- Publishing, unpublishing or deleting a page invalidates the chunk it's in and
+  the index. The later chunks of its section are only invalidated if the
+  number of pages in the section changed, as their pages have then shifted.
+  This keeps publishing cheap, and unpublishing or deleting many pages at once.
+- Moving a page, changing a view restriction or saving a site invalidates every
+  sitemap, as URLs and visibility may change across sections.
+"""
+
+import hashlib
+import math
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Coalesce, Substr
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from wagtail.models import Page, Site
+
+SITEMAP_CACHE_VERSION_KEY = "sitemap:version"
+
+# Well within the 50,000 URLs allowed per sitemap file.
+SITEMAP_CHUNK_SIZE = 10_000
+
+
+def _get_cache_version():
+    return cache.get_or_set(SITEMAP_CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_sitemaps():
+    try:
+        cache.incr(SITEMAP_CACHE_VERSION_KEY)
+    except ValueError:
+        # The version key doesn't exist (yet)
+        cache.set(SITEMAP_CACHE_VERSION_KEY, 2, timeout=None)
+
+
+def _get_cache_key(site, name):
+    return f"sitemap:{site.pk}:{_get_cache_version()}:{name}"
+
+
+def _get_section_path(site, path):
+    """
+    Return the path of the section `path` is in: the site's root page or one
+    of its children.
+    """
+    root_page = site.root_page
+    return path[: root_page.steplen * (root_page.depth + 1)]
+
+
+def _build_sitemap(template_name, context, lastmod):
+    xml = render_to_string(template_name, context)
+    return {
+        "xml": xml,
+        "etag": '"%s"' % hashlib.md5(xml.encode(), usedforsecurity=False).hexdigest(),
+        "lastmod": lastmod,
+    }
+
+
+def _get_site_pages(site):
+    root_page = site.root_page
+    return (
+        Page.objects.filter(path__startswith=root_page.path, depth__gte=root_page.depth)
+        .live()
+        .public()
+    )
+
+
+def get_section_stats(site):
+    """
+    Return a dictionary mapping the ID of each section of `site` with live,
+    public pages to its path, and their number and latest modification date,
+    worked out with two queries however many pages there are.
+    """
+    root_page = site.root_page
+    stats = (
+        _get_site_pages(site)
+        .annotate(
+            section_path=Substr("path", 1, root_page.steplen * (root_page.depth + 1))
+        )
+        .order_by()
+        .values("section_path")
+        .annotate(
+            count=Count("pk"),
+            lastmod=Max(Coalesce("last_published_at", "latest_revision_created_at")),
+        )
+    )
+    stats = {item["section_path"]: item for item in stats}
+    section_ids = dict(Page.objects.filter(path__in=stats).values_list("path", "pk"))
+    return {
+        section_ids[path]: {
+            "path": path,
+            "count": item["count"],
+            "lastmod": item["lastmod"],
+        }
+        for path, item in stats.items()
+        if path in section_ids
+    }
+
+
+def _get_num_chunks(count):
+    return math.ceil(count / SITEMAP_CHUNK_SIZE)
+
+
+def _generate_index(site):
+    section_stats = get_section_stats(site)
+    sections = []
+    for section_id, stats in sorted(section_stats.items()):
+        for chunk in range(1, _get_num_chunks(stats["count"]) + 1):
+            path = reverse("sitemap_shard", args=[section_id, chunk])
+            sections.append(
+                {"location": site.root_url + path, "last_mod": stats["lastmod"]}
+            )
+
+    lastmods = [section["last_mod"] for section in sections if section["last_mod"]]
+    index = _build_sitemap(
+        "sitemap_index.xml", {"sitemaps": sections}, max(lastmods, default=None)
+    )
+    # The shards listed, which are generated from the same stats
+    index["sections"] = {
+        section_id: {"path": stats["path"], "count": stats["count"]}
+        for section_id, stats in section_stats.items()
+    }
+    return index
+
+
+def get_sitemap_index(site):
+    key = _get_cache_key(site, "index")
+    index = cache.get(key)
+    if index is None:
+        index = _generate_index(site)
+        cache.set(key, index, timeout=None)
+    return index
+
+
+def _get_page_urls(page):
+    # Pages overriding `get_sitemap_urls` need their specific instance, but
+    # the URL and last modification date are otherwise on the base page.
+    if page.specific_class.get_sitemap_urls is not Page.get_sitemap_urls:
+        return page.specific.get_sitemap_urls()
+
+    location = page.get_full_url()
+    if location is None:
+        return []
+    return [
+        {
+            "location": location,
+            "lastmod": page.last_published_at or page.latest_revision_created_at,
+        }
+    ]
+
+
+def _get_section_pages(site, section_id, section_path):
+    pages = _get_site_pages(site).order_by("path")
+    if section_id == site.root_page_id:
+        return pages.filter(pk=section_id)
+    return pages.filter(path__startswith=section_path)
+
+
+def _get_shard_cache_key(site, section_id, chunk):
+    return _get_cache_key(site, f"{section_id}-{chunk}")
+
+
+def _generate_shard(site, section_id, section, chunk):
+    """
+    Return the shard listing the pages in `chunk` (from 1) of the section with
+    ID `section_id`, given its path and number of pages in `section` (from the
+    index), or `None` if the chunk is empty.
+    """
+    pages = _get_section_pages(site, section_id, section["path"])
+    offset = (chunk - 1) * SITEMAP_CHUNK_SIZE
+    chunk_pages = list(pages[offset:][:SITEMAP_CHUNK_SIZE])
+    if not chunk_pages:
+        return None
+
+    urls = [url for page in chunk_pages for url in _get_page_urls(page)]
+    lastmods = [url["lastmod"] for url in urls if url.get("lastmod")]
+    shard = _build_sitemap("sitemap.xml", {"urlset": urls}, max(lastmods, default=None))
+    # The pages of later chunks shift when this changes
+    shard["count"] = section["count"]
+    return shard
+
+
+def get_sitemap_shard(site, section_id, chunk):
+    """
+    Return the shard for `chunk` (from 1) of the section with ID `section_id`,
+    or `None` if the sitemap index doesn't list it.
+    """
+    section = get_sitemap_index(site)["sections"].get(section_id)
+    if section is None or not 1 <= chunk <= _get_num_chunks(section["count"]):
+        return None
+
+    key = _get_shard_cache_key(site, section_id, chunk)
+    shard = cache.get(key)
+    if shard is None:
+        shard = _generate_shard(site, section_id, section, chunk)
+        if shard is None:
+            return None
+        cache.set(key, shard, timeout=None)
+    return shard
+
+
+def _get_page_sections(page_path):
+    """
+    Return `(site, section)` pairs for each site the page with `page_path` is
+    in. `section` is `None` if the section no longer exists, e.g. it's the page
+    being deleted.
+    """
+    sites = [
+        site
+        for site in Site.objects.select_related("root_page")
+        if page_path.startswith(site.root_page.path)
+    ]
+    sections = {
+        section.path: section
+        for section in Page.objects.filter(
+            path__in={_get_section_path(site, page_path) for site in sites}
+        )
+    }
+    return [(site, sections.get(_get_section_path(site, page_path))) for site in sites]
+
+
+def _get_stale_shard_keys(site, section, page_path):
+    """
+    Return the cache keys of the shards of `section` which may have changed
+    with the page at `page_path`: the chunk it's (or was) in, and any later
+    chunk generated with a different number of pages in the section.
+    """
+    stats = _get_section_pages(site, section.pk, section.path).aggregate(
+        count=Count("pk"), position=Count("pk", filter=Q(path__lt=page_path))
+    )
+    chunk = stats["position"] // SITEMAP_CHUNK_SIZE + 1
+    keys = [_get_shard_cache_key(site, section.pk, chunk)]
+
+    # Up to the chunk after the last, which may have been emptied
+    later_keys = [
+        _get_shard_cache_key(site, section.pk, later_chunk)
+        for later_chunk in range(chunk + 1, _get_num_chunks(stats["count"]) + 2)
+    ]
+    keys.extend(
+        key
+        for key, shard in cache.get_many(later_keys).items()
+        if shard["count"] != stats["count"]
+    )
+    return keys
+
+
+def invalidate_page_sitemaps(page_path):
+    """
+    Invalidate the shards containing the page with `page_path`, and the index
+    of every site it's in, e.g. after the page has been published, unpublished
+    or deleted. They are regenerated when next requested.
+    """
+    keys = []
+    for site, section in _get_page_sections(page_path):
+        keys.append(_get_cache_key(site, "index"))
+        if section is not None:
+            keys.extend(_get_stale_shard_keys(site, section, page_path))
+    cache.delete_many(keys)
+
+
+def generate_sitemaps(site):
+    """
+    Generate the index and every shard of `site`. Return the number of shards.
+    """
+    index = _generate_index(site)
+    cache.set(_get_cache_key(site, "index"), index, timeout=None)
+
+    count = 0
+    for section_id, section in index["sections"].items():
+        for chunk in range(1, _get_num_chunks(section["count"]) + 1):
+            if (shard := _generate_shard(site, section_id, section, chunk)) is None:
+                continue
+            key = _get_shard_cache_key(site, section_id, chunk)
+            cache.set(key, shard, timeout=None)
+            count += 1
+    return count
@@ -0,0 +1,137 @@
+"""
+Helpers to walk StreamField data without rendering it.
+
+The functions here walk the raw (JSON) data of a StreamField alongside its
+block definitions, so that text and references can be extracted without
+converting values to Python (which may query the database) or rendering
+templates.
+"""
+
+import html
+import re
+
+from wagtail import blocks
+from wagtail.contrib.table_block.blocks import TableBlock
+from wagtail.contrib.typed_table_block.blocks import TypedTableBlock
+from wagtail.embeds.blocks import EmbedBlock
+
+TAG_RE = re.compile(r"<[^>]*>")
+
+# Text fields of StructBlocks which aren't displayed as part of the content,
+# e.g. the alt text of images, which is only read by screen readers.
+HIDDEN_TEXT_FIELDS = {"alt_text"}
+
+
+def strip_html(value):
+    """
+    Return the text content of an HTML fragment. Tags are replaced with spaces
+    so that words in adjacent elements aren't joined together.
+    """
+    return html.unescape(TAG_RE.sub(" ", value))
+
+
+def _iter_list_items(raw_value):
+    for item in raw_value or []:
+        # ListBlock items are stored as {"type": "item", "value": ..., "id": ...}
+        # since Wagtail 2.16, and as plain values before.
+        if isinstance(item, dict) and item.get("type") == "item" and "value" in item:
+            yield item["value"]
+        else:
+            yield item
+
+
+def walk_blocks(block, raw_value, skip=()):
+    """
+    Yield `(block, raw_value)` for `block` and every block nested within it,
+    depth first and in the order they appear, except for the StructBlock
+    children named in `skip`.
+    """
+    yield block, raw_value
+
+    if raw_value is None:
+        return
+
+    if isinstance(block, blocks.StreamBlock):
+        for child in raw_value:
+            child_block = block.child_blocks.get(child.get("type"))
+            if child_block is not None:
+                yield from walk_blocks(child_block, child.get("value"), skip)
+
+    elif isinstance(block, blocks.StructBlock):
+        for name, child_block in block.child_blocks.items():
+            if name not in skip:
+                yield from walk_blocks(child_block, raw_value.get(name), skip)
+
+    elif isinstance(block, blocks.ListBlock):
+        for item in _iter_list_items(raw_value):
+            yield from walk_blocks(block.child_block, item, skip)
+
+    elif isinstance(block, TypedTableBlock):
+        columns = [
+            block.child_blocks.get(column.get("type"))
+            for column in raw_value.get("columns", [])
+        ]
+        for row in raw_value.get("rows", []):
+            for column_block, cell in zip(columns, row.get("values", [])):
+                if column_block is not None:
+                    yield from walk_blocks(column_block, cell, skip)
+
+
+def iter_text(block, raw_value):
+    """
+    Yield the text displayed by `block` and its children, such as headings,
+    rich text and table cells.
+    """
+    for child_block, value in walk_blocks(block, raw_value, HIDDEN_TEXT_FIELDS):
+        if not value:
+            continue
+
+        if isinstance(child_block, blocks.RichTextBlock):
+            yield strip_html(value)
+        elif isinstance(child_block, (blocks.CharBlock, blocks.TextBlock)):
+            yield value
+        elif isinstance(child_block, TableBlock):
+            for row in value.get("data") or []:
+                yield from (cell for cell in row if isinstance(cell, str))
+        elif isinstance(child_block, TypedTableBlock):
+            for column in value.get("columns", []):
+                if column.get("heading"):
+                    yield column["heading"]
+
+
+def iter_chooser_ids(block, raw_value):
+    """
+    Yield `(model, pk)` for every object chosen within `block`.
+    """
+    for child_block, value in walk_blocks(block, raw_value):
+        if value and isinstance(child_block, blocks.ChooserBlock):
+            yield child_block.model_class, value
+
+
+def iter_embeds(block, raw_value):
+    """
+    Yield `(url, max_width, max_height)` for every embed within `block`.
+    """
+    for child_block, value in walk_blocks(block, raw_value):
+        if value and isinstance(child_block, EmbedBlock):
+            yield (
+                value,
+                getattr(child_block.meta, "max_width", None),
+                getattr(child_block.meta, "max_height", None),
+            )
+
+
+def iter_blocks_of_type(block, raw_value, block_class):
+    """
+    Yield the raw value of every block that is an instance of `block_class`.
+    """
+    for child_block, value in walk_blocks(block, raw_value):
+        if isinstance(child_block, block_class):
+            yield value
+
+
+def get_word_count(stream_value):
+    return sum(
+        len(text.split())
+        for text in iter_text(stream_value.stream_block, stream_value.raw_data)
+    )
@@ -0,0 +1,169 @@
+"""
+Bulk loading of the objects referenced by StreamFields.
+
+Wagtail converts the blocks of a StreamField one block type at a time, so each
+chooser block type (and each call to action's own StreamField) costs a query,
+and the objects the chosen snippets point to are then loaded one at a time.
+
+`prefetch_stream_references` walks the raw data of the blocks instead,
+collecting the IDs of every page, snippet and image they reference, then loads
+them with one query per model. Snippets are loaded with their images, and the
+StreamFields of loaded snippets (e.g. a call to action's link) are walked in
+turn. The blocks are then converted using the loaded objects, so a body with
+any number of references costs a few queries.
+"""
+
+from collections import defaultdict
+
+from wagtail import blocks
+from wagtail.blocks import StreamValue
+from wagtail.blocks.list_block import ListValue
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+
+from .streamfield import iter_chooser_ids
+
+
+def _get_stream_fields(model):
+    return [
+        field for field in model._meta.get_fields() if isinstance(field, StreamField)
+    ]
+
+
+def _load_objects(model, pks):
+    """
+    Return a dictionary mapping each of `pks` to the `model` instance with
+    that primary key, or `None` if it doesn't exist.
+    """
+    image_model = get_image_model()
+    image_fields = [
+        field.name
+        for field in model._meta.concrete_fields
+        if field.many_to_one and field.related_model is image_model
+    ]
+    objects = model._default_manager.select_related(*image_fields).in_bulk(pks)
+    return {pk: objects.get(pk) for pk in pks}
+
+
+def to_python_with_objects(block, raw_value, objects):
+    """
+    Convert `raw_value` like `block.to_python`, taking the chosen objects
+    from `objects` (a dictionary of `{model: {pk: instance}}`) rather than
+    querying the database.
+    """
+    if isinstance(block, blocks.ChooserBlock):
+        if raw_value is None or raw_value == "":
+            return None
+        model_objects = objects.get(block.model_class, {})
+        if raw_value not in model_objects:
+            # Not prefetched, e.g. a custom chooser block
+            return block.to_python(raw_value)
+        return model_objects[raw_value]
+
+    if isinstance(block, blocks.StreamBlock):
+        return StreamValue(
+            block,
+            [
+                (
+                    child["type"],
+                    to_python_with_objects(
+                        block.child_blocks[child["type"]], child.get("value"), objects
+                    ),
+                    child.get("id"),
+                )
+                for child in raw_value or []
+                if child.get("type") in block.child_blocks
+            ],
+        )
+
+    if isinstance(block, blocks.StructBlock):
+        return block._to_struct_value(
+            [
+                (
+                    name,
+                    (
+                        to_python_with_objects(child_block, raw_value[name], objects)
+                        if name in raw_value
+                        else child_block.get_default()
+                    ),
+                )
+                for name, child_block in block.child_blocks.items()
+            ]
+        )
+
+    if isinstance(block, blocks.ListBlock):
+        bound_blocks = []
+        for item in raw_value or []:
+            # See `ListBlock._item_is_in_block_format`
+            if (
+                isinstance(item, dict)
+                and item.get("type") == "item"
+                and "value" in item
+            ):
+                value, item_id = item["value"], item.get("id")
+            else:
+                value, item_id = item, None
+            bound_blocks.append(
+                ListValue.ListChild(
+                    block.child_block,
+                    to_python_with_objects(block.child_block, value, objects),
+                    id=item_id,
+                )
+            )
+        return ListValue(block, bound_blocks=bound_blocks)
+
+    return block.to_python(raw_value)
+
+
+def prefetch_stream_references(stream_value, indexes=None):
+    """
+    Convert the blocks of `stream_value` at `indexes` (every block by
+    default), loading the objects they reference in bulk.
+    """
+    if indexes is None:
+        indexes = range(len(stream_value.raw_data))
+
+    objects = defaultdict(dict)
+    to_convert = []
+    pending = [(stream_value, list(indexes))]
+
+    # Breadth first, so that e.g. the pages linked to by every call to action
+    # are loaded with one query.
+    while pending:
+        references = defaultdict(set)
+        for value, value_indexes in pending:
+            child_blocks = value.stream_block.child_blocks
+            for index in value_indexes:
+                raw_child = value.raw_data[index]
+                child_block = child_blocks.get(raw_child["type"])
+                if child_block is None:
+                    continue
+                for model, pk in iter_chooser_ids(child_block, raw_child.get("value")):
+                    if pk not in objects[model]:
+                        references[model].add(pk)
+        to_convert.extend(pending)
+
+        pending = []
+        for model, pks in references.items():
+            loaded = _load_objects(model, pks)
+            objects[model].update(loaded)
+            for field in _get_stream_fields(model):
+                for obj in loaded.values():
+                    if obj is not None:
+                        nested_value = getattr(obj, field.name)
+                        pending.append(
+                            (nested_value, range(len(nested_value.raw_data)))
+                        )
+
+    for value, value_indexes in to_convert:
+        child_blocks = value.stream_block.child_blocks
+        for index in value_indexes:
+            raw_child = value.raw_data[index]
+            child_block = child_blocks.get(raw_child["type"])
+            if child_block is None:
+                continue
+            value[index] = (
+                raw_child["type"],
+                to_python_with_objects(child_block, raw_child.get("value"), objects),
+                raw_child.get("id"),
+            )
@@ -0,0 +1,44 @@
+import logging
+
+from wagtail.contrib.frontend_cache.utils import get_backends
+from wagtail.models import Page, Site
+
+from django_tasks import task
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def purge_tags_from_cache_task(tags, backend_settings=None, backends=None):
+    if not tags:
+        return
+
+    for backend_name, backend in get_backends(backend_settings, backends).items():
+        if not getattr(backend, "cache_tags_enabled", False):
+            continue
+
+        logger.info("[%s] Purging cache tags: %s", backend_name, ", ".join(tags))
+        backend.purge_tags(tags)
+
+
+@task()
+def purge_site_urls_from_cache_task(site_id, backends=None):
+    from .cache import purge_site_urls_from_cache
+
+    site = Site.objects.select_related("root_page").filter(pk=site_id).first()
+    if site is not None:
+        purge_site_urls_from_cache(site, backends=backends)
+
+
+@task()
+def fetch_page_embeds_task(page_id):
+    """
+    Fetch the embeds displayed by a page, so they are stored before visitors
+    request it.
+    """
+    # Imported here, as `.embeds` depends on `.cache`, which imports this module
+    from .embeds import fetch_page_embeds
+
+    page = Page.objects.filter(pk=page_id).specific().first()
+    if page is not None:
+        fetch_page_embeds(page)
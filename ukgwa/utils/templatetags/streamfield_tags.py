@@ -0,0 +1,46 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from wagtail.fields import StreamField
+from wagtail.models import Page
+
+from ukgwa.utils.fragment_cache import get_stream_children, render_stream_child
+
+register = template.Library()
+
+
+def _get_live_revision_id(context, value):
+    """
+    Return the live revision ID of the page being served, if `value` is one of
+    its StreamFields and it isn't a preview.
+    """
+    request = context.get("request")
+    page = context.get("page")
+    if not isinstance(page, Page) or getattr(request, "is_preview", False):
+        return None
+
+    for field in page._meta.get_fields():
+        if isinstance(field, StreamField) and getattr(page, field.name) is value:
+            return page.live_revision_id
+    return None
+
+
+@register.simple_tag(takes_context=True)
+def cached_stream_blocks(context, value):
+    """
+    Prepare the blocks of a StreamField for `include_block_cached`, fetching
+    the HTML of every cached block at once.
+    Usage: {% cached_stream_blocks value as blocks %}
+    """
+    return get_stream_children(
+        value, _get_live_revision_id(context, value), context.get("request")
+    )
+
+
+@register.simple_tag(takes_context=True)
+def include_block_cached(context, block):
+    """
+    Like `include_block`, for a block returned by `cached_stream_blocks`.
+    Usage: {% include_block_cached block %}
+    """
+    return mark_safe(render_stream_child(block, context))
@@ -3,6 +3,8 @@ import uuid
 from django import template
 
 from ukgwa.core.models import SocialMediaSettings
+from ukgwa.utils.cache import add_cache_tags
+from ukgwa.utils.settings_cache import get_site_setting
 
 register = template.Library()
 
@@ -12,7 +14,7 @@ register = template.Library()
 def social_text(page, site):
     return (
         getattr(page, "social_text", None)
-        or SocialMediaSettings.for_site(site).default_sharing_text
+        or get_site_setting(SocialMediaSettings, site).default_sharing_text
     )
 
 
@@ -21,7 +23,7 @@ def social_text(page, site):
 def social_image(page, site):
     return (
         getattr(page, "social_image", None)
-        or SocialMediaSettings.for_site(site).default_sharing_image
+        or get_site_setting(SocialMediaSettings, site).default_sharing_image
     )
 
 
@@ -33,3 +35,14 @@ def unique_id(prefix="uuid"):
     Usage: {% unique_id "repeated-component-id" as new_unique_id %}
     """
     return f"{prefix}-{uuid.uuid4().hex[:16]}"
+
+
+@register.simple_tag(takes_context=True)
+def cache_tags(context, *objs):
+    """
+    Record that the current response depends on the given objects, so it's
+    purged from the front-end cache when any of them changes.
+    Usage: {% cache_tags call_to_action %}
+    """
+    add_cache_tags(context.get("request"), *objs)
+    return ""
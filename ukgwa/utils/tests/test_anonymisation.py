@@ -0,0 +1,186 @@
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.models import Page, Revision
+
+from birdbath.models import Execution
+
+from ..anonymisation import (
+    FormSubmissionAnonymiser,
+    RevisionCommentAnonymiser,
+    UserAnonymiser,
+    get_checkpoint,
+    run_in_batches,
+)
+from ..models import AnonymisationCheckpoint
+
+
+class AnonymisationTestCase(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(
+                f"editor{i}",
+                f"editor{i}@nationalarchives.gov.uk",
+                "password",
+                first_name="Ada",
+                last_name="Lovelace",
+            )
+            for i in range(5)
+        ]
+        self.superuser = User.objects.create_superuser(
+            "admin", "admin@nationalarchives.gov.uk", "password"
+        )
+        self.excluded_user = User.objects.create_user(
+            "developer", "developer@torchbox.com", "password"
+        )
+
+    def anonymise(self, **options):
+        stdout = io.StringIO()
+        call_command("anonymise_data", skip_checks=True, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_users(self):
+        self.anonymise()
+
+        for user in self.users:
+            user.refresh_from_db()
+            self.assertEqual(user.username, f"user-{user.pk}")
+            self.assertNotIn("nationalarchives", user.email)
+            self.assertNotEqual(user.first_name, "Ada")
+            self.assertFalse(user.has_usable_password())
+        self.superuser.refresh_from_db()
+        self.assertEqual(self.superuser.email, "admin@nationalarchives.gov.uk")
+        self.assertTrue(self.superuser.check_password("password"))
+        self.excluded_user.refresh_from_db()
+        self.assertEqual(self.excluded_user.username, "developer")
+        # For birdbath's system check
+        self.assertTrue(Execution.objects.exists())
+
+    def test_batches(self):
+        processor = UserAnonymiser()
+        processor.batch_size = 2
+
+        with self.assertNumQueries(3 * 3 + 1):
+            batch_counts = list(run_in_batches(processor))
+
+        self.assertEqual(batch_counts, [2, 2, 1])
+
+    def test_resume(self):
+        processor = UserAnonymiser()
+        processor.batch_size = 2
+        checkpoint = get_checkpoint(processor)
+        batches = run_in_batches(processor, checkpoint)
+        next(batches)
+        # Interrupted after the first batch
+        batches.close()
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.last_pk, self.users[1].pk)
+        self.assertIsNone(checkpoint.completed_at)
+        self.users[0].refresh_from_db()
+        anonymised_email = self.users[0].email
+
+        output = self.anonymise()
+
+        self.assertIn(f"resuming after primary key {self.users[1].pk}", output)
+        self.assertIn("UserAnonymiser: 3 objects anonymised", output)
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].email, anonymised_email)
+        self.users[4].refresh_from_db()
+        self.assertEqual(self.users[4].username, f"user-{self.users[4].pk}")
+
+        output = self.anonymise()
+
+        self.assertIn("UserAnonymiser: already done", output)
+
+        output = self.anonymise(restart=True)
+
+        self.assertIn("UserAnonymiser: 5 objects anonymised", output)
+
+    def test_failure_keeps_completed_batches(self):
+        failing_pk = self.users[3].pk
+        process_object = UserAnonymiser.process_object
+
+        def fail_on_user(processor, obj):
+            if obj.pk == failing_pk:
+                raise ValueError("Can't anonymise")
+            process_object(processor, obj)
+
+        with (
+            mock.patch.object(UserAnonymiser, "process_object", fail_on_user),
+            self.assertRaisesMessage(CommandError, "Can't anonymise"),
+        ):
+            self.anonymise(batch_size=2)
+
+        checkpoint = AnonymisationCheckpoint.objects.get(
+            processor="ukgwa.utils.anonymisation.UserAnonymiser"
+        )
+        self.assertEqual(checkpoint.last_pk, self.users[1].pk)
+        self.users[1].refresh_from_db()
+        self.assertEqual(self.users[1].username, f"user-{self.users[1].pk}")
+        self.users[2].refresh_from_db()
+        self.assertEqual(self.users[2].username, "editor2")
+
+    def test_revision_comments(self):
+        page_content_type = ContentType.objects.get_for_model(Page)
+        revision = Revision.objects.create(
+            content_type=page_content_type,
+            base_content_type=page_content_type,
+            object_id=str(Page.get_first_root_node().pk),
+            content={
+                "title": "Draft",
+                "wagtail_admin_comments": [
+                    {
+                        "text": "Ask Ada about this",
+                        "contentpath": "title",
+                        "replies": [{"text": "Ada says no"}],
+                    }
+                ],
+            },
+        )
+        revision_without_comments = Revision.objects.create(
+            content_type=page_content_type,
+            base_content_type=page_content_type,
+            object_id=str(Page.get_first_root_node().pk),
+            content={"title": "Draft"},
+        )
+
+        list(run_in_batches(RevisionCommentAnonymiser()))
+
+        revision.refresh_from_db()
+        self.assertEqual(revision.content["title"], "Draft")
+        comment = revision.content["wagtail_admin_comments"][0]
+        self.assertNotIn("Ada", comment["text"])
+        self.assertNotIn("Ada", comment["replies"][0]["text"])
+        self.assertEqual(comment["contentpath"], "title")
+        revision_without_comments.refresh_from_db()
+        self.assertEqual(revision_without_comments.content, {"title": "Draft"})
+
+    def test_form_submissions(self):
+        submission = FormSubmission.objects.create(
+            page=Page.get_first_root_node(),
+            form_data={
+                "name": "Ada Lovelace",
+                "topics": ["engines", "poetry"],
+                "subscribe": True,
+                "comments": "",
+            },
+        )
+
+        list(run_in_batches(FormSubmissionAnonymiser()))
+
+        submission.refresh_from_db()
+        form_data = submission.form_data
+        self.assertEqual(set(form_data), {"name", "topics", "subscribe", "comments"})
+        self.assertNotEqual(form_data["name"], "Ada Lovelace")
+        self.assertEqual(len(form_data["name"]), len("Ada Lovelace"))
+        self.assertEqual(len(form_data["topics"]), 2)
+        self.assertNotIn("poetry", form_data["topics"])
+        self.assertIs(form_data["subscribe"], True)
+        self.assertEqual(form_data["comments"], "")
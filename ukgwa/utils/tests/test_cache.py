@@ -0,0 +1,219 @@
+from unittest import mock
+
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtail.contrib.frontend_cache.backends import BaseBackend
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+
+from django_tasks import DEFAULT_TASK_BACKEND_ALIAS, tasks
+
+from ukgwa.core.models import CallToActionSnippet
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import IndexPageFactory, InformationPageFactory
+
+from ..cache import (
+    CACHE_TAG_HEADER,
+    add_cache_tags,
+    get_cache_tag,
+    get_model_cache_tag,
+    purge_objects_from_cache,
+    purge_site_from_cache,
+    set_cache_tag_header,
+)
+
+PURGED_URLS = []
+PURGED_TAGS = []
+
+
+class MockBackend(BaseBackend):
+    def purge(self, url):
+        PURGED_URLS.append(url)
+
+
+class MockTagBackend(BaseBackend):
+    cache_tags_enabled = True
+
+    def purge(self, url):
+        raise AssertionError("Tag backends should not be sent URLs")
+
+    def purge_tags(self, tags):
+        PURGED_TAGS.extend(tags)
+
+
+class CacheTagsTestCase(TestCase):
+    def test_cache_tag_for_specific_page_matches_base_page(self):
+        page = InformationPageFactory()
+        self.assertEqual(get_cache_tag(page), f"page-{page.pk}")
+        self.assertEqual(get_cache_tag(Page.objects.get(pk=page.pk)), f"page-{page.pk}")
+
+    def test_cache_tag_for_snippet(self):
+        snippet = CallToActionSnippet.objects.create(title="CTA", link=[])
+        self.assertEqual(
+            get_cache_tag(snippet), f"core.calltoactionsnippet-{snippet.pk}"
+        )
+
+    def test_model_cache_tag_without_instance(self):
+        # Instantiating an image would query the root collection
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_model_cache_tag(get_image_model(), 1), "images.customimage-1"
+            )
+            self.assertEqual(get_model_cache_tag(HomePage, 2), "page-2")
+
+    def test_header_set_after_template_response_is_rendered(self):
+        request = RequestFactory().get("/")
+        response = SimpleTemplateResponse("components/skip_link/skip_link.html")
+        add_cache_tags(request, "page-1")
+
+        response = set_cache_tag_header(request, response)
+        # Tags recorded during rendering must be included in the header
+        add_cache_tags(request, "page-2", None)
+        response.render()
+
+        self.assertEqual(response[CACHE_TAG_HEADER], "page-1,page-2")
+
+    def test_no_header_without_tags(self):
+        request = RequestFactory().get("/")
+        response = set_cache_tag_header(request, HttpResponse())
+        self.assertNotIn(CACHE_TAG_HEADER, response)
+
+
+class PurgeObjectsFromCacheTestCase(TestCase):
+    def setUp(self):
+        PURGED_URLS.clear()
+        PURGED_TAGS.clear()
+
+        self.home = HomePage.objects.get()
+        self.index = self.home.add_child(
+            instance=IndexPageFactory.build(title="Index", slug="index")
+        )
+        self.page = self.index.add_child(
+            instance=InformationPageFactory.build(title="Info", slug="info")
+        )
+        self.cta = CallToActionSnippet.objects.create(
+            title="CTA",
+            link=[{"type": "internal_link", "value": {"page": self.page.pk}}],
+        )
+        self.other = self.home.add_child(
+            instance=InformationPageFactory.build(
+                title="Other",
+                slug="other",
+                body=[{"type": "call_to_action", "value": self.cta.pk}],
+            )
+        )
+
+    @override_settings(
+        WAGTAILFRONTENDCACHE={
+            "default": {"BACKEND": "ukgwa.utils.tests.test_cache.MockBackend"}
+        }
+    )
+    def test_purges_page_parent_and_referencing_pages_by_url(self):
+        purge_objects_from_cache([self.page])
+
+        root_url = Site.objects.get().root_url
+        self.assertCountEqual(
+            PURGED_URLS,
+            [
+                f"{root_url}/index/info/",
+                f"{root_url}/index/",
+                # References the page through the call to action
+                f"{root_url}/other/",
+            ],
+        )
+
+    @override_settings(
+        WAGTAILFRONTENDCACHE={
+            "default": {"BACKEND": "ukgwa.utils.tests.test_cache.MockTagBackend"}
+        }
+    )
+    def test_purges_by_tag_when_supported(self):
+        purge_objects_from_cache([self.page, self.cta, self.page])
+
+        self.assertEqual(
+            PURGED_TAGS,
+            [
+                f"core.calltoactionsnippet-{self.cta.pk}",
+                f"page-{self.index.pk}-children",
+                f"page-{self.page.pk}",
+            ],
+        )
+        self.assertEqual(PURGED_URLS, [])
+
+    @override_settings(
+        WAGTAILFRONTENDCACHE={
+            "default": {"BACKEND": "ukgwa.utils.tests.test_cache.MockTagBackend"}
+        },
+        STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        },
+    )
+    def test_publishing_a_new_child_purges_its_parent_listing_by_tag(self):
+        response = self.client.get("/index/")
+        listing_tag = f"page-{self.index.pk}-children"
+        self.assertIn(listing_tag, response[CACHE_TAG_HEADER].split(","))
+
+        child = self.index.add_child(
+            instance=InformationPageFactory.build(title="New", live=False)
+        )
+        child.save_revision().publish()
+
+        self.assertIn(listing_tag, PURGED_TAGS)
+        self.assertIn(f"page-{child.pk}", PURGED_TAGS)
+
+    @override_settings(
+        WAGTAILFRONTENDCACHE={
+            "default": {"BACKEND": "ukgwa.utils.tests.test_cache.MockBackend"}
+        }
+    )
+    def test_purges_urls_from_a_task(self):
+        with mock.patch(
+            "wagtail.contrib.frontend_cache.tasks.purge_urls_from_cache_task"
+        ) as task_mock:
+            purge_objects_from_cache([self.page])
+
+        # The URLs are worked out before the task is enqueued
+        urls, backend_settings, backends = task_mock.enqueue.call_args.args
+        root_url = Site.objects.get().root_url
+        self.assertCountEqual(
+            urls,
+            [f"{root_url}/index/info/", f"{root_url}/index/", f"{root_url}/other/"],
+        )
+        self.assertEqual(backends, ["default"])
+        self.assertEqual(PURGED_URLS, [])
+
+    @override_settings(
+        WAGTAILFRONTENDCACHE={
+            "default": {"BACKEND": "ukgwa.utils.tests.test_cache.MockBackend"}
+        }
+    )
+    def test_deleting_a_live_page_purges_it_once_committed(self):
+        # Tasks run once the transaction deleting the page commits, as they do
+        # without a `TASKS` setting
+        with mock.patch.object(
+            tasks[DEFAULT_TASK_BACKEND_ALIAS], "enqueue_on_commit", True
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.page.delete()
+                self.assertEqual(PURGED_URLS, [])
+
+        root_url = Site.objects.get().root_url
+        self.assertCountEqual(
+            PURGED_URLS,
+            [f"{root_url}/index/info/", f"{root_url}/index/", f"{root_url}/other/"],
+        )
+
+    @override_settings(
+        WAGTAILFRONTENDCACHE={
+            "default": {"BACKEND": "ukgwa.utils.tests.test_cache.MockBackend"}
+        }
+    )
+    def test_purges_every_page_of_a_site_by_url(self):
+        purge_site_from_cache(Site.objects.get())
+
+        self.assertEqual(len(PURGED_URLS), 4)
@@ -0,0 +1,225 @@
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from wagtail.embeds.finders import get_finders
+from wagtail.embeds.models import Embed
+
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import InformationPageFactory
+
+from ..cache import get_embed_cache_tag
+from ..embeds import get_page_embeds, get_stored_embed, refresh_embeds
+from ..fragment_cache import invalidate_fragments
+
+VIDEO_URL = "https://video.example.com/watch/1"
+BROKEN_VIDEO_URL = "https://video.example.com/watch/broken"
+
+
+class OEmbedHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in oEmbed provider, returning a video for any URL except
+    `BROKEN_VIDEO_URL`.
+    """
+
+    def do_GET(self):
+        url = parse_qs(urlparse(self.path).query)["url"][0]
+        self.server.requested_urls.append(url)
+
+        if url == BROKEN_VIDEO_URL or self.server.broken:
+            self.send_response(500)
+            self.end_headers()
+            self.wfile.write(b"Server error")
+            return
+
+        body = json.dumps(
+            {
+                "type": "video",
+                "title": f"Video {self.server.version}",
+                "provider_name": "Example",
+                "thumbnail_url": "https://video.example.com/thumbnail.jpg",
+                "width": 640,
+                "height": 360,
+                "html": (
+                    f'<iframe src="{url}" '
+                    f'title="v{self.server.html_version or self.server.version}">'
+                    "</iframe>"
+                ),
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class EmbedsTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), OEmbedHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.server.requested_urls = []
+        self.server.version = 1
+        # Defaults to `version`
+        self.server.html_version = None
+        self.server.broken = False
+
+        finders = [
+            {
+                "class": "wagtail.embeds.finders.oembed",
+                "providers": [
+                    {
+                        "endpoint": f"http://127.0.0.1:{self.server.server_port}/oembed",
+                        "urls": [r"^https://video\.example\.com/.+$"],
+                    }
+                ],
+            }
+        ]
+        settings_override = override_settings(WAGTAILEMBEDS_FINDERS=finders)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_finders.cache_clear()
+        self.addCleanup(get_finders.cache_clear)
+
+    def create_page(self, url=VIDEO_URL, **kwargs):
+        return HomePage.objects.get().add_child(
+            instance=InformationPageFactory.build(
+                title="Page",
+                slug="page",
+                body=[("embed", {"title": "", "description": "", "embed": url})],
+                **kwargs,
+            )
+        )
+
+    def test_get_page_embeds(self):
+        page = self.create_page(live=False)
+        self.assertEqual(get_page_embeds([page]), {(VIDEO_URL, None, None)})
+
+    def test_publishing_a_page_fetches_its_embeds(self):
+        page = self.create_page(live=False)
+        self.assertIsNone(get_stored_embed(VIDEO_URL))
+
+        page.save_revision().publish()
+
+        self.assertEqual(self.server.requested_urls, [VIDEO_URL])
+        self.assertEqual(get_stored_embed(VIDEO_URL).title, "Video 1")
+
+        # Already stored
+        page.save_revision().publish()
+        self.assertEqual(self.server.requested_urls, [VIDEO_URL])
+
+    def test_rendering_only_reads_stored_embeds(self):
+        page = self.create_page(live=False)
+        page.save_revision().publish()
+        self.server.requested_urls = []
+
+        response = self.client.get("/page/")
+        self.assertContains(response, f'<iframe src="{VIDEO_URL}" title="v1">')
+
+        Embed.objects.all().delete()
+        cache.clear()
+        response = self.client.get("/page/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "<iframe")
+        self.assertEqual(self.server.requested_urls, [])
+
+    def test_publishing_with_an_unavailable_provider(self):
+        page = self.create_page(url=BROKEN_VIDEO_URL, live=False)
+
+        with self.assertLogs("ukgwa.utils.embeds", level="WARNING"):
+            page.save_revision().publish()
+
+        self.assertIsNone(get_stored_embed(BROKEN_VIDEO_URL))
+        self.assertEqual(self.client.get("/page/").status_code, 200)
+
+    def test_refresh_embeds_command_refreshes_stale_embeds(self):
+        self.create_page(live=False).save_revision().publish()
+        self.server.version = 2
+
+        call_command("refresh_embeds", stdout=StringIO())
+        self.assertEqual(get_stored_embed(VIDEO_URL).title, "Video 1")
+
+        Embed.objects.update(last_updated=timezone.now() - datetime.timedelta(days=10))
+        stdout = StringIO()
+        call_command("refresh_embeds", workers=2, stdout=stdout)
+
+        self.assertIn("Refreshed 1 embeds", stdout.getvalue())
+        self.assertEqual(get_stored_embed(VIDEO_URL).title, "Video 2")
+
+    def test_refresh_embeds_command_keeps_embeds_it_cannot_fetch(self):
+        self.create_page(live=False).save_revision().publish()
+        Embed.objects.update(cache_until=timezone.now())
+        self.server.broken = True
+
+        stderr = StringIO()
+        call_command("refresh_embeds", stdout=StringIO(), stderr=stderr)
+
+        self.assertIn(VIDEO_URL, stderr.getvalue())
+        self.assertEqual(get_stored_embed(VIDEO_URL).title, "Video 1")
+
+    def test_refreshing_an_unchanged_embed_keeps_cached_fragments(self):
+        self.create_page(live=False).save_revision().publish()
+        # The oEmbed response is the same, apart from the title
+        self.server.version = 2
+        self.server.html_version = 1
+
+        with (
+            mock.patch(
+                "ukgwa.utils.embeds.invalidate_fragments"
+            ) as invalidate_fragments,
+            mock.patch(
+                "ukgwa.utils.embeds.invalidate_page_cache"
+            ) as invalidate_page_cache,
+        ):
+            list(refresh_embeds([(VIDEO_URL, None, None)]))
+
+        self.assertEqual(get_stored_embed(VIDEO_URL).title, "Video 2")
+        invalidate_fragments.assert_not_called()
+        invalidate_page_cache.assert_not_called()
+
+    def test_refreshing_a_changed_embed_invalidates_its_fragments(self):
+        self.create_page(live=False).save_revision().publish()
+        response = self.client.get("/page/")
+        self.assertContains(response, 'title="v1"')
+        self.server.version = 2
+
+        with mock.patch(
+            "ukgwa.utils.embeds.invalidate_fragments", wraps=invalidate_fragments
+        ) as invalidate_fragments_mock:
+            list(refresh_embeds([(VIDEO_URL, None, None)]))
+
+        invalidate_fragments_mock.assert_called_once_with(
+            get_embed_cache_tag(VIDEO_URL)
+        )
+        response = self.client.get("/page/")
+        self.assertContains(response, 'title="v2"')
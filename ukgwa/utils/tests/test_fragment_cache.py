@@ -0,0 +1,157 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.images.tests.utils import get_test_image_file
+
+from ukgwa.core.models import CallToActionSnippet
+from ukgwa.home.models import HomePage
+from ukgwa.images.models import CustomImage
+from ukgwa.standardpages.factories import InformationPageFactory
+from ukgwa.standardpages.models import InformationPage
+
+from ..fragment_cache import get_stream_children
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class FragmentCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cta = CallToActionSnippet.objects.create(
+            title="Original CTA",
+            link=[
+                (
+                    "external_link",
+                    {"url": "https://example.com", "title": "Example"},
+                )
+            ],
+        )
+        self.page = HomePage.objects.get().add_child(
+            instance=InformationPageFactory.build(title="Page", slug="page", body=[])
+        )
+        self.page.body = [
+            ("paragraph", "<p>Some text</p>"),
+            ("call_to_action", self.cta),
+        ]
+        self.page.save_revision().publish()
+        self.page.refresh_from_db()
+
+    def get_cta_queries(self, response_callback):
+        """
+        Return the response and the queries loading call to action snippets
+        to render them.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = response_callback()
+        title_column = '"core_calltoactionsnippet"."title"'
+        return response, [q for q in queries if title_column in q["sql"]]
+
+    def get_children(self):
+        page = InformationPage.objects.get(pk=self.page.pk)
+        return get_stream_children(page.body, page.live_revision_id)
+
+    def test_blocks_are_rendered_from_the_cache(self):
+        response, queries = self.get_cta_queries(lambda: self.client.get("/page/"))
+        self.assertContains(response, "Original CTA")
+        self.assertContains(response, "Some text")
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.get_cta_queries(lambda: self.client.get("/page/"))
+        self.assertContains(response, "Original CTA")
+        self.assertContains(response, "Some text")
+        self.assertEqual(queries, [])
+
+    def test_renditions_only_prefetched_for_blocks_not_cached(self):
+        image = CustomImage.objects.create(title="Image", file=get_test_image_file())
+        self.page.body = [("image", {"image": image})]
+        self.page.save_revision().publish()
+        rendition_table = image.renditions.model._meta.db_table
+        self.client.get("/page/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/page/")
+
+        self.assertContains(response, "<picture")
+        self.assertFalse([q for q in queries if rendition_table in q["sql"]])
+        self.assertFalse([q for q in queries if CustomImage._meta.db_table in q["sql"]])
+
+    def test_cached_blocks_keep_the_response_cache_tags(self):
+        self.client.get("/page/")
+        response = self.client.get("/page/")
+        self.assertIn(f"core.calltoactionsnippet-{self.cta.pk}", response["Cache-Tag"])
+
+    def test_editing_a_snippet_only_invalidates_its_blocks(self):
+        self.client.get("/page/")
+
+        self.cta.title = "Updated CTA"
+        self.cta.save()
+
+        paragraph, call_to_action = self.get_children()
+        self.assertIn("Some text", paragraph.html)
+        self.assertIsNone(call_to_action.html)
+        self.assertContains(self.client.get("/page/"), "Updated CTA")
+
+    def test_editing_an_image_invalidates_snippets_displaying_it(self):
+        image = CustomImage.objects.create(title="Image", file=get_test_image_file())
+        self.cta.image = image
+        self.cta.save()
+        self.client.get("/page/")
+
+        image.title = "Updated image"
+        image.save()
+
+        paragraph, call_to_action = self.get_children()
+        self.assertIsNotNone(paragraph.html)
+        self.assertIsNone(call_to_action.html)
+
+    def test_publishing_a_revision_uses_new_fragments(self):
+        self.client.get("/page/")
+
+        self.page.body = [("paragraph", "<p>Other text</p>")]
+        self.page.save_revision().publish()
+
+        response = self.client.get("/page/")
+        self.assertContains(response, "Other text")
+        self.assertNotContains(response, "Some text")
+
+    def test_fragments_arent_shared_between_releases(self):
+        with self.settings(RELEASE_VERSION="abc123"):
+            self.client.get("/page/")
+            self.assertTrue(all(child.html for child in self.get_children()))
+
+        with self.settings(RELEASE_VERSION="def456"):
+            self.assertFalse(any(child.html for child in self.get_children()))
+
+    def test_nothing_is_cached_without_a_revision(self):
+        page = InformationPage.objects.get(pk=self.page.pk)
+        children = get_stream_children(page.body)
+
+        self.assertEqual(
+            [child.block_type for child in children], ["paragraph", "call_to_action"]
+        )
+        self.assertTrue(all(child.cache_key is None for child in children))
+
+    def test_previews_are_not_cached(self):
+        self.client.force_login(
+            get_user_model().objects.create_superuser(
+                username="admin", email="admin@example.com", password="password"
+            )
+        )
+        self.page.body = [("paragraph", "<p>Draft text</p>")]
+        self.page.save_revision()
+
+        response = self.client.get(f"/admin/pages/{self.page.pk}/view_draft/")
+        self.assertContains(response, "Draft text")
+
+        paragraph, call_to_action = self.get_children()
+        self.assertIsNone(paragraph.html)
+        self.assertIsNone(call_to_action.html)
@@ -0,0 +1,173 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import InformationPageFactory
+
+from ..instrumentation import (
+    SERVER_TIMING_HEADER,
+    Histogram,
+    get_prometheus_metrics,
+    histograms,
+    log_histograms,
+    timed,
+)
+
+
+def parse_server_timing(header):
+    stages = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        stages[name] = dict(param.split("=", 1) for param in params)
+    return stages
+
+
+@override_settings(
+    INSTRUMENTATION_ENABLED=True,
+    INSTRUMENTATION_LOG_INTERVAL=0,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class InstrumentationMiddlewareTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        histograms.pop()
+        HomePage.objects.get().add_child(
+            instance=InformationPageFactory.build(title="Info", slug="info", body=[])
+        )
+        self.staff_user = get_user_model().objects.create_user(
+            username="staff", password="password", is_staff=True
+        )
+
+    def test_server_timing_is_sent_to_staff(self):
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get("/info/")
+
+        stages = parse_server_timing(response[SERVER_TIMING_HEADER])
+        for stage in ["sql", "render", "navigation", "settings", "total"]:
+            self.assertIn(stage, stages)
+        self.assertGreater(float(stages["total"]["dur"]), 0)
+
+    def test_server_timing_is_not_sent_to_visitors(self):
+        response = self.client.get("/info/")
+
+        self.assertNotIn(SERVER_TIMING_HEADER, response)
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_is_sent_to_visitors_in_debug(self):
+        response = self.client.get("/info/")
+
+        self.assertIn(SERVER_TIMING_HEADER, response)
+
+    @override_settings(DEBUG=True)
+    async def test_server_timing_under_asgi(self):
+        response = await self.async_client.get("/info/")
+
+        # Queries run in the view's thread are timed
+        stages = parse_server_timing(response[SERVER_TIMING_HEADER])
+        self.assertIn("sql", stages)
+        self.assertIn("render", stages)
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get("/info/")
+
+        self.assertNotIn(SERVER_TIMING_HEADER, response)
+        self.assertEqual(histograms.copy(), {})
+
+    def test_timings_recorded_per_page_type(self):
+        self.client.get("/info/")
+        self.client.get("/info/")
+        self.client.get("/does-not-exist/")
+
+        recorded = histograms.copy()
+        self.assertEqual(recorded["standardpages.informationpage", "total"].count, 2)
+        self.assertEqual(recorded["standardpages.informationpage", "sql"].count, 2)
+        self.assertEqual(recorded["not-found", "total"].count, 1)
+
+    def test_histograms_are_logged(self):
+        self.client.get("/info/")
+
+        with self.assertLogs("ukgwa.utils.instrumentation", "INFO") as logs:
+            log_histograms()
+
+        logged = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logged["event"], "request_timings")
+        total = logged["routes"]["standardpages.informationpage"]["total"]
+        self.assertEqual(total["count"], 1)
+        self.assertEqual(total["buckets"]["+Inf"], 1)
+
+        # Only what was recorded since is logged next time
+        with self.assertNoLogs("ukgwa.utils.instrumentation", "INFO"):
+            log_histograms()
+
+    def test_metrics_for_staff(self):
+        self.client.get("/info/")
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get("/metrics/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            'ukgwa_request_stage_seconds_count{route="standardpages.informationpage",'
+            'stage="total"} 1',
+        )
+
+    @override_settings(INSTRUMENTATION_METRICS_TOKEN="secret")
+    def test_metrics_with_token(self):
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_metrics_disabled(self):
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get("/metrics/")
+
+        self.assertEqual(response.status_code, 404)
+
+
+class InstrumentationTestCase(SimpleTestCase):
+    def test_timed_outside_a_request(self):
+        with timed("stage"):
+            pass
+
+        @timed("stage")
+        def func():
+            return "result"
+
+        self.assertEqual(func(), "result")
+
+    def test_histogram_buckets(self):
+        histogram = Histogram()
+        for value in [0.001, 0.005, 0.3, 20]:
+            histogram.observe(value)
+
+        buckets = dict(histogram.get_cumulative_buckets())
+        self.assertEqual(buckets[0.005], 2)
+        self.assertEqual(buckets[0.25], 2)
+        self.assertEqual(buckets[0.5], 3)
+        self.assertEqual(buckets[float("inf")], 4)
+        self.assertEqual(histogram.count, 4)
+
+    def test_prometheus_metrics_header(self):
+        metrics = get_prometheus_metrics()
+
+        self.assertIn("# TYPE ukgwa_request_stage_seconds histogram", metrics)
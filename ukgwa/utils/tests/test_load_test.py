@@ -0,0 +1,67 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..management.commands.load_test import percentile
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requested_paths.append(self.path)
+        status = 500 if self.path == "/error/" else 200
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(b"<p>Page</p>")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LoadTestCommandTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requested_paths = []
+
+    def test_report(self):
+        stdout = StringIO()
+        call_command(
+            "load_test",
+            f"{self.base_url}/",
+            f"{self.base_url}/error/",
+            concurrency=4,
+            requests=20,
+            warmup=2,
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("20 requests", output)
+        self.assertIn("10 errors", output)
+        self.assertIn("Throughput:", output)
+        self.assertIn("p99", output)
+        # Requests are shared between the URLs, after warming up
+        self.assertEqual(self.server.requested_paths.count("/"), 11)
+        self.assertEqual(self.server.requested_paths.count("/error/"), 11)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([0.5], 99), 0.5)
+        self.assertEqual(percentile([], 99), 0.0)
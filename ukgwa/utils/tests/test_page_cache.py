@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtail.models import PageViewRestriction, Site
+
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import InformationPageFactory
+
+from ..page_cache import PAGE_CACHE_HEADER, get_page_cache_key
+
+
+@override_settings(
+    PAGE_CACHE_ENABLED=True,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class PageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.page = HomePage.objects.get().add_child(
+            instance=InformationPageFactory.build(title="Info", slug="info", body=[])
+        )
+
+    def test_second_anonymous_request_is_served_from_cache(self):
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "miss")
+
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "hit")
+        self.assertContains(response, "Info")
+        # Cache headers are still applied to cached responses
+        self.assertIn("public", response["Cache-Control"])
+
+    def test_utm_parameters_share_cache_entry(self):
+        self.client.get("/info/?utm_source=newsletter")
+
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "hit")
+
+    def test_querystring_is_part_of_the_key(self):
+        self.client.get("/info/")
+
+        response = self.client.get("/info/?page=2")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "miss")
+
+    def test_publishing_invalidates_cache(self):
+        self.client.get("/info/")
+
+        self.page.title = "Updated"
+        self.page.save_revision().publish()
+
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "miss")
+        self.assertContains(response, "Updated")
+
+    def test_stale_entry_served_while_another_worker_regenerates(self):
+        with override_settings(PAGE_CACHE_TIMEOUT=-1):
+            self.client.get("/info/")
+
+        # Simulate another worker holding the regeneration lock
+        key = get_page_cache_key(RequestFactory().get("/info/"), Site.objects.get())
+        cache.add(f"{key}:lock", 1)
+
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "stale")
+
+        cache.delete(f"{key}:lock")
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "miss")
+
+    def test_invalidated_entry_served_while_another_worker_regenerates(self):
+        self.client.get("/info/")
+        self.page.title = "Updated"
+        self.page.save_revision().publish()
+
+        key = get_page_cache_key(RequestFactory().get("/info/"), Site.objects.get())
+        cache.add(f"{key}:lock", 1)
+
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "stale")
+        self.assertNotContains(response, "Updated")
+
+        cache.delete(f"{key}:lock")
+        response = self.client.get("/info/")
+        self.assertEqual(response[PAGE_CACHE_HEADER], "miss")
+        self.assertContains(response, "Updated")
+
+    def test_logged_in_users_bypass_cache(self):
+        user = get_user_model().objects.create_user(
+            username="editor", password="password"  # pragma: allowlist secret
+        )
+        self.client.force_login(user)
+
+        self.client.get("/info/")
+        response = self.client.get("/info/")
+        self.assertNotIn(PAGE_CACHE_HEADER, response)
+
+    def test_restricted_pages_are_not_cached(self):
+        PageViewRestriction.objects.create(
+            page=self.page,
+            restriction_type=PageViewRestriction.PASSWORD,
+            password="password",  # pragma: allowlist secret
+        )
+
+        self.client.get("/info/")
+        response = self.client.get("/info/")
+        self.assertNotIn(PAGE_CACHE_HEADER, response)
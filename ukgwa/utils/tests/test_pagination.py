@@ -0,0 +1,119 @@
+from django.test import TestCase
+
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import InformationPageFactory
+from ukgwa.standardpages.models import InformationPage
+
+from ..pagination import KeysetPaginator, decode_cursor, encode_cursor
+
+
+class CursorTestCase(TestCase):
+    def test_round_trip(self):
+        cursor = encode_cursor(["Título & more", 12])
+        self.assertEqual(decode_cursor(cursor, 2), ["Título & more", 12])
+
+    def test_invalid_cursors(self):
+        for cursor in ["", "not base64!", encode_cursor([1]), encode_cursor({})]:
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor, 2))
+
+    def test_cursors_with_invalid_values(self):
+        for values in [[{}, 1], ["A", [1]], ["A", None]]:
+            with self.subTest(values=values):
+                self.assertIsNone(decode_cursor(encode_cursor(values), 2))
+
+    def test_cursors_with_values_out_of_range(self):
+        for values in [
+            ["A", float("inf")],
+            ["A", float("nan")],
+            ["A", 99999999999999999999999],
+        ]:
+            with self.subTest(values=values):
+                self.assertIsNone(decode_cursor(encode_cursor(values), 2))
+
+        self.assertEqual(decode_cursor(encode_cursor(["A", 1e300]), 2), ["A", 1e300])
+
+
+class KeysetPaginatorTestCase(TestCase):
+    def setUp(self):
+        home = HomePage.objects.get()
+        # Duplicate titles are ordered by pk
+        self.pages = [
+            home.add_child(
+                instance=InformationPageFactory.build(title=title, slug=f"page-{i}")
+            )
+            for i, title in enumerate(["A", "B", "B", "B", "C", "D", "E"])
+        ]
+        self.queryset = InformationPage.objects.all()
+
+    def test_pages_forward_and_backward(self):
+        paginator = KeysetPaginator(self.queryset, per_page=3)
+
+        page_1 = paginator.get_page()
+        self.assertEqual(page_1.object_list, self.pages[:3])
+        self.assertEqual(page_1.number, 1)
+        self.assertFalse(page_1.has_previous)
+        self.assertTrue(page_1.has_next)
+
+        page_2 = paginator.get_page(2, after=page_1.next_cursor)
+        self.assertEqual(page_2.object_list, self.pages[3:6])
+        self.assertEqual(page_2.number, 2)
+        self.assertTrue(page_2.has_previous)
+        self.assertTrue(page_2.has_next)
+
+        page_3 = paginator.get_page(3, after=page_2.next_cursor)
+        self.assertEqual(page_3.object_list, self.pages[6:])
+        self.assertEqual(page_3.number, 3)
+        self.assertFalse(page_3.has_next)
+
+        previous = paginator.get_page(2, before=page_3.previous_cursor)
+        self.assertEqual(previous.object_list, page_2.object_list)
+        self.assertTrue(previous.has_previous)
+
+        first = paginator.get_page(1, before=previous.previous_cursor)
+        self.assertEqual(first.object_list, page_1.object_list)
+        self.assertFalse(first.has_previous)
+
+    def test_seeking_doesnt_count_or_offset(self):
+        paginator = KeysetPaginator(self.queryset, per_page=3, count=7)
+        cursor = paginator.get_cursor(self.pages[2])
+
+        with self.assertNumQueries(1) as context:
+            page = paginator.get_page(2, after=cursor)
+        self.assertEqual(page.object_list, self.pages[3:6])
+        self.assertNotIn("OFFSET", context.captured_queries[0]["sql"])
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_page_number_without_cursor_falls_back_to_offset(self):
+        paginator = KeysetPaginator(self.queryset, per_page=3)
+
+        self.assertEqual(paginator.get_page("2").object_list, self.pages[3:6])
+        self.assertEqual(paginator.get_page("99").object_list, self.pages[6:])
+        self.assertEqual(paginator.get_page("nope").object_list, self.pages[:3])
+        self.assertEqual(
+            paginator.get_page(after="invalid").object_list, self.pages[:3]
+        )
+
+    def test_cursor_values_of_the_wrong_type_are_ignored(self):
+        paginator = KeysetPaginator(self.queryset, per_page=3)
+
+        for values in [["A", "not a pk"], [{}, 1]]:
+            with self.subTest(values=values):
+                page = paginator.get_page(after=encode_cursor(values))
+                self.assertEqual(page.object_list, self.pages[:3])
+
+        # Values are converted to the type of their field
+        page = paginator.get_page(after=encode_cursor(["A", str(self.pages[0].pk)]))
+        self.assertEqual(page.object_list, self.pages[1:4])
+
+    def test_cursor_values_out_of_range_are_ignored(self):
+        paginator = KeysetPaginator(self.queryset, per_page=3)
+
+        for values in [
+            ["A", float("inf")],
+            ["A", 1e300],
+            ["A", 99999999999999999999999],
+        ]:
+            with self.subTest(values=values):
+                page = paginator.get_page(after=encode_cursor(values))
+                self.assertEqual(page.object_list, self.pages[:3])
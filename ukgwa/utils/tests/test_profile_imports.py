@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..management.commands.profile_imports import (
+    ImportTime,
+    get_package_times,
+    parse_import_times,
+)
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     django.utils.version
+import time:       300 |        420 |   django.utils
+import time:       500 |        920 | django
+import time:        80 |         80 |   wagtail.coreutils
+import time:       900 |        980 | wagtail
+Unrelated warning
+"""
+
+
+class ProfileImportsTestCase(SimpleTestCase):
+    def test_parse_import_times(self):
+        import_times = parse_import_times(IMPORTTIME_OUTPUT)
+
+        self.assertEqual(len(import_times), 5)
+        self.assertEqual(import_times[0], ImportTime("django.utils.version", 120, 120))
+        self.assertEqual(import_times[2], ImportTime("django", 500, 920))
+
+    def test_get_package_times(self):
+        package_times = get_package_times(parse_import_times(IMPORTTIME_OUTPUT))
+
+        self.assertEqual(package_times, [("wagtail", 980), ("django", 920)])
+
+    def test_command(self):
+        stdout = StringIO()
+
+        call_command("profile_imports", limit=5, stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertRegex(output, r"Imported \d+ modules in \d+ms")
+        self.assertIn("  django\n", output)
@@ -0,0 +1,91 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from wagtail.models import Page, Revision
+
+from ukgwa.standardpages.factories import InformationPageFactory
+from ukgwa.standardpages.models import InformationPage
+
+from ..query import bulk_update_from_values, fetch_in_pk_order, order_by_pk_position
+
+
+class OrderedFetchTestCase(TestCase):
+    def setUp(self):
+        self.pages = InformationPageFactory.create_batch(4)
+
+    def test_fetch_in_pk_order(self):
+        p1, p2, p3, p4 = self.pages
+        pks = [p3.pk, p1.pk, p4.pk, p2.pk]
+
+        with self.assertNumQueries(1):
+            result = fetch_in_pk_order(InformationPage.objects.all(), pks)
+        self.assertEqual(result, [p3, p1, p4, p2])
+
+    def test_fetch_in_pk_order_skips_missing_and_duplicate_pks(self):
+        p1, p2, p3, p4 = self.pages
+        pks = [p2.pk, 0, p1.pk, p2.pk]
+
+        result = fetch_in_pk_order(InformationPage.objects.exclude(pk=p1.pk), pks)
+        self.assertEqual(result, [p2])
+
+    def test_fetch_in_pk_order_without_pks(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(fetch_in_pk_order(Page.objects.all(), []), [])
+
+    def test_fetch_in_pk_order_matches_order_by_pk_position(self):
+        pks = [page.pk for page in reversed(self.pages)]
+        queryset = Page.objects.all()
+
+        self.assertEqual(
+            fetch_in_pk_order(queryset, pks),
+            list(order_by_pk_position(queryset, pks, exclude_non_matches=True)),
+        )
+
+
+class BulkUpdateFromValuesTestCase(TestCase):
+    def test_bulk_update_from_values(self):
+        pages = InformationPageFactory.create_batch(3)
+        reading_time = pages[2].reading_time
+        for i, page in enumerate(pages):
+            page.reading_time = 10 + i
+
+        with self.assertNumQueries(1):
+            bulk_update_from_values(InformationPage, pages[:2], ["reading_time"])
+
+        self.assertEqual(
+            list(
+                InformationPage.objects.filter(pk__in=[page.pk for page in pages])
+                .order_by("pk")
+                .values_list("reading_time", flat=True)
+            ),
+            [10, 11, reading_time],
+        )
+
+    def test_json_field(self):
+        page_content_type = ContentType.objects.get_for_model(Page)
+        revision = Revision.objects.create(
+            content_type=page_content_type,
+            base_content_type=page_content_type,
+            object_id=str(Page.get_first_root_node().pk),
+            content={"title": "Draft"},
+        )
+        revision.content = {"title": "Draft", "comments": [{"text": "Updated"}]}
+
+        bulk_update_from_values(Revision, [revision], ["content"])
+
+        revision.refresh_from_db()
+        self.assertEqual(
+            revision.content, {"title": "Draft", "comments": [{"text": "Updated"}]}
+        )
+
+    def test_parent_model_fields(self):
+        page = InformationPageFactory()
+        page.title = "Updated"
+        page.reading_time = 5
+
+        # Like `bulk_update()`, which updates each table separately
+        bulk_update_from_values(InformationPage, [page], ["title", "reading_time"])
+
+        page.refresh_from_db()
+        self.assertEqual(page.title, "Updated")
+        self.assertEqual(page.reading_time, 5)
@@ -0,0 +1,126 @@
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from wagtail.models import Page
+
+from asgiref.sync import sync_to_async
+
+from ..query_detector import (
+    QueryDetector,
+    QueryDetectorMiddleware,
+    RepeatedQueriesError,
+    normalize_sql,
+)
+
+
+class NormalizeSQLTestCase(SimpleTestCase):
+    def test_parameters_are_removed(self):
+        self.assertEqual(
+            normalize_sql(
+                'SELECT "id" FROM "page"  WHERE "id" IN (%s, %s, %s)\n'
+                "AND \"slug\" = 'home' LIMIT 21"
+            ),
+            'SELECT "id" FROM "page" WHERE "id" IN (...) AND "slug" = ? LIMIT ?',
+        )
+
+    def test_in_lists_of_any_length_match(self):
+        self.assertEqual(
+            normalize_sql('SELECT 1 FROM "page" WHERE "id" IN (%s)'),
+            normalize_sql('SELECT 1 FROM "page" WHERE "id" IN (%s, %s)'),
+        )
+
+
+@override_settings(QUERY_DETECTOR_THRESHOLD=3, QUERY_DETECTOR_SLOW_QUERY_MS=1000)
+class QueryDetectorTestCase(TestCase):
+    def get_page(self, pk):
+        return Page.objects.filter(pk=pk).first()
+
+    def test_repeated_queries_from_the_same_place(self):
+        with QueryDetector() as detector:
+            for pk in range(3):
+                self.get_page(pk)
+
+        [repeated] = detector.get_repeated_queries()
+        self.assertEqual(repeated.count, 3)
+        self.assertIn('FROM "wagtailcore_page"', repeated.sql)
+        self.assertIn("in get_page", repeated.call_site[0])
+
+    def test_queries_below_the_threshold(self):
+        with QueryDetector() as detector:
+            for pk in range(2):
+                self.get_page(pk)
+
+        self.assertEqual(detector.get_repeated_queries(), [])
+
+    def test_queries_from_different_places(self):
+        with QueryDetector() as detector:
+            self.get_page(1)
+            self.get_page(2)
+            Page.objects.filter(pk=3).first()
+
+        self.assertEqual(detector.get_repeated_queries(), [])
+
+    def test_template_call_site(self):
+        template = Template(
+            "{% for pk in pks %}\n{{ pages.get.title }}\n{% endfor %}",
+        )
+        context = Context({"pks": range(3), "pages": Page.objects.filter(depth=1)})
+        with QueryDetector() as detector:
+            template.render(context)
+
+        [repeated] = detector.get_repeated_queries()
+        self.assertIn("<unknown source>:2", repeated.call_site)
+
+    def test_check_raises(self):
+        with QueryDetector() as detector:
+            for pk in range(3):
+                self.get_page(pk)
+
+        with self.assertRaisesRegex(RepeatedQueriesError, "Repeated 3 times"):
+            detector.check(raise_error=True)
+
+    def test_check_logs(self):
+        with QueryDetector() as detector:
+            for pk in range(3):
+                self.get_page(pk)
+
+        with self.assertLogs("ukgwa.utils.query_detector", "WARNING") as logs:
+            detector.check("Pages", raise_error=False)
+
+        self.assertIn("Pages: 3 queries", logs.output[0])
+
+    def test_slow_queries_are_logged(self):
+        with QueryDetector(slow_query_ms=0) as detector:
+            self.get_page(1)
+
+        with self.assertLogs("ukgwa.utils.query_detector", "WARNING") as logs:
+            detector.check()
+
+        self.assertIn("Slow", logs.output[0])
+
+    @override_settings(QUERY_DETECTOR_ENABLED=True, QUERY_DETECTOR_RAISE=False)
+    def test_middleware(self):
+        def get_response(request):
+            for pk in range(3):
+                self.get_page(pk)
+            return HttpResponse()
+
+        middleware = QueryDetectorMiddleware(get_response)
+        with self.assertLogs("ukgwa.utils.query_detector", "WARNING") as logs:
+            middleware(RequestFactory().get("/listing/"))
+
+        self.assertIn("GET /listing/: 3 queries", logs.output[0])
+
+    @override_settings(QUERY_DETECTOR_ENABLED=True, QUERY_DETECTOR_RAISE=False)
+    async def test_async_middleware(self):
+        async def get_response(request):
+            for pk in range(3):
+                await sync_to_async(self.get_page)(pk)
+            return HttpResponse()
+
+        middleware = QueryDetectorMiddleware(get_response)
+        with self.assertLogs("ukgwa.utils.query_detector", "WARNING") as logs:
+            await middleware(RequestFactory().get("/listing/"))
+
+        self.assertIn("GET /listing/: 3 queries", logs.output[0])
@@ -0,0 +1,254 @@
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from botocore.response import StreamingBody
+
+from ukgwa.images.factories import CustomImageFactory
+
+from ..s3_sync import MANIFEST_NAME, Manifest, S3Object, sync_bucket
+
+
+class FakeS3Client:
+    """
+    The parts of a boto3 S3 client used by `sync_bucket`, listing objects
+    two per page.
+    """
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.downloaded_keys = []
+        self.failing_keys = set()
+
+    def get_etag(self, key):
+        return hashlib.md5(self.objects[key]).hexdigest()
+
+    def get_paginator(self, operation_name):
+        assert operation_name == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix=""):
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        for start in range(0, len(keys), 2):
+            end = start + 2
+            yield {
+                "Contents": [
+                    {
+                        "Key": key,
+                        "Size": len(self.objects[key]),
+                        "ETag": f'"{self.get_etag(key)}"',
+                    }
+                    for key in keys[start:end]
+                ]
+            }
+
+    def get_object(self, Bucket, Key):
+        self.downloaded_keys.append(Key)
+        data = self.objects[Key]
+        if Key in self.failing_keys:
+            # The connection drops halfway through
+            data = data[: len(data) // 2]
+        return {"Body": StreamingBody(io.BytesIO(data), len(self.objects[Key]))}
+
+
+class S3SyncTestCase(SimpleTestCase):
+    def setUp(self):
+        temporary_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_dir.cleanup)
+        self.local_dir = Path(temporary_dir.name)
+        self.client = FakeS3Client(
+            {
+                "original_images/a.jpg": b"image a",
+                "original_images/b.jpg": b"image b",
+                "original_images/c.jpg": b"image c",
+                "images/a.width-400.jpg": b"rendition a",
+                "documents/report.pdf": b"report",
+            }
+        )
+
+    def sync(self, **kwargs):
+        results = list(sync_bucket(self.client, "bucket", self.local_dir, **kwargs))
+        return {result.obj.key: result.status for result in results}
+
+    def test_sync(self):
+        statuses = self.sync()
+
+        self.assertEqual(set(statuses.values()), {"downloaded"})
+        self.assertEqual(len(statuses), 5)
+        self.assertEqual(
+            (self.local_dir / "original_images" / "a.jpg").read_bytes(), b"image a"
+        )
+        self.assertEqual(
+            (self.local_dir / "documents" / "report.pdf").read_bytes(), b"report"
+        )
+
+    def test_files_are_only_downloaded_once(self):
+        self.sync()
+        self.client.downloaded_keys = []
+
+        statuses = self.sync()
+
+        self.assertEqual(set(statuses.values()), {"skipped"})
+        self.assertEqual(self.client.downloaded_keys, [])
+
+    def test_changed_files_are_downloaded(self):
+        self.sync()
+        self.client.objects["original_images/b.jpg"] = b"new image b"
+        self.client.objects["original_images/c.jpg"] = b"image C"
+
+        statuses = self.sync()
+
+        self.assertEqual(statuses["original_images/a.jpg"], "skipped")
+        self.assertEqual(statuses["original_images/b.jpg"], "downloaded")
+        self.assertEqual(statuses["original_images/c.jpg"], "downloaded")
+        self.assertEqual(
+            (self.local_dir / "original_images" / "c.jpg").read_bytes(), b"image C"
+        )
+
+    def test_files_matching_their_etag_are_not_downloaded(self):
+        # e.g. synced by `aws s3 sync`, without a manifest
+        path = self.local_dir / "original_images" / "a.jpg"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"image a")
+
+        statuses = self.sync(prefix="original_images/")
+
+        self.assertEqual(statuses["original_images/a.jpg"], "skipped")
+        self.assertEqual(statuses["original_images/b.jpg"], "downloaded")
+        manifest = Manifest(self.local_dir / MANIFEST_NAME)
+        manifest.load()
+        self.assertTrue(
+            manifest.matches(
+                S3Object(
+                    "original_images/a.jpg",
+                    7,
+                    self.client.get_etag("original_images/a.jpg"),
+                )
+            )
+        )
+
+    def test_interrupted_downloads_are_retried(self):
+        self.client.failing_keys = {"original_images/b.jpg"}
+
+        statuses = self.sync()
+
+        self.assertEqual(statuses["original_images/b.jpg"], "failed")
+        # Neither the partial file nor a manifest entry are left
+        self.assertEqual(
+            sorted(
+                path.name for path in (self.local_dir / "original_images").iterdir()
+            ),
+            ["a.jpg", "c.jpg"],
+        )
+
+        self.client.failing_keys = set()
+        self.client.downloaded_keys = []
+        statuses = self.sync()
+
+        self.assertEqual(self.client.downloaded_keys, ["original_images/b.jpg"])
+
+    def test_resume_from_manifest_of_interrupted_run(self):
+        results = sync_bucket(self.client, "bucket", self.local_dir, workers=1)
+        next(results)
+        # Stop the sync, as if interrupted
+        results.close()
+        downloaded_keys = set(self.client.downloaded_keys)
+        self.client.downloaded_keys = []
+
+        self.sync()
+
+        self.assertEqual(len(self.client.downloaded_keys), 5 - len(downloaded_keys))
+        self.assertFalse(downloaded_keys & set(self.client.downloaded_keys))
+
+    def test_keys_and_delete(self):
+        unreferenced = self.local_dir / "original_images" / "old.jpg"
+        unreferenced.parent.mkdir(parents=True)
+        unreferenced.write_bytes(b"old image")
+        other = self.local_dir / "documents" / "local.pdf"
+        other.parent.mkdir(parents=True)
+        other.write_bytes(b"local document")
+
+        statuses = self.sync(
+            prefix="original_images/",
+            keys={"original_images/a.jpg", "original_images/c.jpg"},
+            delete=True,
+        )
+
+        self.assertEqual(
+            statuses,
+            {
+                "original_images/a.jpg": "downloaded",
+                "original_images/c.jpg": "downloaded",
+            },
+        )
+        self.assertFalse(unreferenced.exists())
+        # Outside of the prefix
+        self.assertTrue(other.exists())
+
+
+class SyncMediaFromS3CommandTestCase(TestCase):
+    def setUp(self):
+        temporary_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_dir.cleanup)
+        self.media_root = Path(temporary_dir.name)
+        settings_override = override_settings(
+            MEDIA_ROOT=temporary_dir.name,
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+                "staticfiles": {
+                    "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+                },
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.image = CustomImageFactory()
+        self.client = FakeS3Client(
+            {
+                self.image.file.name: b"image",
+                "original_images/deleted.jpg": b"deleted image",
+                "images/rendition.jpg": b"rendition",
+            }
+        )
+        patcher = mock.patch("boto3.client", return_value=self.client)
+        self.boto3_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_originals_only(self):
+        stdout = io.StringIO()
+
+        call_command(
+            "sync_media_from_s3",
+            "bucket",
+            originals_only=True,
+            endpoint_url="http://localhost:9000",
+            stdout=stdout,
+        )
+
+        self.boto3_client.assert_called_once_with(
+            "s3", endpoint_url="http://localhost:9000"
+        )
+        self.assertEqual(self.client.downloaded_keys, [self.image.file.name])
+        self.assertEqual(
+            (self.media_root / self.image.file.name).read_bytes(), b"image"
+        )
+        self.assertIn("1 files in ", stdout.getvalue())
+
+    def test_failures(self):
+        self.client.failing_keys = {"images/rendition.jpg"}
+
+        with self.assertRaisesMessage(CommandError, "1 files couldn't be downloaded"):
+            call_command(
+                "sync_media_from_s3",
+                "bucket",
+                stdout=io.StringIO(),
+                stderr=io.StringIO(),
+            )
+
+        self.assertTrue((self.media_root / "original_images" / "deleted.jpg").exists())
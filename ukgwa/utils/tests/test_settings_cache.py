@@ -0,0 +1,142 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtail.models import Site
+
+from ukgwa.core.models import SocialMediaSettings, Tracking
+from ukgwa.navigation.models import NavigationSettings
+
+from ..settings_cache import (
+    SITE_SETTINGS_CACHE_VERSION_KEY,
+    LocalCache,
+    get_site_setting,
+    get_site_settings,
+    local_cache,
+)
+
+
+class SiteSettingsCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.site = Site.objects.get()
+        Tracking.objects.create(site=self.site, google_tag_manager_id="GTM-1")
+
+    def get_request(self):
+        request = RequestFactory().get("/")
+        request.META["HTTP_HOST"] = self.site.hostname
+        return request
+
+    def test_loads_every_site_setting(self):
+        site_settings = get_site_settings(self.site)
+
+        self.assertEqual(site_settings["core.tracking"].google_tag_manager_id, "GTM-1")
+        self.assertIsInstance(
+            site_settings["navigation.navigationsettings"], NavigationSettings
+        )
+        # Missing settings are created with their default values
+        self.assertTrue(SocialMediaSettings.objects.filter(site=self.site).exists())
+
+    def test_settings_are_cached(self):
+        get_site_settings(self.site)
+
+        with self.assertNumQueries(0):
+            tracking = get_site_setting(Tracking, self.site)
+        self.assertEqual(tracking.google_tag_manager_id, "GTM-1")
+
+    def test_saving_a_setting_invalidates_the_cache(self):
+        get_site_settings(self.site)
+
+        tracking = Tracking.objects.get()
+        tracking.google_tag_manager_id = "GTM-2"
+        tracking.save()
+
+        tracking = get_site_setting(Tracking, self.site)
+        self.assertEqual(tracking.google_tag_manager_id, "GTM-2")
+
+    @override_settings(SITE_SETTINGS_LOCAL_CACHE_TIMEOUT=60)
+    def test_local_cache_avoids_the_shared_cache(self):
+        get_site_settings(self.site)
+
+        with mock.patch(
+            "ukgwa.utils.settings_cache.cache", wraps=cache
+        ) as shared_cache:
+            get_site_settings(self.site)
+        # Only the version is fetched
+        shared_cache.get_or_set.assert_called_once()
+        shared_cache.get.assert_not_called()
+
+    @override_settings(SITE_SETTINGS_LOCAL_CACHE_TIMEOUT=60)
+    def test_local_cache_follows_the_shared_version(self):
+        get_site_settings(self.site)
+        Tracking.objects.update(google_tag_manager_id="GTM-2")
+
+        # As another process saving a setting would, without clearing the
+        # local cache of this one
+        cache.incr(SITE_SETTINGS_CACHE_VERSION_KEY)
+
+        tracking = get_site_setting(Tracking, self.site)
+        self.assertEqual(tracking.google_tag_manager_id, "GTM-2")
+
+    @override_settings(SITE_SETTINGS_LOCAL_CACHE_TIMEOUT=60)
+    def test_version_is_fetched_once_per_request(self):
+        request = self.get_request()
+
+        with mock.patch(
+            "ukgwa.utils.settings_cache.cache", wraps=cache
+        ) as shared_cache:
+            get_site_setting(Tracking, request)
+            get_site_setting(SocialMediaSettings, request)
+        shared_cache.get_or_set.assert_called_once()
+
+    def test_setting_is_memoized_on_request(self):
+        request = self.get_request()
+        tracking = get_site_setting(Tracking, request)
+
+        self.assertIs(get_site_setting(Tracking, request), tracking)
+        self.assertIs(Tracking.for_request(request), tracking)
+        self.assertIs(tracking._request, request)
+        # The cached instance is left untouched
+        self.assertFalse(hasattr(get_site_setting(Tracking, self.site), "_request"))
+
+    def test_settings_template_variable(self):
+        template = engines["django"].from_string(
+            "{{ settings.core.Tracking.google_tag_manager_id }}"
+        )
+        get_site_settings(self.site)
+
+        request = self.get_request()
+        # Finding the site for the request
+        with self.assertNumQueries(1):
+            self.assertEqual(template.render({}, request), "GTM-1")
+
+
+class LocalCacheTestCase(TestCase):
+    def test_least_recently_used_items_are_evicted(self):
+        local_cache = LocalCache(max_size=2)
+        local_cache.set("a", 1, timeout=60)
+        local_cache.set("b", 2, timeout=60)
+        local_cache.get("a")
+        local_cache.set("c", 3, timeout=60)
+
+        self.assertEqual(local_cache.get("a"), 1)
+        self.assertIsNone(local_cache.get("b"))
+        self.assertEqual(local_cache.get("c"), 3)
+
+    def test_items_expire(self):
+        local_cache = LocalCache()
+        with mock.patch("time.monotonic", return_value=100):
+            local_cache.set("a", 1, timeout=10)
+
+        with mock.patch("time.monotonic", return_value=109):
+            self.assertEqual(local_cache.get("a"), 1)
+        with mock.patch("time.monotonic", return_value=110):
+            self.assertIsNone(local_cache.get("a"))
+
+    def test_zero_timeout_disables_cache(self):
+        local_cache = LocalCache()
+        local_cache.set("a", 1, timeout=0)
+        self.assertIsNone(local_cache.get("a"))
@@ -0,0 +1,178 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtail.models import PageViewRestriction, Site
+
+from ukgwa.home.models import HomePage
+from ukgwa.standardpages.factories import IndexPageFactory, InformationPageFactory
+
+from ..sitemaps import (
+    _get_shard_cache_key,
+    generate_sitemaps,
+    get_sitemap_index,
+    get_sitemap_shard,
+)
+from ..views import sitemap_index, sitemap_shard
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+)
+class SitemapTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.site = Site.objects.select_related("root_page").get()
+        self.home = HomePage.objects.get()
+        self.section = self.home.add_child(
+            instance=IndexPageFactory.build(title="Section", slug="section")
+        )
+        self.page = self.section.add_child(
+            instance=InformationPageFactory.build(title="Page", slug="page", body=[])
+        )
+        self.other_section = self.home.add_child(
+            instance=InformationPageFactory.build(title="Other", slug="other", body=[])
+        )
+
+    def get_shard_url(self, section, chunk=1):
+        return f"/sitemap-{section.pk}-{chunk}.xml"
+
+    def test_index_lists_a_shard_per_section(self):
+        response = self.client.get("/sitemap.xml")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/xml")
+        for section in [self.home, self.section, self.other_section]:
+            self.assertContains(
+                response, f"<loc>http://localhost{self.get_shard_url(section)}</loc>"
+            )
+
+    def test_shard_lists_live_public_pages_in_section(self):
+        unpublished = self.section.add_child(
+            instance=InformationPageFactory.build(
+                title="Draft", slug="draft", body=[], live=False
+            )
+        )
+
+        response = self.client.get(self.get_shard_url(self.section))
+
+        self.assertContains(response, "<loc>http://localhost/section/</loc>")
+        self.assertContains(response, "<loc>http://localhost/section/page/</loc>")
+        self.assertNotContains(response, unpublished.url_path)
+        self.assertNotContains(response, "/other/")
+
+    def test_unknown_section_or_chunk_is_not_found(self):
+        request = RequestFactory().get("/")
+        # Pages below sections don't have a shard
+        for section_id, chunk in [(9999, 1), (self.section.pk, 2), (self.page.pk, 1)]:
+            with self.subTest(section_id=section_id, chunk=chunk):
+                with self.assertRaises(Http404):
+                    sitemap_shard(request, section_id, chunk)
+
+    def test_unknown_sections_are_not_cached(self):
+        self.assertIsNone(get_sitemap_shard(self.site, 9999, 1))
+        self.assertIsNone(cache.get(_get_shard_cache_key(self.site, 9999, 1)))
+
+    def test_not_found_without_a_default_site(self):
+        Site.objects.update(hostname="example.com", is_default_site=False)
+        request = RequestFactory().get("/")
+
+        with self.assertRaises(Http404):
+            sitemap_index(request)
+        with self.assertRaises(Http404):
+            sitemap_shard(request, self.section.pk, 1)
+
+    def test_sitemaps_are_cached(self):
+        get_sitemap_index(self.site)
+        get_sitemap_shard(self.site, self.section.pk, 1)
+
+        with self.assertNumQueries(0):
+            get_sitemap_index(self.site)
+            get_sitemap_shard(self.site, self.section.pk, 1)
+
+    def test_conditional_requests(self):
+        self.page.save_revision().publish()
+
+        response = self.client.get(self.get_shard_url(self.section))
+        self.assertTrue(response["ETag"])
+        self.assertTrue(response["Last-Modified"])
+
+        response = self.client.get(
+            self.get_shard_url(self.section), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            self.get_shard_url(self.section),
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_publishing_invalidates_section_shards(self):
+        get_sitemap_shard(self.site, self.section.pk, 1)
+
+        new_page = self.section.add_child(
+            instance=InformationPageFactory.build(
+                title="New", slug="new", body=[], live=False
+            )
+        )
+        new_page.save_revision().publish()
+
+        shard = get_sitemap_shard(self.site, self.section.pk, 1)
+        self.assertIn("/section/new/", shard["xml"])
+
+    def test_unpublishing_invalidates_section_shards(self):
+        get_sitemap_shard(self.site, self.section.pk, 1)
+
+        self.page.unpublish()
+
+        shard = get_sitemap_shard(self.site, self.section.pk, 1)
+        self.assertNotIn("/section/page/", shard["xml"])
+
+    @mock.patch("ukgwa.utils.sitemaps.SITEMAP_CHUNK_SIZE", 1)
+    def test_only_the_chunks_which_changed_are_invalidated(self):
+        self.section.add_child(
+            instance=InformationPageFactory.build(title="Last", slug="last", body=[])
+        )
+        generate_sitemaps(self.site)
+        keys = [_get_shard_cache_key(self.site, self.section.pk, i) for i in [1, 2, 3]]
+
+        # Republishing a page only changes its chunk
+        self.page.save_revision().publish()
+        self.assertEqual(list(cache.get_many(keys)), [keys[0], keys[2]])
+
+        # Unpublishing a page shifts the pages of the later chunks
+        generate_sitemaps(self.site)
+        self.page.unpublish()
+        self.assertEqual(list(cache.get_many(keys)), [keys[0]])
+
+        self.assertIn(
+            "/section/last/", get_sitemap_shard(self.site, self.section.pk, 2)["xml"]
+        )
+        self.assertIsNone(get_sitemap_shard(self.site, self.section.pk, 3))
+
+    def test_view_restriction_invalidates_sitemaps(self):
+        get_sitemap_shard(self.site, self.section.pk, 1)
+
+        PageViewRestriction.objects.create(
+            page=self.page, restriction_type=PageViewRestriction.LOGIN
+        )
+
+        shard = get_sitemap_shard(self.site, self.section.pk, 1)
+        self.assertNotIn("/section/page/", shard["xml"])
+
+    @mock.patch("ukgwa.utils.sitemaps.SITEMAP_CHUNK_SIZE", 1)
+    def test_large_sections_are_split_into_chunks(self):
+        response = self.client.get("/sitemap.xml")
+        self.assertContains(response, self.get_shard_url(self.section, 2))
+
+        response = self.client.get(self.get_shard_url(self.section, 2))
+        self.assertContains(response, "/section/page/")
+        self.assertNotContains(response, "<loc>http://localhost/section/</loc>")
@@ -0,0 +1,88 @@
+from django.test import TestCase
+
+from ukgwa.core.blocks import ImageBlock, StoryBlock
+from ukgwa.core.models import CallToActionSnippet
+from ukgwa.images.models import CustomImage
+
+from ..streamfield import iter_blocks_of_type, iter_chooser_ids, iter_text, strip_html
+
+
+class StreamFieldWalkerTestCase(TestCase):
+    def setUp(self):
+        self.block = StoryBlock()
+        self.raw_data = [
+            {"type": "heading", "value": "Heading"},
+            {"type": "paragraph", "value": "<p>Rich&nbsp;text</p><p>here</p>"},
+            {"type": "call_to_action", "value": 3},
+            {
+                "type": "image",
+                "value": {"image": 5, "caption": "Caption", "alt_text": ""},
+            },
+            {
+                "type": "stat_block",
+                "value": {
+                    "stats": [
+                        {
+                            "type": "item",
+                            "value": {"number": "10", "text": "Stat", "link": []},
+                        }
+                    ]
+                },
+            },
+            {
+                "type": "table",
+                "value": {"data": [["Cell 1", None], ["Cell 2", "Cell 3"]]},
+            },
+            {"type": "unknown", "value": "Ignored"},
+        ]
+
+    def test_strip_html_keeps_words_apart(self):
+        self.assertEqual(strip_html("<p>a</p><p>b&amp;c</p>").split(), ["a", "b&c"])
+
+    def test_iter_text(self):
+        text = " ".join(iter_text(self.block, self.raw_data)).split()
+        self.assertEqual(
+            text,
+            [
+                "Heading",
+                "Rich",
+                "text",
+                "here",
+                "Caption",
+                "10",
+                "Stat",
+                "Cell",
+                "1",
+                "Cell",
+                "2",
+                "Cell",
+                "3",
+            ],
+        )
+
+    def test_iter_text_skips_alt_text(self):
+        raw_data = [
+            {
+                "type": "image",
+                "value": {"image": 5, "caption": "Caption", "alt_text": "Alt text"},
+            }
+        ]
+
+        self.assertEqual(list(iter_text(self.block, raw_data)), ["Caption"])
+
+    def test_iter_chooser_ids(self):
+        self.assertEqual(
+            list(iter_chooser_ids(self.block, self.raw_data)),
+            [(CallToActionSnippet, 3), (CustomImage, 5)],
+        )
+
+    def test_iter_blocks_of_type(self):
+        self.assertEqual(
+            list(iter_blocks_of_type(self.block, self.raw_data, ImageBlock)),
+            [{"image": 5, "caption": "Caption", "alt_text": ""}],
+        )
+
+    def test_walking_does_not_query(self):
+        with self.assertNumQueries(0):
+            list(iter_text(self.block, self.raw_data))
+            list(iter_chooser_ids(self.block, self.raw_data))
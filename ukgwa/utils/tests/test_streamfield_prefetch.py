@@ -0,0 +1,133 @@
+from django.test import TestCase
+
+from wagtail.images.tests.utils import get_test_image_file
+
+from ukgwa.core.models import CallToActionSnippet
+from ukgwa.home.models import HomePage
+from ukgwa.images.models import CustomImage
+from ukgwa.standardpages.factories import InformationPageFactory
+from ukgwa.standardpages.models import InformationPage
+
+from ..streamfield_prefetch import prefetch_stream_references
+
+
+class PrefetchStreamReferencesTestCase(TestCase):
+    def setUp(self):
+        home = HomePage.objects.get()
+        self.linked_pages = [
+            home.add_child(
+                instance=InformationPageFactory.build(
+                    title=f"Linked {i}", slug=f"linked-{i}", body=[]
+                )
+            )
+            for i in range(10)
+        ]
+        cta_pages = [
+            home.add_child(
+                instance=InformationPageFactory.build(
+                    title=f"CTA page {i}", slug=f"cta-page-{i}", body=[]
+                )
+            )
+            for i in range(5)
+        ]
+        self.images = [
+            CustomImage.objects.create(title=f"Image {i}", file=get_test_image_file())
+            for i in range(5)
+        ]
+        self.ctas = [
+            CallToActionSnippet.objects.create(
+                title=f"CTA {i}",
+                image=self.images[i],
+                link=[("internal_link", {"page": cta_pages[i], "title": ""})],
+            )
+            for i in range(5)
+        ]
+
+        body = []
+        for page in self.linked_pages:
+            body.append(
+                (
+                    "quote",
+                    {
+                        "quote": "Quote",
+                        "attribution": "",
+                        "link": [("internal_link", {"page": page, "link_text": ""})],
+                    },
+                )
+            )
+        body.append(
+            (
+                "stat_block",
+                {
+                    "stats": [
+                        {
+                            "number": "1",
+                            "sentence": "",
+                            "text": "",
+                            "link": [
+                                (
+                                    "internal_link",
+                                    {"page": self.linked_pages[0], "link_text": ""},
+                                )
+                            ],
+                        }
+                    ]
+                },
+            )
+        )
+        for image in self.images:
+            body.append(("image", {"image": image, "caption": "", "alt_text": ""}))
+        for cta in self.ctas:
+            body.append(("call_to_action", cta))
+        # A reference to something that no longer exists
+        body.append(("call_to_action", CallToActionSnippet(pk=999)))
+
+        self.page = home.add_child(
+            instance=InformationPageFactory.build(title="Page", slug="page", body=body)
+        )
+
+    def read_references(self, body):
+        values = []
+        for child in body:
+            if child.block_type == "quote":
+                values.append(child.value["link"][0].value["page"].title)
+            elif child.block_type == "stat_block":
+                values.append(child.value["stats"][0]["link"][0].value["page"].title)
+            elif child.block_type == "image":
+                values.append(child.value["image"].title)
+            elif child.value is not None:
+                values.append(child.value.get_image_alt_text())
+                values.append(child.value.get_link_text())
+        return values
+
+    def test_references_are_loaded_in_bulk(self):
+        body = InformationPage.objects.get(pk=self.page.pk).body
+
+        # Pages, images, calls to action, then the pages they link to
+        with self.assertNumQueries(4):
+            prefetch_stream_references(body)
+            values = self.read_references(body)
+
+        self.assertEqual(len(values), len(self.linked_pages) + 1 + 5 + 5 * 2)
+        self.assertIn("Linked 3", values)
+        self.assertIn("Image 4", values)
+        self.assertIn("CTA page 2", values)
+
+    def test_values_match_lazy_conversion(self):
+        lazy_body = InformationPage.objects.get(pk=self.page.pk).body
+        body = InformationPage.objects.get(pk=self.page.pk).body
+        prefetch_stream_references(body)
+
+        self.assertEqual(self.read_references(body), self.read_references(lazy_body))
+        self.assertEqual(list(body.raw_data), list(lazy_body.raw_data))
+        self.assertEqual(
+            [child.id for child in body], [child.id for child in lazy_body]
+        )
+
+    def test_only_given_blocks_are_converted(self):
+        body = InformationPage.objects.get(pk=self.page.pk).body
+        image_index = len(self.linked_pages) + 1
+
+        with self.assertNumQueries(1):
+            prefetch_stream_references(body, [image_index])
+            self.assertEqual(body[image_index].value["image"].title, "Image 0")
@@ -0,0 +1,101 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connections
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from ukgwa.standardpages.models import InformationPage
+
+from ..warmup import fill_model_caches, open_connections, precompile_templates, warm_up
+
+
+class WarmUpTestCase(TestCase):
+    def test_precompile_templates(self):
+        (loader,) = engines["django"].engine.template_loaders
+        loader.reset()
+
+        count = precompile_templates()
+
+        self.assertGreater(count, 0)
+        self.assertIn("base_page.html", loader.get_template_cache)
+        self.assertIn("components/card/card.html", loader.get_template_cache)
+
+    def test_fill_model_caches(self):
+        ContentType.objects.clear_cache()
+
+        fill_model_caches()
+
+        with self.assertNumQueries(0):
+            ContentType.objects.get_for_model(InformationPage)
+
+    def test_warm_up_closes_connections(self):
+        with (
+            mock.patch.object(connections, "close_all") as close_all,
+            self.assertLogs("ukgwa.utils.warmup", "INFO") as logs,
+        ):
+            warm_up()
+
+        close_all.assert_called_once()
+        logged = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logged["event"], "warm_up")
+        self.assertEqual(set(logged["stages"]), {"templates", "models", "urls"})
+
+    def test_errors_dont_stop_the_warm_up(self):
+        with (
+            mock.patch.object(connections, "close_all"),
+            mock.patch(
+                "ukgwa.utils.warmup.fill_model_caches",
+                side_effect=RuntimeError("Database unavailable"),
+            ),
+            self.assertLogs("ukgwa.utils.warmup", "INFO") as logs,
+        ):
+            report = warm_up()
+
+        self.assertEqual(
+            report["models"]["error"], "RuntimeError: Database unavailable"
+        )
+        self.assertNotIn("error", report["urls"])
+        self.assertIn("Warm-up stage models failed", logs.output[0])
+
+    def test_errors_dont_stop_opening_other_connections(self):
+        with (
+            mock.patch.object(
+                connections["default"],
+                "ensure_connection",
+                side_effect=RuntimeError("Database unavailable"),
+            ),
+            self.assertLogs("ukgwa.utils.warmup", "INFO"),
+        ):
+            report = open_connections()
+
+        self.assertIn("error", report["databases"])
+        self.assertEqual(report["caches"]["aliases"], ["default"])
+
+    def test_open_connections(self):
+        report = open_connections()
+
+        self.assertEqual(report["databases"]["aliases"], ["default"])
+        self.assertEqual(report["caches"]["aliases"], ["default"])
+
+    @override_settings(
+        STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+    )
+    def test_startup_time_command(self):
+        stdout = StringIO()
+
+        with mock.patch.object(connections, "close_all"):
+            call_command("startup_time", "/", stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("Django set-up: ", output)
+        self.assertIn("    templates: ", output)
+        self.assertIn("    / (200): ", output)
@@ -1,10 +1,19 @@
 import logging
 from http import HTTPStatus
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
 from django.views import defaults
 
+from wagtail.models import Site
+
+from .instrumentation import get_prometheus_metrics, is_instrumentation_enabled
+from .sitemaps import get_sitemap_index, get_sitemap_shard
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,3 +38,66 @@ def csrf_failure(
 
 class HttpResponseUnauthorized(HttpResponse):
     status_code = HTTPStatus.UNAUTHORIZED
+
+
+def _get_sitemap_site(request):
+    # Falls back to the default site, so there's no site to serve at all
+    # without one
+    site = Site.find_for_request(request)
+    if site is None:
+        raise Http404
+    return site
+
+
+def _sitemap_response(request, sitemap):
+    last_modified = sitemap["lastmod"] and int(sitemap["lastmod"].timestamp())
+
+    response = HttpResponse(sitemap["xml"], content_type="application/xml")
+    response["ETag"] = sitemap["etag"]
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+
+    # Return a 304 if the client's copy is still current
+    return get_conditional_response(
+        request,
+        etag=sitemap["etag"],
+        last_modified=last_modified,
+        response=response,
+    )
+
+
+def sitemap_index(request):
+    """
+    Serve the pregenerated sitemap index, see `ukgwa.utils.sitemaps`.
+    """
+    return _sitemap_response(request, get_sitemap_index(_get_sitemap_site(request)))
+
+
+def sitemap_shard(request, section_id, chunk):
+    shard = get_sitemap_shard(_get_sitemap_site(request), section_id, chunk)
+    if shard is None:
+        raise Http404
+    return _sitemap_response(request, shard)
+
+
+def metrics(request):
+    """
+    Export the request timings of the worker process serving the request, in
+    the Prometheus text format (see `ukgwa.utils.instrumentation`), to staff
+    users or with the `INSTRUMENTATION_METRICS_TOKEN` bearer token.
+    """
+    if not is_instrumentation_enabled():
+        raise Http404
+
+    token = settings.INSTRUMENTATION_METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not request.user.is_staff and not (
+        token and constant_time_compare(authorization, f"Bearer {token}")
+    ):
+        response = HttpResponseUnauthorized()
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+
+    return HttpResponse(
+        get_prometheus_metrics(), content_type="text/plain; version=0.0.4"
+    )
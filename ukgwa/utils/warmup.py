@@ -0,0 +1,181 @@
+"""
+Warming up the app before it serves requests.
+
+Gunicorn loads the app in its master process (`preload_app`) and forks the
+workers from it, including those replacing workers recycled after
+`max_requests`. Anything loaded lazily by Django or Wagtail on the first
+requests is loaded again by every new worker, unless the master has already
+loaded it before forking. `warm_up` does so from the `when_ready` hook (see
+gunicorn.conf.py):
+
+- compiling the project's templates into the cached template loader;
+- filling the content type cache for every model, used to get the specific
+  class of pages, and Wagtail's list of page models;
+- importing and populating the URL resolvers.
+
+Connections can't be shared across processes, so `warm_up` closes those it
+opened, and each worker opens its own with `open_connections` before
+accepting requests.
+
+Both log how long each stage took as one line of JSON to this module's
+logger, which is the start-up time report of each process. A stage that fails
+is logged and skipped, leaving it to be loaded lazily as without warm-up.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+from wagtail.models import get_page_models
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+TEMPLATE_SUFFIXES = {".html", ".txt", ".xml"}
+
+
+@contextmanager
+def _timed_stage(report, name):
+    """
+    Time a stage of the warm-up. Errors are logged and recorded in the report
+    rather than raised: warming up is an optimisation, and mustn't stop the
+    server from starting, e.g. while the database is unavailable.
+    """
+    stage = report.setdefault(name, {})
+    start = time.perf_counter()
+    try:
+        yield stage
+    except Exception as e:
+        logger.exception("Warm-up stage %s failed", name)
+        stage["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        stage["duration"] = round(time.perf_counter() - start, 6)
+
+
+def get_project_templates(engine):
+    """
+    Return the names of the templates of the project found by `engine`'s
+    loaders (e.g. "components/card/card.html").
+    """
+    names = set()
+    for template_dir in engine.template_dirs:
+        template_dir = Path(template_dir).resolve()
+        if not template_dir.is_relative_to(PROJECT_DIR):
+            continue
+        for path in template_dir.rglob("*"):
+            if path.suffix in TEMPLATE_SUFFIXES and path.is_file():
+                names.add(path.relative_to(template_dir).as_posix())
+    return sorted(names)
+
+
+def precompile_templates():
+    """
+    Compile the project's templates, so that the cached template loader
+    holds them. Return the number of templates compiled.
+    """
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in get_project_templates(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                # Only fail when the template is rendered, as without warm-up
+                logger.warning("Couldn't compile template %s", name, exc_info=True)
+            else:
+                count += 1
+    return count
+
+
+def fill_model_caches():
+    """
+    Fill the content type cache for every model, and Wagtail's list of page
+    models. Return the number of models.
+    """
+    models = apps.get_models()
+    ContentType.objects.get_for_models(*models)
+    get_page_models()
+    return len(models)
+
+
+def populate_url_resolver():
+    resolver = get_resolver()
+    # Importing the URLconfs and building the reverse lookups are both lazy
+    resolver.url_patterns
+    resolver.reverse_dict
+
+
+def open_connections():
+    """
+    Open the connections to the databases which keep them between requests,
+    and to every cache, logging how long it took.
+    """
+    report = {}
+    with _timed_stage(report, "databases") as stage:
+        aliases = [
+            alias
+            for alias in connections
+            if connections.settings[alias]["CONN_MAX_AGE"] != 0
+        ]
+        for alias in aliases:
+            connections[alias].ensure_connection()
+        stage["aliases"] = aliases
+    with _timed_stage(report, "caches") as stage:
+        for cache in caches.all():
+            cache.get("warm-up")
+        stage["aliases"] = list(caches.settings)
+    _log_report("open_connections", report)
+    return report
+
+
+def warm_up():
+    """
+    Load what Django and Wagtail would load lazily on the first requests,
+    logging how long each stage took.
+    """
+    report = {}
+    with _timed_stage(report, "templates") as stage:
+        stage["count"] = precompile_templates()
+    with _timed_stage(report, "models") as stage:
+        stage["count"] = fill_model_caches()
+    with _timed_stage(report, "urls"):
+        populate_url_resolver()
+
+    # Forked processes mustn't share the connections opened while warming up
+    try:
+        connections.close_all()
+        for cache in caches.all(initialized_only=True):
+            cache.close()
+    except Exception:
+        logger.exception("Couldn't close the connections opened while warming up")
+
+    _log_report("warm_up", report)
+    return report
+
+
+def _log_report(event, report):
+    logger.info(
+        json.dumps(
+            {
+                "event": event,
+                "pid": os.getpid(),
+                "duration": round(
+                    sum(stage["duration"] for stage in report.values()), 6
+                ),
+                "stages": report,
+            }
+        )
+    )